@@ -1,14 +1,21 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-from urllib.parse import urlparse
-from collections import Counter
-import re
+import plotly.graph_objects as pgo
 import html as _html  # escapar strings em cards
 
-from src.fetch import fetch_news
-from src.clean import clean_text, strip_html_keep_text
-from src.sentiment import classify_text_series, SENTIMENT_ORDER
-from src.utils import sentiment_counts, add_clickable_links, make_wordcloud_image
+from src.alerts import AlertEngine
+from src.config import (DEFAULT_QUERY, LANG_OPTIONS, METRICS_EXPORT, METRICS_JSONL, METRICS_PROM, PRESETS,
+                        REGION_OPTIONS, WORDCLOUD_CACHE_DIR)
+from src.export import EXPORT_FORMATS, export_file
+from src.fetch import get_feed_cache
+from src.metrics import Profiler, begin_run, export, jsonl_lines, prometheus_text, run_spans, span, summary
+from src.pipeline import collect, load_view, sample_frame, summarize
+from src.sentiment import SENTIMENT_ORDER
+from src.shards import ShardReport, describe_ranges
+from src.store import ArticleStore
+from src.utils import (WORDCLOUD_TOP_N, add_clickable_links, format_dates, humanize_series,
+                       make_wordcloud_png, text_column)
 
 st.set_page_config(page_title="IA no Piauí — Monitor de Notícias", layout="wide")
 st.markdown("""
@@ -74,11 +81,16 @@ h1, h2, h3 { letter-spacing: .2px; }
   margin-bottom: 10px;
   box-shadow: 0 4px 12px rgba(0,0,0,.15);
 }
+.cards {display:grid; grid-template-columns:repeat(2, minmax(0, 1fr)); gap:10px;}
+.cards .card {margin-bottom:0;}
 .card a {text-decoration: none;}
 .card .meta {font-size:.8rem; opacity:.7}
 </style>
 """, unsafe_allow_html=True)
 
+# spans de tempo deste rerun (get_news, limpeza, sentimento, renderização...)
+begin_run()
+
 st.title(" IA no Piauí — Monitor de Notícias")
 st.caption("Coleta via RSS do Google Notícias, limpeza, análise de sentimento por regras e visualização.")
 
@@ -105,15 +117,11 @@ def build_google_news_query(base: str, must: str = "", exclude: str = "", site:
 st.sidebar.markdown("## Consulta")
 with st.sidebar.container(border=True):
     # Presets
-    pc1, pc2, pc3 = st.columns(3)
-    if pc1.button("IA Piauí", use_container_width=True):
-        st.session_state["query_base"] = '("Inteligência Artificial" Piauí)'
-    if pc2.button("SIA Piauí", use_container_width=True):
-        st.session_state["query_base"] = '("SIA Piauí")'
-    if pc3.button("IA Governo", use_container_width=True):
-        st.session_state["query_base"] = '("Inteligência Artificial" governo Piauí)'
+    for col, (label, preset) in zip(st.columns(len(PRESETS)), PRESETS.items()):
+        if col.button(label, use_container_width=True):
+            st.session_state["query_base"] = preset
 
-    query_base = st.session_state.get("query_base", '("Inteligência Artificial" Piauí) OR ("SIA Piauí")')
+    query_base = st.session_state.get("query_base", DEFAULT_QUERY)
 
     with st.form("search_form", clear_on_submit=False):
         base = st.text_input(
@@ -122,8 +130,15 @@ with st.sidebar.container(border=True):
             placeholder='Ex.: "Inteligência Artificial" Piauí OR "SIA Piauí"',
         )
         qtd = st.slider("Quantidade de notícias", 5, 30, 15, 1)
-        lang = st.selectbox("Idioma (hl)", ["pt-BR", "pt-PT", "en-US"], index=0)
-        region = st.selectbox("Região (ceid)", ["BR:pt-419", "PT:pt-150", "US:en"], index=0)
+        lang = st.selectbox("Idioma (hl)", LANG_OPTIONS, index=0)
+        region = st.selectbox("Região (ceid)", REGION_OPTIONS, index=0)
+        modo = st.radio("Dados", ["Coletar agora", "Banco local (coletor)"], horizontal=True,
+                        help="Banco local lê o que `python -m src.poller` já coletou, sem ir à rede.")
+        hist_days = st.slider("Histórico acumulado (dias)", 0, 180, 0, 1,
+                              help="0 = só esta coleta; acima disso inclui o que já foi armazenado para a consulta.")
+        varrer = st.checkbox("Varrer o período inteiro", value=False,
+                             help="Divide o histórico (mín. 1 dia) em consultas after:/before: paralelas para passar do "
+                                  "limite de ~100 itens por consulta do RSS; ignora a quantidade acima.")
 
         with st.expander("⚙️ Filtros avançados"):
             must = st.text_input("Palavras obrigatórias (separe por vírgula)", value="")
@@ -135,48 +150,122 @@ with st.sidebar.container(border=True):
 final_query = build_google_news_query(base, must=must, exclude=exclude, site=site)
 query = final_query
 max_items = qtd
-go = submitted
+# o botão do form só vale True no rerun do envio; os demais widgets (filtros, ordenação)
+# também disparam reruns e não podem derrubar o painel
+if submitted:
+    st.session_state["coletou"] = True
+go = st.session_state.get("coletou", False)
 
 st.sidebar.caption("💡 Use aspas para frase exata; `-termo` exclui; `site:dominio.com` filtra uma fonte.")
+agrupar = st.sidebar.toggle("Agrupar republicações", value=False,
+                            help="Conta histórias em vez de cópias: a mesma matéria republicada por vários veículos vira uma linha.")
+debug_box = st.sidebar.expander("🔧 Depuração")
+debug = debug_box.toggle("Tempos por etapa", value=False)
+profile = debug_box.checkbox("Perfilar este rerun (cProfile)", value=False,
+                             help="Custa alguns % de desempenho; mostra as funções mais caras no fim do painel.")
 
 if not go:
     st.info("Use o painel lateral e clique em **Coletar notícias**.")
     st.stop()
-    
-@st.cache_data(show_spinner=False, ttl=600)
-def get_news(query, max_items, lang, region):
-    return fetch_news(query=query, max_items=max_items, hl=lang, ceid=region)
-
-with st.spinner("Buscando RSS..."):
-    news = get_news(query, max_items, lang, region)
-
-if not news:
-    st.warning("Sem notícias agora. Usando exemplo local.")
-    news = [
-        {"title": "Universidade lança laboratório de IA no Piauí", "link": "https://exemplo.local/1",
-         "description": "Projeto destaca inovação e benefício para educação e economia regional.", "pubDate": None},
-        {"title": "Debate sobre impactos da IA no Piauí", "link": "https://exemplo.local/2",
-         "description": "Desafios e oportunidades foram discutidos por especialistas.", "pubDate": None},
-    ]
-
-df = pd.DataFrame(news)
 
-df["data_pub"] = pd.to_datetime(df.get("pubDate"), errors="coerce", utc=True)
-
-def _domain(url):
-    try:
-        host = urlparse(url).netloc
-        return host.replace("www.", "") if host else ""
-    except Exception:
-        return ""
-
-df["fonte"] = df.get("link", "").map(_domain)
-df = df.drop_duplicates(subset=["link", "title"], keep="first").reset_index(drop=True)
-
-df["descricao_limpa"] = df["description"].fillna("").map(strip_html_keep_text).map(clean_text)
-df["sentimento"] = classify_text_series(df["descricao_limpa"])
+profiler = Profiler().start() if profile else None
+
+def render_debug():
+    # fecha o rerun: exporta os spans e, se pedido, mostra tempos, percentis e o perfil
+    prof_text = profiler.stop() if profiler is not None else ""
+    spans = run_spans()
+    if METRICS_EXPORT or debug:
+        export(spans, METRICS_JSONL, METRICS_PROM, query=query)
+    if not (debug or prof_text):
+        return
+    with debug_box:
+        if debug:
+            st.caption("Este rerun")
+            st.dataframe(pd.DataFrame(
+                [{"etapa": sp.stage, "ms": round(sp.seconds * 1000, 1), "itens": sp.items} for sp in spans]
+            ), hide_index=True, use_container_width=True)
+            st.caption("Sessões deste processo (p50/p95)")
+            st.dataframe(pd.DataFrame(
+                [{"etapa": k, "n": v["count"], "p50 ms": round(v["p50"] * 1000, 1), "p95 ms": round(v["p95"] * 1000, 1)}
+                 for k, v in sorted(summary().items())]
+            ), hide_index=True, use_container_width=True)
+            c1, c2 = st.columns(2)
+            c1.download_button("Prometheus", prometheus_text(), file_name="metrics.prom", mime="text/plain")
+            c2.download_button("JSONL", jsonl_lines(spans, query=query), file_name="metrics.jsonl",
+                               mime="application/x-ndjson")
+        if prof_text:
+            st.code(prof_text, language=None)
+
+# o cache em disco (ETag/Last-Modified + stale-while-revalidate) decide quando ir à rede;
+# aqui só evitamos repetir coleta + ingestão a cada rerun do script
+@st.cache_data(show_spinner=False, ttl=60)
+def collect_news(query, max_items, lang, region, days=0):
+    report = ShardReport()
+    alerts = get_alerts()
+    ids = collect(get_store(), query, max_items, lang, region, cache=get_feed_cache(), days=days, report=report,
+                  on_new=alerts.hook(query) if alerts is not None else None)
+    return ids, report
+
+# mesmas regras do coletor (MONITOR_ALERTS): artigo que entra no banco pelo painel também é avaliado,
+# senão ele nunca dispararia alerta (a ingestão só devolve linhas inéditas)
+@st.cache_resource(show_spinner=False)
+def get_alerts():
+    return AlertEngine.from_file()
+
+# quadro processado + agregados por parâmetros da consulta e versão do banco:
+# mexer em filtros, ordenação ou sliders só re-renderiza. cache_resource entrega o mesmo objeto
+# a todas as sessões (sem cópia por rerun), então as abas só leem o quadro, nunca o alteram
+@st.cache_resource(show_spinner=False, max_entries=32)
+def get_view(query, ids, start, limit, agrupar, version):
+    return load_view(get_store(), query=query, ids=ids, start=start, limit=limit,
+                     agrupar=agrupar, top_k=WORDCLOUD_TOP_N)
+
+@st.cache_resource(show_spinner=False)
+def get_sample_view(agrupar):
+    return summarize(sample_frame(), agrupar, WORDCLOUD_TOP_N)
+
+# séries por hora/dia mantidas na ingestão (src/rollups.py); nada de reagrupar artigos
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_timeline(query, grain, since, version):
+    return get_store().rollups.series(query, grain, start=since)
+
+@st.cache_resource(show_spinner=False)
+def get_store():
+    return ArticleStore()
+
+store = get_store()
+start = pd.Timestamp.now(tz="UTC").floor("D") - pd.Timedelta(days=hist_days) if hist_days else None
+exemplo = False
+if modo.startswith("Banco"):
+    # dados pré-processados pelo coletor: só leitura, sem rede nem limpeza
+    view = get_view(query, None, start, None if hist_days else max_items, agrupar, store.version())
+    if view.df.empty:
+        st.warning("Nada armazenado para esta consulta ainda. Rode `python -m src.poller` ou use **Coletar agora**.")
+        render_debug()
+        st.stop()
+else:
+    with st.spinner("Buscando RSS..."):
+        # só artigos novos passam por limpeza/sentimento; o resto vem pronto do banco local
+        ids, shard_report = collect_news(query, max_items, lang, region, max(hist_days, 1) if varrer else 0)
+    if shard_report.failed:
+        st.warning(f"{len(shard_report.failed)} fatia(s) do período falharam e ficaram de fora desta coleta: "
+                   f"{describe_ranges(shard_report.failed)}.")
+    if shard_report.saturated:
+        st.warning(f"{len(shard_report.saturated)} dia(s) continuaram no limite de itens do RSS mesmo fatiados; "
+                   "parte da cobertura desses dias ficou de fora.")
+    elif varrer and ids and not shard_report.failed:
+        st.caption(f"Período varrido em {shard_report.requests} consultas ({len(ids)} notícias distintas).")
+
+    if not ids:
+        st.warning("Sem notícias agora. Usando exemplo local.")
+        view = get_sample_view(agrupar)
+        exemplo = True
+    elif hist_days:
+        view = get_view(query, None, start, None, agrupar, store.version())
+    else:
+        view = get_view(None, tuple(ids), None, None, agrupar, store.version())
 
-counts = sentiment_counts(df["sentimento"])
+df, publicacoes, counts = view.df, view.publicacoes, view.counts
 total = len(df)
 pos = int(counts.get("Positivo", 0))
 neu = int(counts.get("Neutro", 0))
@@ -189,8 +278,9 @@ tab_overview, tab_graficos, tab_tabela, tab_nuvem = st.tabs(
     ["Visão Geral", "Gráficos", "Tabela", "Nuvem & Temas"]
 )
 
-with tab_overview:
-    
+with tab_overview, span("render_overview", total):
+    kpi_total_sub = (f"{publicacoes} publicações agrupadas em {total} histórias" if agrupar
+                     else "Conjunto coletado desta busca")
     kpi_html = f"""
     <div class="kpi-grid">
       <!-- TOTAL -->
@@ -200,7 +290,7 @@ with tab_overview:
           <div class="kpi-value">{total}</div>
           <span class="pill pill--total">consulta atual</span>
         </div>
-        <div class="kpi-sub">Conjunto coletado desta busca</div>
+        <div class="kpi-sub">{kpi_total_sub}</div>
       </div>
 
       <!-- POSITIVO -->
@@ -248,15 +338,7 @@ with tab_overview:
     st.divider()
 
     st.subheader("Principais fontes")
-    top_fontes = (
-        df["fonte"].fillna("").replace("", pd.NA).dropna().value_counts().head(10).reset_index()
-    )
-    if top_fontes.shape[1] == 2:
-        c0, c1 = top_fontes.columns
-        top_fontes = top_fontes.rename(columns={c0: "Fonte", c1: "Quantidade"})
-    else:
-        top_fontes.columns = ["Fonte", "Quantidade"]
-
+    top_fontes = view.top_fontes
     if not top_fontes.empty:
         maxq = max(1, int(top_fontes["Quantidade"].max()))
         tags = []
@@ -280,73 +362,34 @@ with tab_overview:
     with colB:
         qtd_cards = st.slider("Quantidade de cards", 4, 12, 6, 2)
 
-    dfo = df.copy()
+    # ordena só as chaves (pub_ts e códigos int8 do sentimento); apenas os cards exibidos são materializados
+    ts = df["pub_ts"].astype("float64").fillna(float("-inf")).to_numpy()
     if order_mode == "Mais recentes":
-        dfo = dfo.sort_values("data_pub", ascending=False)
-    elif order_mode == "Mais positivas":
-        cat = pd.Categorical(dfo["sentimento"], categories=["Positivo", "Neutro", "Negativo"], ordered=True)
-        dfo = dfo.assign(_ord=cat).sort_values(["_ord", "data_pub"], ascending=[True, False]).drop(columns="_ord")
+        order = np.argsort(-ts, kind="stable")
     else:
-        cat = pd.Categorical(dfo["sentimento"], categories=["Negativo", "Neutro", "Positivo"], ordered=True)
-        dfo = dfo.assign(_ord=cat).sort_values(["_ord", "data_pub"], ascending=[True, False]).drop(columns="_ord")
-
-    latest = dfo.head(qtd_cards).copy()
-    col_left, col_right = st.columns(2)
-
-    def humanize(ts):
-        try:
-            ts = pd.to_datetime(ts, errors="coerce")
-            if pd.isna(ts): return ""
-            ts = ts.tz_localize(None) if getattr(ts, "tzinfo", None) else ts
-            delta = pd.Timestamp.now() - ts
-            mins = int(delta.total_seconds() // 60)
-            if mins < 1: return "agora"
-            if mins < 60: return f"{mins} min atrás"
-            hrs = mins // 60
-            if hrs < 24: return f"{hrs} h atrás"
-            dias = hrs // 24
-            return f"{dias} d atrás"
-        except Exception:
-            return ""
-
-    for idx, r in enumerate(latest.itertuples(index=False)):
-        titulo = r.title or "(sem título)"
-        link = r.link or "#"
-        fonte = r.fonte or ""
-        quando = humanize(r.data_pub)
-        desc_clean = (getattr(r, "descricao_limpa", "") or "").strip()
-        desc_clean = (desc_clean[:220] + "…") if len(desc_clean) > 220 else desc_clean
-
-        titulo = _html.escape(titulo)
-        desc_clean = _html.escape(desc_clean)
-
-        sent = (getattr(r, "sentimento", "") or "").lower()
-        if "positivo" in sent:
-            badge_sent = '<span class="pill pill--pos">Positivo</span>'
-        elif "negativo" in sent:
-            badge_sent = '<span class="pill pill--neg">Negativo</span>'
-        else:
-            badge_sent = '<span class="pill pill--neu">Neutro</span>'
-
-        card_html = f"""
-        <div class="card">
-          <div style="display:flex;align-items:center;gap:8px;flex-wrap:wrap;">
-            <a href="{link}" target="_blank" rel="noopener noreferrer"><strong>{titulo}</strong></a>
-            {badge_sent}
-          </div>
-          <div class="meta">{fonte} • {quando}</div>
-          <div style="margin-top:6px">{desc_clean}</div>
-        </div>
-        """
-
-        if idx % 2 == 0:
-            with col_left:
-                st.markdown(card_html, unsafe_allow_html=True)
-        else:
-            with col_right:
-                st.markdown(card_html, unsafe_allow_html=True)
+        codes = df["sentimento"].cat.codes.to_numpy()      # 0 = Positivo, 1 = Neutro, 2 = Negativo
+        codes = np.where(codes < 0, 1, codes)
+        order = np.lexsort((-ts, codes if order_mode == "Mais positivas" else 2 - codes))
+
+    # um único bloco de HTML (grade de 2 colunas) montado com operações por coluna
+    latest = df.iloc[order[:qtd_cards]]
+    esc = lambda col: text_column(latest[col]).map(_html.escape)
+    titulo = esc("title").where(text_column(latest["title"]).str.strip() != "", "(sem título)")
+    link = esc("link").where(text_column(latest["link"]) != "", "#")
+    desc = text_column(latest["descricao_limpa"]).str.strip()
+    desc = desc.where(desc.str.len() <= 220, desc.str[:220] + "…").map(_html.escape)
+    sent = latest["sentimento"].astype(object).fillna("Neutro")
+    pill = sent.map({"Positivo": "pos", "Negativo": "neg"}).fillna("neu")
+    cards = (
+        '<div class="card"><div style="display:flex;align-items:center;gap:8px;flex-wrap:wrap;">'
+        '<a href="' + link + '" target="_blank" rel="noopener noreferrer"><strong>' + titulo + '</strong></a>'
+        '<span class="pill pill--' + pill + '">' + sent + '</span></div>'
+        '<div class="meta">' + esc("fonte") + " • " + humanize_series(latest["pub_ts"]) + '</div>'
+        '<div style="margin-top:6px">' + desc + "</div></div>"
+    )
+    st.markdown('<div class="cards">' + "".join(cards) + "</div>", unsafe_allow_html=True)
 
-with tab_graficos:
+with tab_graficos, span("render_graficos", total):
     import plotly.express as px
 
     st.subheader("Distribuição de Sentimentos")
@@ -395,12 +438,48 @@ with tab_graficos:
         f"Negativo: {int(series.get('Negativo',0))}"
     )
 
-with tab_tabela:
+    st.divider()
+    st.subheader("Linha do tempo")
+    ct1, ct2 = st.columns(2)
+    grao = ct1.radio("Granularidade", ["Dia", "Hora"], horizontal=True)
+    grain, periodo = ("d", "dias") if grao == "Dia" else ("h", "horas")
+    janela = ct2.slider(f"Média móvel ({periodo})", 1, 14 if grain == "d" else 48, 7 if grain == "d" else 24)
+    if exemplo:
+        st.info("Linha do tempo indisponível para o exemplo local.")
+    else:
+        desde = start if hist_days else (
+            pd.Timestamp.now(tz="UTC").floor("D") - pd.Timedelta(days=30) if grain == "d"
+            else pd.Timestamp.now(tz="UTC").floor("h") - pd.Timedelta(hours=72)
+        )
+        serie = get_timeline(query, grain, desde, store.version())
+        if serie.empty:
+            st.info("Sem histórico armazenado para esta consulta.")
+        else:
+            fig_tl = pgo.Figure()
+            for col, nome, cor in (("pos", "Positivo", "#16a34a"), ("neu", "Neutro", "#64748b"), ("neg", "Negativo", "#dc2626")):
+                fig_tl.add_bar(x=serie.index, y=serie[col], name=nome, marker_color=cor, opacity=0.75)
+            fig_tl.add_scatter(
+                x=serie.index, y=serie["total"].rolling(janela, min_periods=1).mean(),
+                name=f"Média móvel ({janela} {periodo})", mode="lines", line=dict(color="#2563eb", width=2.5),
+            )
+            fig_tl.update_layout(
+                barmode="stack", margin=dict(l=10, r=10, t=10, b=10), height=360,
+                legend_orientation="h", legend_y=-0.15, xaxis_title=None, yaxis_title=None,
+            )
+            st.plotly_chart(fig_tl, use_container_width=True)
+            saldo = (serie["pos"] - serie["neg"]).rolling(janela, min_periods=1).sum()
+            base = serie["total"].rolling(janela, min_periods=1).sum()
+            ultimo = float(saldo.iloc[-1] / base.iloc[-1]) if base.iloc[-1] else 0.0
+            st.caption(f"Histórico armazenado da consulta, lido das séries agregadas na ingestão. "
+                       f"Saldo (positivas − negativas) na última janela: {ultimo:+.0%}")
+
+with tab_tabela, span("render_tabela", total):
     st.subheader("Tabela de Notícias (com filtros)")
 
     colf1, colf2, colf3 = st.columns([1.2, 1, 1])
-    termo = colf1.text_input("Filtrar por termo (título/descrição)", "")
-    fontes = sorted([f for f in df["fonte"].dropna().unique() if f])
+    termo = colf1.text_input("Filtrar por termo (título/descrição)", "",
+                             help="Espaço = E; `OR` (maiúsculo) = OU; `-termo` exclui; `termo*` busca por prefixo. Acentos são ignorados.")
+    fontes = sorted(f for f in df["fonte"].cat.categories if f)
     sel_fontes = colf2.multiselect("Filtrar por fonte", fontes)
     sentimentos_opt = colf3.multiselect("Filtrar por sentimento", SENTIMENT_ORDER, default=SENTIMENT_ORDER)
 
@@ -410,72 +489,114 @@ with tab_tabela:
     date_initial = cdl.date_input("Data inicial", value=min_dt.date() if min_dt else None)
     date_final = cdr.date_input("Data final", value=max_dt.date() if max_dt else None)
 
-    dff = df.copy()
+    # filtros combinados numa máscara; só as linhas e colunas exibidas são copiadas
+    mask = np.ones(len(df), dtype=bool)
 
-    if termo:
-        t = termo.strip().lower()
-        dff = dff[
-            dff["title"].fillna("").str.lower().str.contains(t) |
-            dff["description"].fillna("").str.lower().str.contains(t)
-        ]
+    if termo.strip():
+        mask &= df["id"].isin(view.search_index().search(termo)).to_numpy()
 
     if sel_fontes:
-        dff = dff[dff["fonte"].isin(sel_fontes)]
+        mask &= df["fonte"].isin(sel_fontes).to_numpy()
 
     if sentimentos_opt:
-        dff = dff[dff["sentimento"].isin(sentimentos_opt)]
+        mask &= df["sentimento"].isin(sentimentos_opt).to_numpy()
 
     if min_dt and max_dt and date_initial and date_final:
-        d1 = pd.to_datetime(date_initial).date()
-        d2 = pd.to_datetime(date_final).date()
-        dff = dff[
-            (dff["data_pub"].dt.date >= d1) &
-            (dff["data_pub"].dt.date <= d2)
-        ]
-
-    df_show = dff[["title", "link", "description", "sentimento", "fonte", "data_pub"]].copy()
-    df_show = add_clickable_links(df_show, "title", "link", new_col="título")
-    if pd.api.types.is_datetime64tz_dtype(df_show["data_pub"]):
-        df_show["data_pub"] = df_show["data_pub"].dt.tz_convert(None)
-    df_show["data_pub"] = pd.to_datetime(df_show["data_pub"], errors="coerce").dt.strftime("%Y-%m-%d %H:%M").fillna("")
+        lo = pd.Timestamp(date_initial, tz="UTC")
+        hi = pd.Timestamp(date_final, tz="UTC") + pd.Timedelta(days=1)
+        pub_ts = df["pub_ts"]
+        mask &= ((pub_ts >= lo.timestamp()) & (pub_ts < hi.timestamp())).fillna(False).to_numpy(dtype=bool)
+
+    # ordenação e paginação no servidor: ordena só chaves numéricas das linhas filtradas
+    # e materializa/serializa apenas a página visível
+    rows = np.flatnonzero(mask)
+    cp1, cp2, cp3, cp4 = st.columns([1.2, 1, 1, 1])
+    sort_by = cp1.selectbox("Ordenar por", ["Data", "Sentimento", "Fonte", "Título"], key="tabela_ordem")
+    desc_order = cp2.toggle("Decrescente", value=True, key="tabela_desc")
+    page_size = cp3.selectbox("Linhas por página", [25, 50, 100, 250], index=1, key="tabela_tamanho")
+    pages = max(1, -(-len(rows) // page_size))
+    if st.session_state.get("tabela_pagina", 1) > pages:
+        st.session_state["tabela_pagina"] = pages
+    page = cp4.number_input(f"Página (de {pages})", min_value=1, max_value=pages, step=1, key="tabela_pagina")
+
+    ts = df["pub_ts"].to_numpy(dtype="float64", na_value=np.nan)[rows]
+    ts = np.nan_to_num(ts, nan=float("-inf"))
+    if sort_by == "Sentimento":
+        key = df["sentimento"].cat.codes.to_numpy()[rows].astype("float64")
+    elif sort_by == "Fonte":
+        key = df["fonte"].cat.codes.to_numpy()[rows].astype("float64")    # categorias já em ordem alfabética
+    elif sort_by == "Título":
+        key = pd.factorize(text_column(df["title"].iloc[rows]).str.lower(), sort=True)[0].astype("float64")
+    else:
+        key = ts
+    order = np.lexsort((-ts, -key if desc_order else key))
+    first = (int(page) - 1) * page_size
+    page_rows = rows[order[first:first + page_size]]
+
+    dfp = df.iloc[page_rows]
+    df_show = add_clickable_links(dfp[["title", "link"]], "title", "link", new_col="título")
+    df_show["sentimento"] = dfp["sentimento"]
+    df_show["fonte"] = dfp["fonte"]
+    df_show["data_pub"] = format_dates(dfp["pub_ts"]).to_numpy()
+    df_show["descrição"] = dfp["descricao_limpa"]
 
     st.dataframe(
-        df_show[["título", "sentimento", "fonte", "data_pub", "description"]],
-        use_container_width=True,
+        df_show[["título", "sentimento", "fonte", "data_pub", "descrição"]],
+        use_container_width=True, hide_index=True,
     )
-
-    csv = dff[["title", "link", "description", "sentimento", "fonte", "data_pub"]].to_csv(index=False)
-    st.download_button("⬇️ Exportar CSV filtrado", data=csv, file_name="ia_piaui_noticias_filtrado.csv", mime="text/csv")
+    if len(rows):
+        st.caption(f"Linhas {first + 1}–{first + len(page_rows)} de {len(rows)}")
+
+    # o arquivo só é gerado no clique (callable), lendo do banco em lotes
+    with st.expander("⬇️ Exportar"):
+        ce1, ce2 = st.columns(2)
+        escopo = ce1.radio("Conteúdo", ["Tabela filtrada", "Histórico da consulta", "Banco inteiro"],
+                           help="Histórico e banco inteiro incluem tudo o que já foi armazenado, não só o que está na tela.")
+        formato = ce2.selectbox("Formato", list(EXPORT_FORMATS))
+        ext, mime = EXPORT_FORMATS[formato]
+        if escopo == "Tabela filtrada":
+            export_filters = {"ids": tuple(df["id"].to_numpy()[rows])}
+        elif escopo == "Histórico da consulta":
+            export_filters = {"query": query}
+        else:
+            export_filters = {}
+        st.download_button(
+            f"Baixar {formato}", data=lambda e=ext, f=export_filters: export_file(store, e, **f),
+            file_name=f"ia_piaui_noticias_{escopo.split()[0].lower()}.{ext}", mime=mime,
+        )
 
 with tab_nuvem:
+    unigrams = view.unigrams
+
     st.subheader("Nuvem de Palavras")
-    texto = " ".join(df["descricao_limpa"].tolist())
-    img = make_wordcloud_image(texto)
+    with span("render_wordcloud", len(unigrams)):
+        img = make_wordcloud_png(unigrams, cache_dir=WORDCLOUD_CACHE_DIR)
     if img is not None:
         st.image(img, use_container_width=True)
     else:
         st.info("Nuvem indisponível (instale `pillow` e `wordcloud`).")
 
     st.subheader("Temas recorrentes")
-    STOP = {
-        "de","da","do","das","dos","a","o","as","os","e","é","em","um","uma","para","por",
-        "com","no","na","nas","nos","que","se","sua","seu","são","ser","ao","à","às","ou",
-        "mais","menos","sobre","entre","até","como","também","ja","já","apos","após","pela","pelo"
-    }
-
-    tokens = []
-    for txt in df["descricao_limpa"].fillna(""):
-        ws = [w for w in re.findall(r"[a-zà-ú0-9\-]+", txt) if w not in STOP and len(w) > 2]
-        tokens.extend(ws)
-
-    unigrams = Counter(tokens).most_common(15)
-    bigrams = Counter(zip(tokens, tokens[1:])).most_common(15)
-    bigrams = [(" ".join(bi), c) for bi, c in bigrams]
-
-    col_a, col_b = st.columns(2)
+    col_a, col_b = st.columns([1, 3])
     with col_a:
         st.caption("🔤 Top palavras")
-        st.dataframe(pd.DataFrame(unigrams, columns=["termo","freq"]), use_container_width=True)
+        st.dataframe(pd.DataFrame(unigrams[:15], columns=["termo","freq"]), use_container_width=True)
     with col_b:
-        st.caption("🔡 Top bigramas")
-        st.dataframe(pd.DataFrame(bigrams, columns=["termo","freq"]), use_container_width=True)
\ No newline at end of file
+        st.caption("🧭 Temas (agrupamento dos textos, atualizado a cada coleta)")
+        if view.topics.empty:
+            st.info("Sem temas para esta janela ainda.")
+        else:
+            st.dataframe(
+                view.topics,
+                column_config={
+                    "tema": st.column_config.TextColumn("Tema"),
+                    "termos": st.column_config.TextColumn("Termos", width="medium"),
+                    "artigos": st.column_config.NumberColumn("Artigos"),
+                    "variacao": st.column_config.NumberColumn(
+                        "Variação", format="%+d%%", help="2ª metade da janela contra a 1ª"),
+                    "serie": st.column_config.LineChartColumn("Evolução", y_min=0),
+                },
+                use_container_width=True, hide_index=True,
+            )
+
+render_debug()
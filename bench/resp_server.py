@@ -0,0 +1,162 @@
+from __future__ import annotations
+import argparse
+import socketserver
+import threading
+import time
+from typing import Optional
+
+from src.cache import RELEASE_SCRIPT
+
+# servidor mínimo do protocolo Redis (RESP2) em memória, para testar o cache compartilhado
+# (MONITOR_CACHE=redis://...) sem um Redis de verdade. comandos: PING, GET, SET (EX/PX/NX/XX),
+# DEL, EXISTS, SELECT, FLUSHDB, AUTH (aceita qualquer senha) e EVAL só com o script de liberação
+# de trava de src.cache; expiração verificada na leitura
+
+
+class RespServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.dbs: dict[int, dict[bytes, tuple[bytes, Optional[float]]]] = {}
+        self.commands = 0
+        self._lock = threading.Lock()
+        self._server = self._make_server(host, port)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def _live(self, db: int, key: bytes) -> Optional[bytes]:
+        data = self.dbs.setdefault(db, {})
+        hit = data.get(key)
+        if hit is None:
+            return None
+        value, expires = hit
+        if expires is not None and expires <= time.time():
+            del data[key]
+            return None
+        return value
+
+    def execute(self, db: int, args: list[bytes]):
+        # devolve (resposta, novo db); a resposta já vem codificada em RESP
+        cmd = args[0].upper() if args else b""
+        with self._lock:
+            self.commands += 1
+            if cmd == b"PING":
+                return b"+PONG\r\n", db
+            if cmd == b"AUTH":
+                return b"+OK\r\n", db
+            if cmd == b"SELECT":
+                return b"+OK\r\n", int(args[1])
+            if cmd == b"FLUSHDB":
+                self.dbs.pop(db, None)
+                return b"+OK\r\n", db
+            if cmd == b"GET":
+                value = self._live(db, args[1])
+                return (b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)), db
+            if cmd == b"SET":
+                key, value = args[1], args[2]
+                expires, nx, xx = None, False, False
+                opts = [a.upper() for a in args[3:]]
+                i = 0
+                while i < len(opts):
+                    if opts[i] == b"EX":
+                        expires = time.time() + int(args[3 + i + 1]); i += 1
+                    elif opts[i] == b"PX":
+                        expires = time.time() + int(args[3 + i + 1]) / 1000; i += 1
+                    elif opts[i] == b"NX":
+                        nx = True
+                    elif opts[i] == b"XX":
+                        xx = True
+                    i += 1
+                exists = self._live(db, key) is not None
+                if (nx and exists) or (xx and not exists):
+                    return b"$-1\r\n", db
+                self.dbs.setdefault(db, {})[key] = (value, expires)
+                return b"+OK\r\n", db
+            if cmd == b"EVAL":
+                # sem Lua: só o script de liberação de trava do cliente (compara e apaga, atômico aqui)
+                if args[1].decode() != RELEASE_SCRIPT:
+                    return b"-ERR only the lock release script is supported\r\n", db
+                key, token = args[3], args[4]
+                if self._live(db, key) == token:
+                    del self.dbs[db][key]
+                    return b":1\r\n", db
+                return b":0\r\n", db
+            if cmd in (b"DEL", b"EXISTS"):
+                n = 0
+                for key in args[1:]:
+                    if self._live(db, key) is not None:
+                        n += 1
+                        if cmd == b"DEL":
+                            del self.dbs[db][key]
+                return b":%d\r\n" % n, db
+        return b"-ERR unknown command '%s'\r\n" % cmd, db
+
+    def _make_server(self, host: str, port: int) -> socketserver.ThreadingTCPServer:
+        outer = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def _args(self) -> Optional[list[bytes]]:
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                if not line.startswith(b"*"):
+                    return line.split()   # comando inline (ex.: redis-cli/telnet)
+                args = []
+                for _ in range(int(line[1:])):
+                    n = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(n + 2)[:n])
+                return args
+
+            def handle(self):
+                db = 0
+                while True:
+                    try:
+                        args = self._args()
+                    except (OSError, ValueError):
+                        return
+                    if args is None:
+                        return
+                    if not args:
+                        continue
+                    try:
+                        reply, db = outer.execute(db, args)
+                    except (IndexError, ValueError):
+                        reply = b"-ERR syntax error\r\n"
+                    self.wfile.write(reply)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        srv = socketserver.ThreadingTCPServer((host, port), Handler)
+        srv.daemon_threads = True
+        return srv
+
+    def start(self) -> "RespServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="resp-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "RespServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Servidor local do protocolo Redis (em memória) para o cache de feeds.")
+    ap.add_argument("--port", type=int, default=6379)
+    args = ap.parse_args(argv)
+    srv = RespServer(port=args.port)
+    print(f"servindo em {srv.url}  (MONITOR_CACHE={srv.url})")
+    try:
+        srv._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
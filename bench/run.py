@@ -0,0 +1,210 @@
+from __future__ import annotations
+import argparse
+import datetime as dt
+import io
+import json
+import os
+import platform
+import sqlite3
+import sys
+import threading
+import time
+from typing import Callable, Optional
+import pandas as pd
+
+from bench.server import FeedServer
+from bench.synth import make_items, render_feed
+from src.clean import clean_batch, clean_html_text
+from src.dates import parse_pubdates
+from src.dedup import NearDupIndex
+from src.fetch import fetch_many, iter_rss_items
+from src.pipeline import UPSERT_BATCH, enrich_frame
+from src.sentiment import score_series
+from src.shards import iter_sharded
+from src.store import ArticleStore
+from src.topics import TopicModel, hash_features
+from src.utils import add_clickable_links, format_dates, humanize_series
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_SIZES = [100, 1000, 10000]
+DEFAULT_THRESHOLD = 0.25   # falha se a vazão cair mais que 25% em relação ao baseline
+
+
+def _best(fn: Callable[[], None], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def bench_parse(items: list[dict], repeat: int) -> float:
+    body = render_feed(items)
+    return _best(lambda: sum(1 for _ in iter_rss_items(io.BytesIO(body))), repeat)
+
+def bench_fetch(items: list[dict], repeat: int) -> float:
+    # consultas distintas contra o servidor local (100 itens por resposta, 20 ms de latência)
+    with FeedServer(items=items, latency=0.02) as srv:
+        queries = [f"consulta {i}" for i in range(max(1, len(items) // srv.cap))]
+        return _best(lambda: fetch_many(queries, max_items=srv.cap, base_url=srv.url), repeat)
+
+def bench_shards(items: list[dict], repeat: int) -> float:
+    # janela inteira em fatias after:/before: contra o servidor local (teto de 100 itens por resposta)
+    day = lambda ts: dt.datetime.fromtimestamp(ts, dt.timezone.utc).date()
+    lo = day(min(it["pub_ts"] for it in items))
+    hi = day(max(it["pub_ts"] for it in items)) + dt.timedelta(days=1)
+    with FeedServer(items=items, latency=0.02) as srv:
+        return _best(lambda: sum(1 for _ in iter_sharded("bench", lo, hi, base_url=srv.url)), repeat)
+
+def bench_dates(items: list[dict], repeat: int) -> float:
+    dates = [it["pubDate"] for it in items]
+    return _best(lambda: parse_pubdates(dates), repeat)
+
+def bench_clean(items: list[dict], repeat: int) -> float:
+    desc = pd.Series([it["description"] for it in items])
+
+    def run():
+        clean_html_text.cache_clear()
+        clean_batch(desc)
+    return _best(run, repeat)
+
+def bench_classify(items: list[dict], repeat: int) -> float:
+    clean_html_text.cache_clear()
+    texts = clean_batch(pd.Series([it["description"] for it in items]))
+    return _best(lambda: score_series(texts), repeat)
+
+def bench_dedup(items: list[dict], repeat: int) -> float:
+    clean_html_text.cache_clear()
+    texts = clean_batch([it["description"] for it in items])
+    ids = [it["guid"] for it in items]
+    return _best(lambda: NearDupIndex().assign_many(ids, texts), repeat)
+
+def bench_topics(items: list[dict], repeat: int) -> float:
+    # hashing + TF-IDF + mini-lote de k-means, nos lotes da ingestão, num banco em memória
+    clean_html_text.cache_clear()
+    texts = clean_batch([it["description"] for it in items])
+
+    def run():
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE articles (id TEXT, descricao_limpa TEXT, topic INTEGER)")
+        model = TopicModel(conn, threading.RLock())
+        for i in range(0, len(texts), UPSERT_BATCH):
+            model.add(hash_features(texts[i:i + UPSERT_BATCH]))
+    return _best(run, repeat)
+
+def bench_pipeline(items: list[dict], repeat: int) -> float:
+    raw = [{k: v for k, v in it.items() if k != "pub_ts"} for it in items]
+
+    def run():
+        clean_html_text.cache_clear()
+        store = ArticleStore(":memory:")
+        store.upsert(raw, query="bench", process=enrich_frame)
+        store.close()
+    return _best(run, repeat)
+
+def bench_render(items: list[dict], repeat: int) -> float:
+    # colunas derivadas da tabela/cards (link markdown, data formatada, tempo relativo)
+    df = pd.DataFrame(items)[["title", "link", "pub_ts"]]
+
+    def run():
+        add_clickable_links(df, "title", "link", new_col="título")
+        format_dates(df["pub_ts"])
+        humanize_series(df["pub_ts"])
+    return _best(run, repeat)
+
+STAGES = {
+    "parse": bench_parse,
+    "fetch": bench_fetch,
+    "shards": bench_shards,
+    "dates": bench_dates,
+    "clean": bench_clean,
+    "classify": bench_classify,
+    "dedup": bench_dedup,
+    "topics": bench_topics,
+    "pipeline": bench_pipeline,
+    "render": bench_render,
+}
+
+
+def run(stages: list[str], sizes: list[int], repeat: int, seed: int = 0) -> dict:
+    results: dict = {}
+    for n in sizes:
+        items = make_items(n, seed=seed, start=1_760_000_000)
+        for stage in stages:
+            secs = STAGES[stage](items, repeat if n <= 10000 else 1)
+            rate = n / secs if secs > 0 else float("inf")
+            results.setdefault(stage, {})[str(n)] = {"seconds": round(secs, 4), "items_per_s": round(rate, 1)}
+            print(f"{stage:>9} n={n:<8} {secs:9.3f}s  {rate:12.0f} itens/s", flush=True)
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for stage, by_size in results.items():
+        for size, cur in by_size.items():
+            ref = baseline.get("results", {}).get(stage, {}).get(size)
+            if not ref:
+                continue
+            floor = ref["items_per_s"] * (1 - threshold)
+            if cur["items_per_s"] < floor:
+                regressions.append(
+                    f"{stage} n={size}: {cur['items_per_s']:.0f} itens/s < {floor:.0f} "
+                    f"(baseline {ref['items_per_s']:.0f}, tolerância {threshold:.0%})"
+                )
+    return regressions
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmarks por etapa (coleta, parse, limpeza, sentimento, pipeline).")
+    ap.add_argument("--stages", default=",".join(STAGES), help=f"etapas separadas por vírgula ({', '.join(STAGES)})")
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                    help="tamanhos separados por vírgula, ex.: 100,1000,10000,100000,1000000")
+    ap.add_argument("--repeat", type=int, default=3, help="repetições por medida (vale a melhor)")
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    ap.add_argument("--update-baseline", action="store_true", help="grava os resultados como novo baseline")
+    ap.add_argument("--output", help="também grava os resultados desta execução em JSON")
+    args = ap.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        ap.error(f"etapas desconhecidas: {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    results = run(stages, sizes, args.repeat)
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        merged = baseline.get("results", {})
+        for stage, by_size in results.items():
+            merged.setdefault(stage, {}).update(by_size)
+        report["results"] = merged
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"baseline atualizado em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("sem baseline para comparar (rode com --update-baseline)")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for r in regressions:
+        print(f"REGRESSÃO: {r}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+from __future__ import annotations
+import argparse
+import bisect
+import calendar
+import hashlib
+import random
+import re
+import threading
+import time
+import urllib.parse as up
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from bench.synth import make_items, render_feed
+
+# servidor local que imita o RSS de busca do Google Notícias: aceita after:/before: na consulta,
+# devolve no máximo `cap` itens (os mais recentes), responde ETag/304 e injeta latência e erros.
+# com redirects=True os itens saem sem <source> e com links /rss/articles/<guid> deste servidor,
+# que respondem 302 para a matéria no domínio do veículo (como os links do Google Notícias)
+
+DATE_OP_RE = re.compile(r"\b(after|before):(\d{4}-\d{2}-\d{2})\b")
+
+
+class FeedServer:
+    def __init__(self, items: Optional[list[dict]] = None, n: int = 1000, cap: int = 100,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0, seed: int = 0, redirects: bool = False):
+        items = items if items is not None else make_items(n, seed=seed)
+        self.items = sorted(items, key=lambda it: it["pub_ts"])
+        self.ts = [it["pub_ts"] for it in self.items]
+        self.cap = cap
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.redirects = redirects
+        self.by_guid = {it["guid"]: it for it in self.items}
+        self.requests = 0
+        self.redirect_hits = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}/rss/search"
+
+    def _render(self, items: list[dict]) -> bytes:
+        if not self.redirects:
+            return render_feed(items)
+        items = [dict(it, link=f"http://{self.host}/rss/articles/{it['guid']}") for it in items]
+        return render_feed(items, with_source=False)
+
+    def select(self, query: str) -> list[dict]:
+        lo, hi = 0, len(self.items)
+        for op, day in DATE_OP_RE.findall(query):
+            ts = calendar.timegm(time.strptime(day, "%Y-%m-%d"))
+            if op == "after":
+                lo = max(lo, bisect.bisect_left(self.ts, ts))
+            else:
+                hi = min(hi, bisect.bisect_left(self.ts, ts))
+        if hi <= lo:
+            return []
+        return self.items[max(lo, hi - self.cap):hi][::-1]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    fail = server._rng.random() < server.error_rate
+                    delay = server.latency + server._rng.uniform(0, server.jitter)
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    with server._lock:
+                        server.errors += 1
+                    self._send(503, b"unavailable")
+                    return
+                parsed = up.urlparse(self.path)
+                if parsed.path.startswith("/rss/articles/"):
+                    item = server.by_guid.get(parsed.path.rsplit("/", 1)[-1])
+                    with server._lock:
+                        server.redirect_hits += 1
+                    if item is None:
+                        self._send(404, b"not found")
+                    else:
+                        self._send(302, b"", {"Location": f"{item['source_url']}/noticia/{item['guid']}"})
+                    return
+                query = up.parse_qs(parsed.query).get("q", [""])[0]
+                body = server._render(server.select(query))
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, b"", {"ETag": etag})
+                    return
+                self._send(200, body, {"ETag": etag, "Content-Type": "application/rss+xml; charset=utf-8"})
+
+            def do_HEAD(self):
+                self._head = True
+                self.do_GET()
+
+            def _send(self, status: int, body: bytes, headers: Optional[dict] = None):
+                self.send_response(status)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body and not getattr(self, "_head", False):
+                    self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> "FeedServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="feed-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FeedServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Servidor RSS local no formato do Google Notícias.")
+    ap.add_argument("--items", type=int, default=1000)
+    ap.add_argument("--cap", type=int, default=100, help="máximo de itens por resposta")
+    ap.add_argument("--latency", type=float, default=0.0, help="atraso fixo por requisição (s)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="atraso extra aleatório (s)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 503")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--redirects", action="store_true", help="links de redirecionamento e sem <source>")
+    args = ap.parse_args(argv)
+    srv = FeedServer(n=args.items, cap=args.cap, latency=args.latency, jitter=args.jitter,
+                     error_rate=args.error_rate, port=args.port, seed=args.seed, redirects=args.redirects)
+    print(f"servindo {len(srv.items)} itens em {srv.url}  (MONITOR_FEED_URL={srv.url})")
+    if args.redirects:
+        print(f"  MONITOR_REDIRECT_HOSTS={srv.host}")
+    try:
+        srv._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
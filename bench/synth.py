@@ -0,0 +1,122 @@
+from __future__ import annotations
+import email.utils
+import html
+import random
+import time
+from typing import Iterator, Optional
+from xml.sax.saxutils import escape
+
+# gerador de itens no formato do RSS do Google Notícias, com texto em português,
+# descrições em HTML e uma fração de republicações/duplicatas
+
+MUNICIPIOS = [
+    "Teresina", "Parnaíba", "Picos", "Piripiri", "Floriano", "Campo Maior", "Barras", "União",
+    "Altos", "Oeiras", "Esperantina", "José de Freitas", "Pedro II", "São Raimundo Nonato", "Bom Jesus",
+]
+FONTES = [
+    ("Meio Norte", "meionorte.com"), ("G1 Piauí", "g1.globo.com"), ("Cidade Verde", "cidadeverde.com"),
+    ("O Dia", "portalodia.com"), ("Portal AZ", "portalaz.com.br"), ("GP1", "gp1.com.br"),
+    ("180graus", "180graus.com"), ("Agência Brasil", "agenciabrasil.ebc.com.br"),
+    ("Governo do Piauí", "pi.gov.br"), ("Viagora", "viagora.com.br"),
+]
+SUJEITOS = [
+    "O governo do Piauí", "A Secretaria de Inteligência Artificial", "A Universidade Federal do Piauí",
+    "A prefeitura de {cidade}", "O SIA Piauí", "Pesquisadores da UESPI", "A Assembleia Legislativa",
+    "Uma startup de {cidade}", "O Tribunal de Contas", "A Fapepi",
+]
+ACOES = [
+    "anunciou", "lançou", "apresentou", "investiga", "aprovou", "suspendeu", "ampliou", "debateu",
+    "inaugurou", "criticou",
+]
+OBJETOS = [
+    "um programa de inteligência artificial para escolas estaduais",
+    "uma parceria com empresas de tecnologia para capacitação profissional",
+    "o uso de IA no atendimento de saúde em {cidade}",
+    "um laboratório de inovação com investimento de {valor} milhões",
+    "denúncias de vazamento de dados em sistema público",
+    "o corte de gastos em projetos de modernização",
+    "a falta de investimento em conectividade no interior",
+    "um projeto de lei sobre o uso de reconhecimento facial",
+    "cursos gratuitos de programação para jovens de {cidade}",
+    "os riscos de golpes com deepfake durante a eleição",
+]
+COMPLEMENTOS = [
+    "segundo nota oficial divulgada nesta segunda-feira.",
+    "e a expectativa é de geração de empregos na região.",
+    "mas especialistas apontam problemas de segurança.",
+    "após meses de atraso no cronograma.",
+    "em evento que reuniu gestores e pesquisadores.",
+    "não houve sucesso nas primeiras tentativas, segundo a equipe.",
+    "com recorde de inscrições registrado pela organização.",
+    "em meio à polêmica sobre o uso de dados pessoais.",
+]
+
+
+def _sentence(rng: random.Random) -> tuple[str, str]:
+    cidade = rng.choice(MUNICIPIOS)
+    sujeito = rng.choice(SUJEITOS).format(cidade=cidade)
+    objeto = rng.choice(OBJETOS).format(cidade=cidade, valor=rng.randint(1, 90))
+    titulo = f"{sujeito} {rng.choice(ACOES)} {objeto}"
+    corpo = f"{titulo} {rng.choice(COMPLEMENTOS)}"
+    return titulo, corpo
+
+def _description(rng: random.Random, link: str, titulo: str, corpo: str, fonte: str) -> str:
+    kind = rng.random()
+    if kind < 0.7:
+        # formato típico do Google Notícias: link + nome da fonte
+        return (f'<a href="{html.escape(link)}" target="_blank">{html.escape(titulo)}</a>'
+                f'&nbsp;&nbsp;<font color="#6f6f6f">{html.escape(fonte)}</font>')
+    if kind < 0.95:
+        return f"<p>{html.escape(corpo)}</p><p><b>{html.escape(fonte)}</b> &amp; parceiros</p>"
+    return f"<div>{html.escape(corpo)}<script>track('{rng.randint(0, 9999)}')</script><!-- ad --></div>"
+
+def iter_items(n: int, seed: int = 0, dup_rate: float = 0.15, start: Optional[float] = None,
+               span_days: float = 90.0) -> Iterator[dict]:
+    rng = random.Random(seed)
+    now = time.time() if start is None else start
+    recent: list[tuple[str, str]] = []
+    for i in range(n):
+        fonte, dominio = rng.choice(FONTES)
+        r = rng.random()
+        if recent and r < dup_rate:
+            # republicação: mesma matéria em outro veículo, às vezes com título levemente diferente
+            titulo, corpo = rng.choice(recent)
+            if rng.random() < 0.5:
+                titulo = f"Veja: {titulo}"
+        else:
+            titulo, corpo = _sentence(rng)
+            recent.append((titulo, corpo))
+            if len(recent) > 500:
+                recent.pop(0)
+        link = f"https://news.google.com/rss/articles/CBMi{seed:x}{i:08x}?oc=5"
+        ts = now - rng.random() * span_days * 86400
+        yield {
+            "title": f"{titulo} - {fonte}",
+            "link": link,
+            "guid": f"CBMi{seed:x}{i:08x}",
+            "pubDate": email.utils.formatdate(ts, usegmt=True),
+            "pub_ts": int(ts),
+            "description": _description(rng, link, titulo, corpo, fonte),
+            "source": fonte,
+            "source_url": f"https://{dominio}",
+        }
+
+def make_items(n: int, seed: int = 0, dup_rate: float = 0.15, **kwargs) -> list[dict]:
+    return list(iter_items(n, seed=seed, dup_rate=dup_rate, **kwargs))
+
+def render_feed(items: list[dict], title: str = "Google Notícias", with_source: bool = True) -> bytes:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel>'
+        f"<title>{escape(title)}</title><link>https://news.google.com/</link><language>pt-BR</language>"
+    ]
+    for it in items:
+        parts.append(
+            f"<item><title>{escape(it['title'])}</title><link>{escape(it['link'])}</link>"
+            f'<guid isPermaLink="false">{escape(it["guid"])}</guid><pubDate>{it["pubDate"]}</pubDate>'
+            f"<description>{escape(it['description'])}</description>"
+            + (f'<source url="{escape(it["source_url"])}">{escape(it["source"])}</source>' if with_source else "")
+            + "</item>"
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts).encode("utf-8")
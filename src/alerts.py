@@ -0,0 +1,391 @@
+from __future__ import annotations
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+import pandas as pd
+
+from src.config import ALERTS_DB, ALERTS_OUTBOX, ALERTS_RULES
+from src.search import fold_tokens
+from src.sentiment import SENTIMENT_ORDER
+
+# alertas por regra, avaliados na ingestão sobre os artigos novos.
+# a consulta de cada regra usa a mesma sintaxe do RSS (build_google_news_query): termos, "frases",
+# -exclusões, site:dominio, OR e parênteses. as regras viram cláusulas (forma normal disjuntiva)
+# indexadas por um token âncora; cada artigo consulta o índice com os próprios tokens e só as
+# cláusulas candidatas são verificadas, então o custo não cresce com o nº de regras
+
+log = logging.getLogger("alerts")
+
+QUERY_TOKEN_RE = re.compile(r'\(|\)|-?"[^"]*"?|[^\s()"]+')
+IGNORED_OPS = ("after:", "before:", "when:", "intitle:")
+MAX_CLAUSES = 256
+
+Phrase = tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class Clause:
+    terms: frozenset = frozenset()          # frases obrigatórias (tuplas de tokens normalizados)
+    excluded: frozenset = frozenset()
+    sites: frozenset = frozenset()
+    excluded_sites: frozenset = frozenset()
+
+    def __and__(self, other: "Clause") -> "Clause":
+        return Clause(self.terms | other.terms, self.excluded | other.excluded,
+                      self.sites | other.sites, self.excluded_sites | other.excluded_sites)
+
+
+def _site(value: str) -> str:
+    return value.strip().lower().replace("https://", "").replace("http://", "").replace("www.", "").strip("/")
+
+def _atom(tok: str) -> Optional[Clause]:
+    negate = tok.startswith("-") and len(tok) > 1
+    raw = tok[1:] if negate else tok
+    low = raw.lower()
+    if low.startswith(IGNORED_OPS):
+        return None
+    if low.startswith("site:"):
+        site = _site(raw[5:])
+        if not site:
+            return None
+        return Clause(excluded_sites=frozenset([site])) if negate else Clause(sites=frozenset([site]))
+    phrase: Phrase = tuple(fold_tokens(raw.strip('"').rstrip("*")))
+    if not phrase:
+        return None
+    return Clause(excluded=frozenset([phrase])) if negate else Clause(terms=frozenset([phrase]))
+
+def parse_query(query: str) -> list[Clause]:
+    # consulta -> lista de cláusulas (OU de Es). precedência do Google: OR liga mais forte que o E
+    # implícito, então em `(a) OR (b) -golpe site:x` a exclusão e o site valem para os dois ramos
+    tokens = QUERY_TOKEN_RE.findall(query or "")
+    ors = ("OR", "OU", "|")
+    pos = 0
+
+    def _check(out: list[Clause]) -> list[Clause]:
+        if len(out) > MAX_CLAUSES:
+            raise ValueError(f"consulta expande para mais de {MAX_CLAUSES} cláusulas: {query!r}")
+        return out
+
+    def _and() -> list[Clause]:
+        nonlocal pos
+        out = [Clause()]
+        while pos < len(tokens) and tokens[pos] != ")":
+            sub = _or()
+            if sub is not None:
+                out = _check([a & b for a in out for b in sub])
+        return out
+
+    def _or() -> Optional[list[Clause]]:
+        # termos ignorados (after:, OR solto) somem do OU em vez de virar um ramo vazio
+        nonlocal pos
+        out = _primary()
+        while pos + 1 < len(tokens) and tokens[pos].upper() in ors and tokens[pos + 1] != ")":
+            pos += 1
+            sub = _primary()
+            if sub is not None:
+                out = sub if out is None else _check(out + sub)
+        return out
+
+    def _primary() -> Optional[list[Clause]]:
+        nonlocal pos
+        tok = tokens[pos]
+        pos += 1
+        if tok == "(":
+            sub = _and()
+            if pos < len(tokens) and tokens[pos] == ")":
+                pos += 1
+            return sub
+        if tok.upper() in ors:
+            return None
+        atom = _atom(tok)
+        return None if atom is None else [atom]
+
+    clauses = [Clause()]
+    while pos < len(tokens):
+        clauses = _check([a & b for a in clauses for b in _and()])
+        pos += 1          # ")" sem par: ignora e continua
+    return list(dict.fromkeys(clauses))
+
+@dataclass
+class Rule:
+    name: str
+    query: str = ""
+    sentiments: list[str] = field(default_factory=list)   # vazio = qualquer sentimento
+    min_count: int = 1            # > 1: alerta de volume (min_count artigos em `window` segundos)
+    window: float = 3600
+    cooldown: float = 0           # intervalo mínimo entre alertas da regra (volume: no mínimo `window`)
+    max_per_hour: int = 30
+
+    @property
+    def volume(self) -> bool:
+        return self.min_count > 1
+
+
+def load_rules(path: Optional[str] = None) -> list[Rule]:
+    path = path or ALERTS_RULES
+    if not path:
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    entries = raw.get("rules", raw) if isinstance(raw, dict) else raw
+    rules, names = [], set()
+    for e in entries:
+        r = Rule(**e)
+        if r.name in names:
+            raise ValueError(f"regra duplicada: {r.name!r}")
+        bad = [s for s in r.sentiments if s not in SENTIMENT_ORDER]
+        if bad:
+            raise ValueError(f"sentimento inválido em {r.name!r}: {bad} (opções: {SENTIMENT_ORDER})")
+        parse_query(r.query)
+        names.add(r.name)
+        rules.append(r)
+    return rules
+
+
+def _contains(tokens: list[str], positions: dict[str, list[int]], phrase: Phrase) -> bool:
+    starts = positions.get(phrase[0])
+    if not starts:
+        return False
+    n = len(phrase)
+    return n == 1 or any(tuple(tokens[i:i + n]) == phrase for i in starts)
+
+def _site_keys(fonte: str) -> list[str]:
+    # "esportes.g1.globo.com" -> ["esportes.g1.globo.com", "g1.globo.com", "globo.com"]
+    parts = (fonte or "").lower().split(".")
+    return [".".join(parts[i:]) for i in range(len(parts) - 1)]
+
+
+class RuleMatcher:
+    # todas as regras compiladas num índice: token âncora -> cláusulas; site -> cláusulas sem termos
+    def __init__(self, rules: list[Rule]):
+        self.rules = rules
+        self.clauses: list[tuple[int, Clause]] = []
+        # forma compilada: tokens soltos viram conjuntos (teste de subconjunto em C); frases, listas
+        self._compiled: list[tuple] = []
+        self.by_token: dict[str, list[int]] = {}
+        self.by_site: dict[str, list[int]] = {}
+        self.always: list[int] = []
+        self.sentiments = [frozenset(r.sentiments) if r.sentiments else None for r in rules]
+        for ri, rule in enumerate(rules):
+            for clause in parse_query(rule.query):
+                cid = len(self.clauses)
+                self.clauses.append((ri, clause))
+                self._compiled.append((
+                    ri,
+                    frozenset(p[0] for p in clause.terms if len(p) == 1),
+                    [p for p in clause.terms if len(p) > 1],
+                    frozenset(p[0] for p in clause.excluded if len(p) == 1),
+                    [p for p in clause.excluded if len(p) > 1],
+                    clause.sites, clause.excluded_sites,
+                ))
+                if clause.terms:
+                    # o token mais longo tende a ser o mais raro: menos cláusulas candidatas por artigo
+                    anchor = max((t for p in clause.terms for t in p), key=len)
+                    self.by_token.setdefault(anchor, []).append(cid)
+                elif clause.sites:
+                    for site in clause.sites:
+                        self.by_site.setdefault(site, []).append(cid)
+                else:
+                    self.always.append(cid)
+
+    def match(self, tokens: list[str], fonte: str = "", sentimento: Optional[str] = None) -> set[int]:
+        # índices das regras que casam com um artigo
+        by_token = self.by_token
+        candidates = set(self.always)
+        toks = set(tokens)
+        for t in toks:
+            hit = by_token.get(t)
+            if hit:
+                candidates.update(hit)
+        sites = _site_keys(fonte)
+        for s in sites:
+            hit = self.by_site.get(s)
+            if hit:
+                candidates.update(hit)
+        if not candidates:
+            return set()
+        positions: Optional[dict[str, list[int]]] = None
+        site_set = set(sites)
+        compiled, allowed_by_rule = self._compiled, self.sentiments
+        matched: set[int] = set()
+        for cid in candidates:
+            ri, req, req_phrases, exc, exc_phrases, need_sites, bad_sites = compiled[cid]
+            if ri in matched or not req <= toks or not exc.isdisjoint(toks):
+                continue
+            allowed = allowed_by_rule[ri]
+            if allowed is not None and sentimento not in allowed:
+                continue
+            if need_sites and need_sites.isdisjoint(site_set):
+                continue
+            if bad_sites and not bad_sites.isdisjoint(site_set):
+                continue
+            if req_phrases or exc_phrases:
+                if positions is None:
+                    positions = {}
+                    for i, t in enumerate(tokens):
+                        positions.setdefault(t, []).append(i)
+                if not all(_contains(tokens, positions, p) for p in req_phrases):
+                    continue
+                if any(_contains(tokens, positions, p) for p in exc_phrases):
+                    continue
+            matched.add(ri)
+        return matched
+
+    def match_frame(self, df: pd.DataFrame) -> list[tuple[int, int]]:
+        # (posição da linha, índice da regra) para cada casamento
+        col = lambda c: df[c].astype(object).where(df[c].notna(), "").tolist() if c in df else [""] * len(df)
+        titles, texts, fontes = col("title"), col("descricao_limpa"), col("fonte")
+        sents = df["sentimento"].astype(object).tolist() if "sentimento" in df else [None] * len(df)
+        out = []
+        for pos, (title, text, fonte, sent) in enumerate(zip(titles, texts, fontes, sents)):
+            for ri in self.match(fold_tokens(f"{title} {text}"), fonte, sent):
+                out.append((pos, ri))
+        return out
+
+
+class AlertEngine:
+    # avalia os artigos novos, deduplica (uma vez por regra e história), aplica limites e grava na caixa de saída
+    def __init__(self, rules: list[Rule], outbox: str = ALERTS_OUTBOX, state_path: str = ALERTS_DB):
+        self.matcher = RuleMatcher(rules)
+        self.rules = rules
+        self.outbox = outbox
+        self.suppressed = 0
+        for path in (outbox, state_path):
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(state_path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS alert_seen (rule TEXT, key TEXT, ts INTEGER, "
+                              "PRIMARY KEY (rule, key))")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS alert_hits (rule TEXT, article_id TEXT, ts INTEGER, "
+                              "PRIMARY KEY (rule, article_id))")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS alert_sent (rule TEXT, ts INTEGER)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS ix_alert_sent ON alert_sent(rule, ts)")
+            self.conn.commit()
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None, **kwargs) -> Optional["AlertEngine"]:
+        rules = load_rules(path)
+        return cls(rules, **kwargs) if rules else None
+
+    def hook(self, query: Optional[str] = None) -> Callable[[pd.DataFrame], list[dict]]:
+        # callback `on_new` da ingestão (coletor e painel); alertas nunca derrubam a coleta
+        def _on_new(new: pd.DataFrame) -> list[dict]:
+            try:
+                sent = self.evaluate(new, query=query)
+            except Exception:
+                log.exception("falha ao avaliar alertas de %r", query)
+                return []
+            if sent:
+                log.info("%r: %d alertas gravados em %s", query, len(sent), self.outbox)
+            return sent
+        return _on_new
+
+    def _allowed(self, rule: Rule, now: float) -> bool:
+        cooldown = max(rule.cooldown, rule.window) if rule.volume else rule.cooldown
+        last, hour = self.conn.execute(
+            "SELECT MAX(ts), SUM(ts >= ?) FROM alert_sent WHERE rule = ?", (int(now - 3600), rule.name)
+        ).fetchone()
+        if last is not None and now - last < cooldown:
+            return False
+        return (hour or 0) < rule.max_per_hour
+
+    def _emit(self, rule: Rule, now: float, payload: dict, out: list[dict]) -> None:
+        if not self._allowed(rule, now):
+            self.suppressed += 1
+            return
+        self.conn.execute("INSERT INTO alert_sent (rule, ts) VALUES (?, ?)", (rule.name, int(now)))
+        out.append({"ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now)), "rule": rule.name, **payload})
+
+    def evaluate(self, new: pd.DataFrame, query: Optional[str] = None, now: Optional[float] = None) -> list[dict]:
+        if new is None or new.empty or not self.rules:
+            return []
+        now = time.time() if now is None else now
+        matches = self.matcher.match_frame(new)
+        if not matches:
+            return []
+        rows = new.reset_index(drop=True)
+        val = lambda c, i: (None if c not in rows or pd.isna(rows.at[i, c]) else rows.at[i, c])
+        alerts: list[dict] = []
+        volume: set[int] = set()
+        with self._lock:
+            for pos, ri in matches:
+                rule = self.rules[ri]
+                aid = str(val("id", pos))
+                if rule.volume:
+                    self.conn.execute("INSERT OR IGNORE INTO alert_hits (rule, article_id, ts) VALUES (?, ?, ?)",
+                                      (rule.name, aid, int(now)))
+                    volume.add(ri)
+                    continue
+                # republicações da mesma história (cluster_id) não repetem o alerta
+                key = str(val("cluster_id", pos) or aid)
+                cur = self.conn.execute("INSERT OR IGNORE INTO alert_seen (rule, key, ts) VALUES (?, ?, ?)",
+                                        (rule.name, key, int(now)))
+                if not cur.rowcount:
+                    continue
+                pub_ts = val("pub_ts", pos)
+                score = val("score", pos)
+                self._emit(rule, now, {
+                    "type": "artigo", "query": query, "id": aid, "title": val("title", pos), "link": val("link", pos),
+                    "fonte": val("fonte", pos), "sentimento": val("sentimento", pos),
+                    "score": None if score is None else float(score),
+                    "pub_ts": None if pub_ts is None else int(pub_ts),
+                }, alerts)
+            for ri in sorted(volume):
+                rule = self.rules[ri]
+                ids = [r[0] for r in self.conn.execute(
+                    "SELECT article_id FROM alert_hits WHERE rule = ? AND ts >= ? ORDER BY ts DESC",
+                    (rule.name, int(now - rule.window)))]
+                if len(ids) >= rule.min_count:
+                    self._emit(rule, now, {"type": "volume", "query": query, "count": len(ids),
+                                           "window": rule.window, "ids": ids[:20]}, alerts)
+            horizon = max((r.window for r in self.rules), default=0) + 3600
+            self.conn.execute("DELETE FROM alert_hits WHERE ts < ?", (int(now - horizon),))
+            self.conn.execute("DELETE FROM alert_sent WHERE ts < ?", (int(now - max(horizon, 86400)),))
+            self.conn.commit()
+            if alerts:
+                with open(self.outbox, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(a, ensure_ascii=False) + "\n" for a in alerts))
+        return alerts
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    from src.store import ArticleStore
+
+    ap = argparse.ArgumentParser(description="Testa regras de alerta contra os artigos armazenados (sem enviar nada).")
+    ap.add_argument("--rules", default=ALERTS_RULES or None, required=not ALERTS_RULES,
+                    help="JSON com as regras (padrão: MONITOR_ALERTS)")
+    ap.add_argument("--db", help="caminho do banco SQLite (padrão: config.DB_PATH)")
+    ap.add_argument("--days", type=int, default=7, help="janela de artigos avaliada")
+    ap.add_argument("--show", type=int, default=3, help="exemplos por regra")
+    args = ap.parse_args(argv)
+
+    rules = load_rules(args.rules)
+    matcher = RuleMatcher(rules)
+    store = ArticleStore(args.db) if args.db else ArticleStore()
+    start = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=args.days)
+    df = store.read_window(start=start, columns=["id", "title", "descricao_limpa", "fonte", "sentimento", "pub_ts"])
+    t0 = time.perf_counter()
+    matches = matcher.match_frame(df)
+    elapsed = time.perf_counter() - t0
+    print(f"{len(df)} artigos x {len(rules)} regras ({len(matcher.clauses)} cláusulas) em {elapsed:.2f}s")
+    by_rule: dict[int, list[int]] = {}
+    for pos, ri in matches:
+        by_rule.setdefault(ri, []).append(pos)
+    for ri, rule in enumerate(rules):
+        hits = by_rule.get(ri, [])
+        print(f"- {rule.name}: {len(hits)} artigos")
+        for pos in hits[:args.show]:
+            print(f"    {df.at[pos, 'sentimento']} | {df.at[pos, 'fonte']} | {df.at[pos, 'title']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+from src.clean import CLEANER_VERSION, clean_batch
+from src.sentiment import LEXICON_PATH, Lexicon, labels_from_scores
+from src.store import DERIVED_CLUSTERS, DERIVED_STATS, ArticleStore
+
+# reprocessa (limpeza + sentimento) os artigos gravados com outra versão do léxico ou do limpador.
+# o processo principal lê lotes por rowid e grava os resultados; um pool de processos faz o trabalho
+# de CPU. no máximo `workers * 2` lotes ficam em voo, então a memória não cresce com o banco.
+# cada lote gravado já leva as versões novas: interrompido, o backfill retoma só o que falta.
+# os derivados (assinaturas/cluster_id, termos, séries, temas, Parquet) ficam marcados como sujos
+# em `meta` antes do primeiro lote e só são desmarcados depois de recalculados
+
+CHUNK_ROWS = 2_000
+
+_lexicon: Optional[Lexicon] = None
+
+def _init_worker(lexicon_path: str) -> None:
+    global _lexicon
+    _lexicon = Lexicon.load(lexicon_path)
+
+def process_batch(batch: list[tuple]) -> list[tuple]:
+    # batch: (id, description, descricao_limpa, needs_clean) -> (descricao_limpa, score, sentimento, id)
+    ids = [b[0] for b in batch]
+    texts = [b[2] or "" for b in batch]
+    dirty = [i for i, b in enumerate(batch) if b[3] or b[2] is None]
+    if dirty:
+        cleaned = clean_batch([batch[i][1] for i in dirty])
+        for i, text in zip(dirty, cleaned):
+            texts[i] = text
+    scores = _lexicon.score_many(texts)
+    labels = labels_from_scores(scores)
+    return [(t, float(s), l, i) for t, s, l, i in zip(texts, scores, labels, ids)]
+
+
+def backfill(store: ArticleStore, lexicon_path: str = LEXICON_PATH, workers: Optional[int] = None,
+             chunk: int = CHUNK_ROWS, progress=None) -> int:
+    lexicon_version = Lexicon.load(lexicon_path).tag
+    if workers is None:
+        workers = os.cpu_count() or 1
+    total = store.count_stale(lexicon_version, CLEANER_VERSION)
+    dirty = store.derived_dirty()
+    if total:
+        dirty |= DERIVED_STATS
+        if store.count_stale(None, CLEANER_VERSION):
+            dirty |= DERIVED_CLUSTERS
+        store.mark_derived_dirty(dirty)
+    elif not dirty:
+        return 0
+    done = 0
+
+    def _write(rows: list[tuple]) -> None:
+        nonlocal done
+        store.update_outputs([(t, s, l, lexicon_version, CLEANER_VERSION, i) for t, s, l, i in rows])
+        done += len(rows)
+        if progress:
+            progress(done, total)
+
+    batches = _batches(store, lexicon_version, chunk)
+    if workers <= 1:
+        _init_worker(lexicon_path)
+        for batch in batches:
+            _write(process_batch(batch))
+    else:
+        pending: deque[Future] = deque()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(lexicon_path,)) as pool:
+            for batch in batches:
+                if len(pending) >= workers * 2:
+                    _write(pending.popleft().result())
+                pending.append(pool.submit(process_batch, batch))
+            while pending:
+                _write(pending.popleft().result())
+
+    # near-duplicates, termos, séries agregadas, temas e Parquet derivam das colunas reprocessadas
+    if dirty & DERIVED_CLUSTERS:
+        store.rebuild_clusters()
+    store.rebuild_stats()
+    store.rebuild_history()
+    store.mark_derived_dirty(0)
+    return done
+
+def _batches(store: ArticleStore, lexicon_version: str, chunk: int):
+    after = 0
+    while True:
+        rows = store.stale_rows(lexicon_version, CLEANER_VERSION, after=after, limit=chunk)
+        if not rows:
+            return
+        after = rows[-1]["_rowid"]
+        yield [(r["id"], r["description"], r["descricao_limpa"], bool(r["needs_clean"])) for r in rows]
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Reprocessa limpeza e sentimento dos artigos com versão desatualizada.")
+    ap.add_argument("--db", help="caminho do banco SQLite (padrão: config.DB_PATH)")
+    ap.add_argument("--lexicon", default=LEXICON_PATH, help="pacote de léxico (padrão: MONITOR_LEXICON ou pt-br.json)")
+    ap.add_argument("--workers", type=int, default=None, help="processos (padrão: nº de CPUs; 1 = sem pool)")
+    ap.add_argument("--chunk", type=int, default=CHUNK_ROWS, help="artigos por lote")
+    ap.add_argument("--all", action="store_true", help="reprocessa tudo, mesmo com versão atual")
+    ap.add_argument("--dry-run", action="store_true", help="só conta os artigos desatualizados")
+    args = ap.parse_args(argv)
+
+    store = ArticleStore(args.db) if args.db else ArticleStore()
+    if args.all and not args.dry_run:
+        store.invalidate_outputs()
+    lexicon_version = Lexicon.load(args.lexicon).tag
+    stale = store.count_stale(lexicon_version, CLEANER_VERSION)
+    print(f"{stale} de {store.count()} artigos desatualizados (léxico {lexicon_version}, "
+          f"limpador {CLEANER_VERSION})", file=sys.stderr)
+    dirty = store.derived_dirty()
+    if dirty:
+        print("derivados pendentes de uma execução interrompida: serão recalculados", file=sys.stderr)
+    if args.dry_run or not (stale or dirty):
+        return 0
+    t0 = time.perf_counter()
+
+    def progress(done: int, total: int) -> None:
+        rate = done / max(time.perf_counter() - t0, 1e-9)
+        print(f"\r{done}/{total} artigos ({rate:,.0f}/s)", end="", file=sys.stderr, flush=True)
+
+    n = backfill(store, args.lexicon, args.workers, args.chunk, progress)
+    print(f"\n{n} artigos reprocessados em {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+from __future__ import annotations
+import abc
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.parse as up
+import uuid
+from typing import Optional
+
+# backends do cache de feeds (src/fetch.py): chave -> bytes, mais travas com expiração usadas para
+# que só um processo/réplica vá ao upstream por vez. o padrão são arquivos no disco local;
+# SQLite serve para várias réplicas na mesma máquina (ou volume compartilhado) e o backend RESP
+# fala o protocolo do Redis para réplicas em máquinas diferentes (bench.resp_server é um substituto local)
+
+
+class CacheBackend(abc.ABC):
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[bytes]: ...
+
+    @abc.abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None: ...
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abc.abstractmethod
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        # trava exclusiva com expiração; devolve um token (None = outro dono)
+        ...
+
+    @abc.abstractmethod
+    def release(self, key: str, token: str) -> None:
+        # solta a trava só se ela ainda for de `token`
+        ...
+
+
+class FileBackend(CacheBackend):
+    # um arquivo por chave (escrita atômica); travas são arquivos criados com O_EXCL e
+    # roubadas depois de expirar (dono morto no meio da coleta)
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(tmp, self._path(key))
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        path = self._path(f"{key}.lock")
+        token = uuid.uuid4().hex
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                held = self._read_lock(path)
+                # ilegível = recém-criada e ainda sem conteúdo: conta como ocupada
+                if held is None or held[1] > time.time():
+                    return None
+                self._break(path, held[0])
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(f"{token} {time.time() + ttl}")
+            # outro processo pode ter quebrado esta trava achando que era a velha: confere o dono
+            held = self._read_lock(path)
+            return token if held is not None and held[0] == token else None
+        return None
+
+    def _read_lock(self, path: str) -> Optional[tuple[str, float]]:
+        try:
+            with open(path, "r") as f:
+                owner, expires = f.read().split()
+            return owner, float(expires)
+        except (OSError, ValueError):
+            return None
+
+    def _break(self, path: str, stale: str) -> None:
+        # tira a trava vencida do lugar com um rename atômico para um nome único; se o arquivo movido
+        # já não era ela (outro processo quebrou e recriou antes), devolve sem sobrescrever nada
+        moved = f"{path}.{uuid.uuid4().hex}.stale"
+        try:
+            os.rename(path, moved)
+        except OSError:
+            return
+        held = self._read_lock(moved)
+        if held is None or held[0] != stale:
+            try:
+                os.link(moved, path)
+            except OSError:
+                pass
+        os.remove(moved)
+
+    def release(self, key: str, token: str) -> None:
+        path = self._path(f"{key}.lock")
+        held = self._read_lock(path)
+        if held is None or held[0] != token:
+            return
+        self._break(path, token)
+
+
+class SQLiteBackend(CacheBackend):
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB, expires REAL)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, token TEXT, expires REAL)")
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self.conn.execute("SELECT value, expires FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return bytes(row[0])
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        expires = time.time() + ttl if ttl else None
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+                              (key, sqlite3.Binary(value), expires))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE: o teste-e-insere é atômico entre processos
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM locks WHERE key = ? AND expires < ?", (key, now))
+                cur = self.conn.execute("INSERT OR IGNORE INTO locks (key, token, expires) VALUES (?, ?, ?)",
+                                        (key, token, now + ttl))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return token if cur.rowcount else None
+
+    def release(self, key: str, token: str) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM locks WHERE key = ? AND token = ?", (key, token))
+
+
+# DEL só se o valor ainda for o token do dono (padrão de liberação de trava do Redis)
+RELEASE_SCRIPT = 'if redis.call("get", KEYS[1]) == ARGV[1] then return redis.call("del", KEYS[1]) else return 0 end'
+
+
+class RespBackend(CacheBackend):
+    # cliente mínimo do protocolo Redis (RESP2) sobre socket: GET, SET (PX/NX), DEL, EVAL, SELECT.
+    # uma conexão por backend, serializada por trava; reconecta uma vez em erro de rede
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0", timeout: float = 5.0, prefix: str = "monitor:"):
+        p = up.urlparse(url)
+        self.host = p.hostname or "127.0.0.1"
+        self.port = p.port or 6379
+        self.db = int((p.path or "/0").strip("/") or 0)
+        self.password = p.password
+        self.timeout = timeout
+        self.prefix = prefix
+        self._sock: Optional[socket.socket] = None
+        self._buf = b""
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._buf = b""
+        if self.password:
+            self._call("AUTH", self.password)
+        if self.db:
+            self._call("SELECT", str(self.db))
+
+    def _readline(self) -> bytes:
+        while b"\r\n" not in self._buf:
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("conexão RESP fechada")
+            self._buf += chunk
+        line, self._buf = self._buf.split(b"\r\n", 1)
+        return line
+
+    def _read(self):
+        line = self._readline()
+        kind, rest = line[:1], line[1:]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RuntimeError(f"erro RESP: {rest.decode()}")
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            if n < 0:
+                return None
+            while len(self._buf) < n + 2:
+                chunk = self._sock.recv(65536)
+                if not chunk:
+                    raise ConnectionError("conexão RESP fechada")
+                self._buf += chunk
+            data, self._buf = self._buf[:n], self._buf[n + 2:]
+            return data
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [self._read() for _ in range(n)]
+        raise RuntimeError(f"resposta RESP inválida: {line[:40]!r}")
+
+    def _call(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for a in args:
+            b = a if isinstance(a, bytes) else str(a).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(b), b))
+        self._sock.sendall(b"".join(parts))
+        return self._read()
+
+    def command(self, *args):
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._call(*args)
+                except (OSError, ConnectionError):
+                    if self._sock is not None:
+                        self._sock.close()
+                    self._sock = None
+                    if attempt:
+                        raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.command("GET", self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if ttl:
+            self.command("SET", self.prefix + key, value, "PX", int(ttl * 1000))
+        else:
+            self.command("SET", self.prefix + key, value)
+
+    def delete(self, key: str) -> None:
+        self.command("DEL", self.prefix + key)
+
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        ok = self.command("SET", f"{self.prefix}lock:{key}", token, "NX", "PX", max(1, int(ttl * 1000)))
+        return token if ok == "OK" else None
+
+    def release(self, key: str, token: str) -> None:
+        # compara e apaga no servidor (script atômico): a trava pode ter expirado e sido pega por outro
+        self.command("EVAL", RELEASE_SCRIPT, 1, f"{self.prefix}lock:{key}", token)
+
+
+def make_backend(url: str, directory: Optional[str] = None) -> CacheBackend:
+    # "" -> arquivos em `directory`; "sqlite:///caminho.db"; "redis://host:porta/db"
+    if not url:
+        return FileBackend(directory)
+    scheme = up.urlparse(url).scheme
+    if scheme == "sqlite":
+        return SQLiteBackend(url[len("sqlite:///"):] if url.startswith("sqlite:///") else url[len("sqlite:"):])
+    if scheme in ("redis", "resp"):
+        return RespBackend(url)
+    raise ValueError(f"backend de cache desconhecido: {url!r} (use sqlite:///arquivo.db ou redis://host:porta/db)")
@@ -1,10 +1,17 @@
-
 import re
 import html
+from functools import lru_cache
+import pandas as pd
 from bs4 import BeautifulSoup
 from unidecode import unidecode
 
 TAG_RE = re.compile(r"<[^>]+>")
+WS_RE = re.compile(r"\s+")
+# fragmentos que o regex não resolve direito: script/style, comentários, CDATA, tags truncadas
+NEEDS_PARSER_RE = re.compile(r"<\s*(?:script|style)\b|<!--|<!\[CDATA\[|<[^>]*(?:<|$)", re.I)
+CLEAN_CACHE_SIZE = 65536
+# suba ao mudar clean_text/fast_strip_html: o backfill (src/backfill.py) reprocessa as linhas antigas
+CLEANER_VERSION = "1"
 
 def strip_html_keep_text(s: str) -> str:
     if not s:
@@ -15,10 +22,34 @@ def strip_html_keep_text(s: str) -> str:
         text = TAG_RE.sub(" ", s)
     return html.unescape(text)
 
+def fast_strip_html(s: str) -> str:
+    if not s:
+        return ""
+    if "<" not in s:
+        return html.unescape(s) if "&" in s else s
+    if NEEDS_PARSER_RE.search(s):
+        return strip_html_keep_text(s)
+    return html.unescape(TAG_RE.sub(" ", s))
+
 def clean_text(s: str) -> str:
     if not s:
         return ""
     s = s.lower().strip()
-    s = unidecode(s)
-    s = re.sub(r"\s+", " ", s)
-    return s
\ No newline at end of file
+    if not s.isascii():
+        s = unidecode(s)
+    s = WS_RE.sub(" ", s)
+    return s
+
+@lru_cache(maxsize=CLEAN_CACHE_SIZE)
+def clean_html_text(s: str) -> str:
+    # descrições sindicadas se repetem muito: memoiza o resultado por conteúdo
+    return clean_text(fast_strip_html(s))
+
+def clean_batch(values):
+    # aceita Series ou lista; limpa cada valor distinto uma única vez
+    is_series = isinstance(values, pd.Series)
+    s = values if is_series else pd.Series(list(values), dtype=object)
+    s = s.where(s.notna(), "").astype(str)
+    mapping = {u: clean_html_text(u) for u in pd.unique(s)}
+    out = s.map(mapping)
+    return out if is_series else out.tolist()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+import os
+
+# diretório local para caches e dados persistidos (sobrescreva com MONITOR_DATA_DIR)
+DATA_DIR = os.environ.get("MONITOR_DATA_DIR", ".cache")
+FEED_CACHE_DIR = os.path.join(DATA_DIR, "feeds")
+# backend do cache de feeds compartilhado entre processos/réplicas: vazio = arquivos em FEED_CACHE_DIR,
+# "sqlite:///caminho/feeds.db" ou "redis://host:6379/0" (qualquer servidor do protocolo Redis)
+FEED_CACHE_URL = os.environ.get("MONITOR_CACHE", "")
+WORDCLOUD_CACHE_DIR = os.path.join(DATA_DIR, "wordcloud")
+
+# endpoint do RSS de busca; aponte para um servidor local (ex.: bench.server) em testes e benchmarks
+FEED_BASE_URL = os.environ.get("MONITOR_FEED_URL", "https://news.google.com/rss/search")
+
+FEED_FRESH_TTL = 600          # segundos servindo direto do disco, sem ir à rede
+FEED_STALE_TTL = 24 * 3600    # janela em que o conteúdo velho é servido enquanto revalida
+FEED_STALE_TIMEOUT = 5        # timeout curto quando já existe uma cópia velha para servir
+FEED_FLIGHT_WAIT = 30         # espera máxima por uma coleta idêntica em andamento em outro processo
+FEED_KEEP_TTL = 7 * 24 * 3600 # expiração das entradas nos backends que expiram (SQLite/RESP)
+FEED_RESULT_CAP = 100         # o RSS de busca devolve no máximo ~100 itens por consulta
+SHARD_MAX_REQUESTS = 256      # teto de requisições de uma coleta fatiada por data (src/shards.py)
+
+DB_PATH = os.environ.get("MONITOR_DB", os.path.join(DATA_DIR, "noticias.db"))
+
+# temas (src/topics.py): nº de temas e tamanho do espaço de hashing do TF-IDF; mudar qualquer um
+# descarta o modelo gravado (reagrupe com python -m src.backfill --all ou ArticleStore.rebuild_stats)
+TOPICS_K = 12
+TOPICS_FEATURES = 2 ** 15       # potência de 2 (o hash é mascarado)
+
+# links de redirecionamento (item sem <source url>) -> URL do veículo, resolvidos uma vez e guardados aqui;
+# MONITOR_REDIRECT_HOSTS acrescenta hosts (ex.: o bench.server com --redirects)
+LINK_CACHE_PATH = os.path.join(DATA_DIR, "links.db")
+REDIRECT_HOSTS = {"news.google.com", *filter(None, os.environ.get("MONITOR_REDIRECT_HOSTS", "").split(","))}
+LINK_RETRY_AFTER = 24 * 3600  # falhas de resolução são tentadas de novo depois disso
+
+# opções de consulta compartilhadas entre o dashboard e o coletor (python -m src.poller)
+LANG_OPTIONS = ["pt-BR", "pt-PT", "en-US"]
+REGION_OPTIONS = ["BR:pt-419", "PT:pt-150", "US:en"]
+DEFAULT_QUERY = '("Inteligência Artificial" Piauí) OR ("SIA Piauí")'
+PRESETS = {
+    "IA Piauí": '("Inteligência Artificial" Piauí)',
+    "SIA Piauí": '("SIA Piauí")',
+    "IA Governo": '("Inteligência Artificial" governo Piauí)',
+}
+
+POLL_INTERVAL = 900           # segundos entre coletas de uma mesma consulta
+POLL_MIN_INTERVAL = 120       # limite por consulta: nunca consultar mais rápido que isso
+POLL_JITTER = 0.2             # ±20% no intervalo para não sincronizar as consultas
+POLL_MAX_BACKOFF = 6 * 3600
+
+# alertas (src/alerts.py): regras em JSON (MONITOR_ALERTS ou --alerts no coletor), saída em JSON lines
+# e estado de deduplicação/limites num SQLite próprio
+ALERTS_RULES = os.environ.get("MONITOR_ALERTS", "")
+ALERTS_OUTBOX = os.path.join(DATA_DIR, "alerts.jsonl")
+ALERTS_DB = os.path.join(DATA_DIR, "alerts.db")
+
+# métricas por etapa (src/metrics.py): JSON lines acumulado e texto Prometheus (textfile do node_exporter);
+# MONITOR_METRICS=1 exporta a cada rerun, mesmo com o painel de depuração fechado
+METRICS_JSONL = os.path.join(DATA_DIR, "metrics.jsonl")
+METRICS_PROM = os.path.join(DATA_DIR, "metrics.prom")
+METRICS_EXPORT = os.environ.get("MONITOR_METRICS", "") not in ("", "0")
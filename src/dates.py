@@ -0,0 +1,136 @@
+from __future__ import annotations
+import email.utils
+import re
+import numpy as np
+import pandas as pd
+
+# pubDate do RSS (RFC 822/2822) -> segundos UTC, vetorizado.
+# 1) caminho estrito: os formatos de largura fixa ("Tue, 14 Oct 2026 12:30:00 GMT", 29 bytes, do Google
+#    Notícias, e "... 12:30:00 -0300", 31 bytes) são decodificados como matriz de bytes no numpy,
+#    sem strptime nem inferência de formato;
+# 2) o resto passa por uma regex vetorizada que aceita dia da semana opcional, ano com 2 dígitos,
+#    segundos opcionais e fusos "+0300", "-03:00", GMT/UT/UTC/Z e siglas como EDT/BRT;
+# 3) sobras (ISO 8601, formatos exóticos) caem no email.utils/pandas item a item.
+
+STRICT_GMT_LEN, STRICT_NUM_LEN = 29, 31
+STRICT_DIGITS = [5, 6, 12, 13, 14, 15, 17, 18, 20, 21, 23, 24]
+STRICT_PUNCT = {3: ",", 4: " ", 7: " ", 11: " ", 16: " ", 19: ":", 22: ":", 25: " "}
+RFC822_RE = re.compile(
+    r"^\s*(?:[A-Za-z]{3},?\s*)?(?P<day>\d{1,2})\s+(?P<mon>[A-Za-z]{3})[a-z]*\.?\s+(?P<year>\d{2,4})\s+"
+    r"(?P<h>\d{1,2}):(?P<m>\d{2})(?::(?P<s>\d{2}))?(?:\.\d+)?\s*(?P<tz>[A-Za-z]{1,5}|[+-]\d{2}:?\d{2})?\s*$"
+)
+MONTHS = {m: i for i, m in enumerate(["jan", "feb", "mar", "apr", "may", "jun",
+                                      "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+_MON_KEYS = {ord(m[0].upper()) << 16 | ord(m[1]) << 8 | ord(m[2]): i for m, i in MONTHS.items()}
+_MON_SORTED = np.array(sorted(_MON_KEYS), dtype=np.int64)
+_MON_VALUES = np.array([_MON_KEYS[k] for k in sorted(_MON_KEYS)], dtype=np.int64)
+TZ_OFFSETS = {  # minutos a leste de UTC
+    "gmt": 0, "ut": 0, "utc": 0, "z": 0,
+    "est": -300, "edt": -240, "cst": -360, "cdt": -300,
+    "mst": -420, "mdt": -360, "pst": -480, "pdt": -420,
+    "brt": -180, "brst": -120,
+}
+
+
+def days_from_civil(y: np.ndarray, m: np.ndarray, d: np.ndarray) -> np.ndarray:
+    # dias desde 1970-01-01 no calendário gregoriano proléptico (algoritmo de H. Hinnant)
+    y = y - (m <= 2)
+    era = np.floor_divide(y, 400)
+    yoe = y - era * 400
+    doy = (153 * (m + np.where(m > 2, -3, 9)) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+def _parse_strict(values: np.ndarray, width: int) -> np.ndarray:
+    # strings de largura fixa -> segundos (float, NaN onde não é exatamente o formato esperado)
+    try:
+        raw = np.array(values, dtype=f"S{width}")
+    except UnicodeEncodeError:
+        return np.full(len(values), np.nan)
+    u = raw.view(np.uint8).reshape(-1, width).astype(np.int64)
+    dg = u - 48
+    digits = STRICT_DIGITS + ([27, 28, 29, 30] if width == STRICT_NUM_LEN else [])
+    ok = ((dg[:, digits] >= 0) & (dg[:, digits] <= 9)).all(axis=1)
+    ok &= (u[:, list(STRICT_PUNCT)] == [ord(c) for c in STRICT_PUNCT.values()]).all(axis=1)
+    if width == STRICT_NUM_LEN:
+        sign = np.where(u[:, 26] == ord("-"), -1, 1)
+        ok &= (u[:, 26] == ord("+")) | (u[:, 26] == ord("-"))
+        offset = sign * ((dg[:, 27] * 10 + dg[:, 28]) * 3600 + (dg[:, 29] * 10 + dg[:, 30]) * 60)
+    else:
+        ok &= (u[:, 26] == ord("G")) & (u[:, 27] == ord("M")) & (u[:, 28] == ord("T"))
+        offset = 0
+    key = u[:, 8] << 16 | u[:, 9] << 8 | u[:, 10]
+    pos = np.clip(np.searchsorted(_MON_SORTED, key), 0, len(_MON_SORTED) - 1)
+    ok &= _MON_SORTED[pos] == key
+    month = _MON_VALUES[pos]
+    day = dg[:, 5] * 10 + dg[:, 6]
+    year = dg[:, 12] * 1000 + dg[:, 13] * 100 + dg[:, 14] * 10 + dg[:, 15]
+    hour, minute, sec = dg[:, 17] * 10 + dg[:, 18], dg[:, 20] * 10 + dg[:, 21], dg[:, 23] * 10 + dg[:, 24]
+    ok &= (day >= 1) & (day <= 31) & (hour < 24) & (minute < 60) & (sec <= 60)
+    secs = days_from_civil(year, month, day) * 86400 + hour * 3600 + minute * 60 + sec - offset
+    return np.where(ok, secs.astype("float64"), np.nan)
+
+def _tz_minutes(tz: pd.Series) -> pd.Series:
+    tz = tz.fillna("gmt").str.lower()
+    named = tz.map(TZ_OFFSETS)
+    num = tz.str.extract(r"^([+-])(\d{2}):?(\d{2})$")
+    sign = num[0].map({"+": 1, "-": -1}).astype("float64")
+    offset = sign * (pd.to_numeric(num[1]).astype("float64") * 60 + pd.to_numeric(num[2]).astype("float64"))
+    # siglas desconhecidas (militares de 1 letra etc.) valem como UTC, como manda a RFC 2822
+    return named.astype("float64").fillna(offset).fillna(0)
+
+def _parse_regex(values: pd.Series) -> pd.Series:
+    parts = values.str.extract(RFC822_RE)
+    num = lambda col: pd.to_numeric(parts[col], errors="coerce").astype("float64")
+    year = num("year")
+    year = year.where(year >= 100, np.where(year < 50, year + 2000, year + 1900))
+    fields = pd.DataFrame({
+        "year": year,
+        "month": parts["mon"].str.lower().map(MONTHS).astype("float64"),
+        "day": num("day"),
+        "hour": num("h"),
+        "minute": num("m"),
+        "second": num("s").fillna(0),
+    })
+    ok = fields.notna().all(axis=1)
+    ok &= fields["day"].between(1, 31) & (fields["hour"] < 24) & (fields["minute"] < 60) & (fields["second"] <= 60)
+    out = pd.Series(np.nan, index=values.index)
+    if ok.any():
+        y, mo, d, h, mi, sec = fields[ok].to_numpy(dtype=np.int64).T
+        secs = days_from_civil(y, mo, d) * 86400 + h * 3600 + mi * 60 + sec
+        out[ok] = secs - _tz_minutes(parts.loc[ok, "tz"]).to_numpy() * 60
+    return out
+
+def _parse_one(value: str) -> float:
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+        if dt.tzinfo is None:
+            return float(pd.Timestamp(dt, tz="UTC").timestamp())
+        return float(dt.timestamp())
+    except (TypeError, ValueError, IndexError):
+        pass
+    ts = pd.to_datetime(value, errors="coerce", utc=True, format="ISO8601")
+    return np.nan if pd.isna(ts) else float(ts.timestamp())
+
+def parse_pubdates(values) -> pd.Series:
+    # devolve segundos desde a época (Int64, <NA> quando não dá para interpretar), mesmo índice da entrada
+    s = pd.Series(values, dtype=object)
+    out = pd.Series(np.nan, index=s.index)
+    is_str = s.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    if not is_str.any():
+        return out.astype("Int64")
+    lengths = s.str.len().to_numpy(dtype="float64", na_value=np.nan)
+    for width in (STRICT_GMT_LEN, STRICT_NUM_LEN):
+        fixed = is_str & (lengths == width)
+        if fixed.any():
+            out[fixed] = _parse_strict(s[fixed].to_numpy(), width)
+    rest = is_str & out.isna().to_numpy()
+    if rest.any():
+        out[rest] = _parse_regex(s[rest].astype("string").str.strip())
+    rest = is_str & out.isna().to_numpy()
+    if rest.any():
+        out[rest] = [_parse_one(v) for v in s[rest]]
+    return out.round().astype("Int64")
+
+def to_datetime_utc(epoch: pd.Series) -> pd.Series:
+    return pd.to_datetime(pd.Series(epoch).astype("float64"), unit="s", utc=True)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import hashlib
+from collections import defaultdict
+from typing import Iterable, Optional
+import numpy as np
+
+from src.sentiment import tokenize
+
+NUM_PERM = 64
+BANDS = 16                 # 16 bandas x 4 linhas: candidatos a partir de ~0.5 de Jaccard
+SHINGLE_SIZE = 3
+NEAR_DUP_THRESHOLD = 0.5   # Jaccard estimado mínimo para entrar no mesmo cluster
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> set[str]:
+    toks = tokenize(text)
+    if len(toks) <= k:
+        return {" ".join(toks)} if toks else set()
+    return {" ".join(toks[i:i + k]) for i in range(len(toks) - k + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        sh = shingles(text)
+        if not sh:
+            return None
+        h = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in sh),
+            dtype=np.uint64, count=len(sh),
+        )
+        # a*h + b cabe em 64 bits (a, h < 2^32); permutações universais mod primo de Mersenne
+        perm = (np.outer(self.a, h) + self.b[:, None]) % _PRIME & _MAX_HASH
+        return perm.min(axis=1).astype(np.uint32)
+
+
+class NearDupIndex:
+    # índice LSH incremental: cada artigo novo só é comparado com quem cai nos mesmos buckets
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, threshold: float = NEAR_DUP_THRESHOLD):
+        if num_perm % bands:
+            raise ValueError("num_perm precisa ser múltiplo de bands")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.buckets: list[dict[bytes, list[str]]] = [defaultdict(list) for _ in range(bands)]
+        self.signatures: dict[str, np.ndarray] = {}
+        self.cluster_of: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def _band_keys(self, sig: np.ndarray) -> list[bytes]:
+        r = self.rows
+        return [sig[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+    def add(self, article_id: str, sig: np.ndarray, cluster_id: Optional[str] = None) -> None:
+        self.signatures[article_id] = sig
+        self.cluster_of[article_id] = cluster_id or article_id
+        for band, key in zip(self.buckets, self._band_keys(sig)):
+            band[key].append(article_id)
+
+    def candidates(self, sig: np.ndarray) -> set[str]:
+        found: set[str] = set()
+        for band, key in zip(self.buckets, self._band_keys(sig)):
+            found.update(band.get(key, ()))
+        return found
+
+    def assign(self, article_id: str, text: str, sig: Optional[np.ndarray] = None) -> str:
+        # devolve o cluster do artigo: o id do representante canônico (primeiro visto) ou o próprio id
+        if article_id in self.cluster_of:
+            return self.cluster_of[article_id]
+        sig = self.hasher.signature(text) if sig is None else sig
+        if sig is None:
+            # sem texto não há como comparar: o artigo fica sozinho e fora do índice
+            self.cluster_of[article_id] = article_id
+            return article_id
+        best = None
+        cands = list(self.candidates(sig))
+        if cands:
+            # Jaccard estimado contra todos os candidatos de uma vez
+            sims = (np.stack([self.signatures[c] for c in cands]) == sig).mean(axis=1)
+            i = int(np.argmax(sims))
+            if sims[i] >= self.threshold:
+                best = cands[i]
+        cluster_id = self.cluster_of[best] if best is not None else article_id
+        self.add(article_id, sig, cluster_id)
+        return cluster_id
+
+    def assign_many(self, ids: Iterable[str], texts: Iterable[str]) -> list[str]:
+        return [self.assign(i, t or "") for i, t in zip(ids, texts)]
+
+
+def cluster_texts(texts: Iterable[str], ids: Optional[Iterable] = None) -> list[str]:
+    # agrupamento avulso (sem persistência) para conjuntos em memória
+    texts = list(texts)
+    ids = [str(i) for i in (ids if ids is not None else range(len(texts)))]
+    return NearDupIndex().assign_many(ids, texts)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+import argparse
+import sys
+import tempfile
+from typing import IO, Iterable, Iterator, Optional
+import pandas as pd
+
+from src.store import ArticleStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # sem pyarrow, só CSV e JSON Lines
+    pa = pq = None
+
+# export sob demanda: lê do banco (ou do Parquet) em lotes e grava cada lote direto no destino,
+# sem montar o arquivo inteiro em memória
+
+EXPORT_COLUMNS = [
+    "id", "title", "link", "description", "descricao_limpa", "sentimento", "score",
+    "fonte", "source", "pub_ts", "data_pub", "cluster_id",
+]
+# rótulo -> (extensão, MIME)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "JSON Lines": ("jsonl", "application/x-ndjson"),
+}
+CHUNK_ROWS = 50_000
+SPOOL_BYTES = 32 * 1024 * 1024   # acima disso o arquivo temporário vai para o disco
+
+
+def _schema():
+    return pa.schema([
+        ("id", pa.string()), ("title", pa.string()), ("link", pa.string()), ("description", pa.string()),
+        ("descricao_limpa", pa.string()), ("sentimento", pa.string()), ("score", pa.float32()),
+        ("fonte", pa.string()), ("source", pa.string()), ("pub_ts", pa.int64()), ("data_pub", pa.string()),
+        ("cluster_id", pa.string()),
+    ])
+
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    out = pd.DataFrame({c: df[c] if c in df else None for c in EXPORT_COLUMNS}, index=df.index)
+    for c in ("sentimento", "fonte"):
+        out[c] = out[c].astype(object).where(out[c].notna(), None)
+    out["score"] = pd.to_numeric(out["score"], errors="coerce").astype("float32")
+    out["pub_ts"] = pd.to_numeric(out["pub_ts"], errors="coerce").astype("Int64")
+    data_pub = pd.to_datetime(out["pub_ts"].astype("float64"), unit="s", utc=True)
+    out["data_pub"] = data_pub.dt.strftime("%Y-%m-%dT%H:%M:%SZ").where(data_pub.notna(), None)
+    return out
+
+def iter_frames(store: ArticleStore, query: Optional[str] = None, start=None, end=None,
+                sources: Optional[list[str]] = None, sentiments: Optional[list[str]] = None,
+                ids: Optional[Iterable[str]] = None, chunk: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    # com histórico em Parquet, os filtros descem para o leitor; senão, cursor SQLite em lotes
+    if store.history is not None:
+        store.sync_history()
+        if query:
+            ids = set(store.query_ids(query)) if ids is None else set(ids) & set(store.query_ids(query))
+        frames = store.history.iter_batches(start=start, end=end, sources=sources, sentiments=sentiments,
+                                            ids=ids, columns=EXPORT_COLUMNS, batch_size=chunk)
+    else:
+        frames = store.iter_window(query=query, start=start, end=end, sources=sources, sentiments=sentiments,
+                                   ids=ids, columns=EXPORT_COLUMNS, chunk=chunk)
+    for df in frames:
+        yield _prepare(df)
+
+def write(frames: Iterable[pd.DataFrame], fmt: str, out: IO[bytes]) -> int:
+    rows = 0
+    if fmt == "parquet":
+        if pq is None:
+            raise RuntimeError("export em Parquet requer pyarrow (pip install pyarrow)")
+        schema = _schema()
+        with pq.ParquetWriter(out, schema) as writer:
+            for df in frames:
+                writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+                rows += len(df)
+        return rows
+    if fmt == "csv":
+        out.write((",".join(EXPORT_COLUMNS) + "\n").encode("utf-8"))
+        for df in frames:
+            out.write(df.to_csv(index=False, header=False).encode("utf-8"))
+            rows += len(df)
+        return rows
+    if fmt == "jsonl":
+        for df in frames:
+            if not df.empty:
+                body = df.to_json(orient="records", lines=True, force_ascii=False)
+                out.write(body.encode("utf-8") + (b"" if body.endswith("\n") else b"\n"))
+            rows += len(df)
+        return rows
+    raise ValueError(f"formato desconhecido: {fmt}")
+
+def export_file(store: ArticleStore, fmt: str, **filters) -> bytes:
+    # os lotes vão para um temporário (em memória até SPOOL_BYTES, depois em disco) e o resultado sai
+    # em bytes: é o que st.download_button aceita (SpooledTemporaryFile não é um tipo suportado)
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as out:
+        write(iter_frames(store, **filters), fmt, out)
+        out.seek(0)
+        return out.read()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Exporta artigos do banco local em lotes.")
+    ap.add_argument("--format", choices=[ext for ext, _ in EXPORT_FORMATS.values()], default="csv")
+    ap.add_argument("--query", help="só artigos coletados por esta consulta")
+    ap.add_argument("--start", help="data inicial (AAAA-MM-DD, UTC)")
+    ap.add_argument("--end", help="data final exclusiva (AAAA-MM-DD, UTC)")
+    ap.add_argument("--source", action="append", dest="sources", help="domínio da fonte (repetível)")
+    ap.add_argument("--sentiment", action="append", dest="sentiments", help="Positivo/Neutro/Negativo (repetível)")
+    ap.add_argument("--db", help="caminho do banco SQLite (padrão: config.DB_PATH)")
+    ap.add_argument("-o", "--output", help="arquivo de saída (padrão: stdout)")
+    args = ap.parse_args(argv)
+
+    store = ArticleStore(args.db) if args.db else ArticleStore()
+    filters = dict(
+        query=args.query, sources=args.sources, sentiments=args.sentiments,
+        start=pd.Timestamp(args.start, tz="UTC") if args.start else None,
+        end=pd.Timestamp(args.end, tz="UTC") if args.end else None,
+    )
+    if args.output:
+        with open(args.output, "wb") as f:
+            n = write(iter_frames(store, **filters), args.format, f)
+    else:
+        n = write(iter_frames(store, **filters), args.format, sys.stdout.buffer)
+    print(f"{n} artigos exportados", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
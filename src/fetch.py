@@ -1,27 +1,467 @@
-
 from __future__ import annotations
+import hashlib
+import io
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import IO, Callable, Iterable, Iterator, Optional, Union
 import requests
+from requests.adapters import HTTPAdapter
 import xml.etree.ElementTree as ET
 import urllib.parse as up
 
-def _build_google_news_rss_url(query: str, hl: str = "pt-BR", ceid: str = "BR:pt-419") -> str:
+from src.cache import CacheBackend, FileBackend, make_backend
+from src.config import (
+    FEED_BASE_URL, FEED_CACHE_DIR, FEED_CACHE_URL, FEED_FLIGHT_WAIT, FEED_FRESH_TTL, FEED_KEEP_TTL,
+    FEED_STALE_TIMEOUT, FEED_STALE_TTL,
+)
+
+DEFAULT_TIMEOUT = 15
+MAX_WORKERS = 8
+MAX_PER_HOST = 4
+USER_AGENT = "MonitorDeNoticias/1.0 (+https://github.com/BrunoIbiapina/MonitorDeNoticias)"
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_host_limits: dict[str, threading.BoundedSemaphore] = {}
+_host_limits_lock = threading.Lock()
+
+log = logging.getLogger("fetch")
+BACKEND_LOG_EVERY = 60    # segundos entre avisos de backend de cache fora do ar
+_DOWN = object()
+
+
+@dataclass
+class FetchResult:
+    query: str
+    items: list[dict] = field(default_factory=list)
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class FeedCache:
+    # cache HTTP por URL de feed: corpo + validadores (ETag/Last-Modified) + itens já parseados.
+    # o armazenamento é um backend de src/cache.py (arquivos por padrão; SQLite ou RESP para
+    # compartilhar entre réplicas), e as travas do backend coordenam as idas ao upstream
+    def __init__(self, directory: str = FEED_CACHE_DIR, fresh_ttl: float = FEED_FRESH_TTL,
+                 stale_ttl: float = FEED_STALE_TTL, backend: Optional[CacheBackend] = None,
+                 flight_wait: float = FEED_FLIGHT_WAIT, keep_ttl: Optional[float] = FEED_KEEP_TTL,
+                 serve_stale_on_error: bool = True):
+        self.directory = directory
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        # False: erro do upstream chega a quem chamou em vez da cópia velha (o coletor precisa dele para o backoff)
+        self.serve_stale_on_error = serve_stale_on_error
+        self.flight_wait = flight_wait
+        self.keep_ttl = keep_ttl
+        self.backend = backend if backend is not None else FileBackend(directory)
+        self._inflight: dict[str, Optional[str]] = {}
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._error_logged = 0.0
+
+    def _key(self, url: str, ext: str) -> str:
+        return f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.{ext}"
+
+    def _try(self, what: str, fn: Callable, default=None):
+        # backend compartilhado fora do ar (Redis parado, SQLite travado) nunca derruba a coleta:
+        # a operação vira miss/no-op e a busca vai direto ao upstream, sem coalescer entre réplicas
+        try:
+            return fn()
+        except Exception as e:
+            now = time.time()
+            if now - self._error_logged >= BACKEND_LOG_EVERY:
+                self._error_logged = now
+                log.warning("cache de feeds indisponível (%s): %s: %s; buscando direto no upstream",
+                            what, type(e).__name__, e)
+            return default
+
+    def get(self, url: str) -> Optional[dict]:
+        data = self._try("get", lambda: self.backend.get(self._key(url, "json")))
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def get_body(self, url: str) -> Optional[bytes]:
+        return self._try("get", lambda: self.backend.get(self._key(url, "xml")))
+
+    def _save(self, url: str, entry: dict) -> None:
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        self._try("set", lambda: self.backend.set(self._key(url, "json"), data, self.keep_ttl))
+
+    def put(self, url: str, items: list[dict], etag: Optional[str], last_modified: Optional[str],
+            body: Optional[bytes] = None, complete: bool = True) -> dict:
+        # complete=False: a leitura parou em max_items, então só há os primeiros itens e nenhum corpo
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+            "complete": complete,
+            "items": items,
+        }
+        if body is not None:
+            self._try("set", lambda: self.backend.set(self._key(url, "xml"), body, self.keep_ttl))
+        else:
+            self._try("delete", lambda: self.backend.delete(self._key(url, "xml")))
+        self._save(url, entry)
+        return entry
+
+    def touch(self, url: str, entry: dict) -> dict:
+        entry = dict(entry, fetched_at=time.time())
+        self._save(url, entry)
+        return entry
+
+    def covers(self, entry: dict, max_items: Optional[int]) -> bool:
+        if entry.get("complete", True):
+            return True
+        return max_items is not None and len(entry.get("items") or []) >= max_items
+
+    def age(self, entry: dict) -> float:
+        return time.time() - float(entry.get("fetched_at") or 0)
+
+    def claim(self, url: str) -> bool:
+        # revalidação em segundo plano: uma por URL no processo e, via trava do backend, entre réplicas
+        with self._lock:
+            if url in self._inflight:
+                return False
+            self._inflight[url] = None
+        token = self._try("trava", lambda: self.backend.acquire(self._key(url, "revalidate"), self.flight_wait))
+        with self._lock:
+            if token is None:
+                del self._inflight[url]
+                return False
+            self._inflight[url] = token
+        return True
+
+    def release(self, url: str) -> None:
+        with self._lock:
+            token = self._inflight.pop(url, None)
+        if token is not None:
+            self._try("trava", lambda: self.backend.release(self._key(url, "revalidate"), token))
+
+    def single_flight(self, key: str, fn: Callable[[], list[dict]],
+                      check: Callable[[], Optional[list[dict]]]) -> list[dict]:
+        # chamadas idênticas simultâneas viram uma ida ao upstream. no processo, quem chega depois
+        # espera o resultado do líder; entre processos/réplicas, a trava do backend elege o líder e
+        # os demais consultam `check()` (entrada gravada depois que começaram) até ela aparecer.
+        # se o líder sumir, a espera termina em flight_wait e a chamada segue sozinha
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return list(flight.result)
+        try:
+            flight.result = self._lead(key, fn, check)
+            return list(flight.result)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _lead(self, key: str, fn: Callable[[], list[dict]],
+              check: Callable[[], Optional[list[dict]]]) -> list[dict]:
+        lock = f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.flight"
+        acquire = lambda: self._try("trava", lambda: self.backend.acquire(lock, self.flight_wait), _DOWN)
+        token = acquire()
+        deadline = time.time() + self.flight_wait
+        pause = 0.02
+        while token is None and time.time() < deadline:
+            time.sleep(pause)
+            pause = min(pause * 2, 0.5)
+            items = check()
+            if items is not None:
+                return items
+            token = acquire()
+        if token is _DOWN:
+            # sem backend não há como coordenar réplicas: busca direta (ainda coalescida no processo)
+            return fn()
+        try:
+            if token is not None:
+                # outro processo pode ter terminado entre o get do chamador e a trava
+                items = check()
+                if items is not None:
+                    return items
+            return fn()
+        finally:
+            if token is not None:
+                self._try("trava", lambda: self.backend.release(lock, token))
+
+
+_default_cache: Optional[FeedCache] = None
+
+def get_feed_cache() -> FeedCache:
+    global _default_cache
+    with _session_lock:
+        if _default_cache is None:
+            _default_cache = FeedCache(backend=make_backend(FEED_CACHE_URL, FEED_CACHE_DIR))
+        return _default_cache
+
+
+def _build_google_news_rss_url(query: str, hl: str = "pt-BR", ceid: str = "BR:pt-419",
+                               base_url: Optional[str] = None) -> str:
     q = up.quote(query, safe="()\"' :")
-    return f"https://news.google.com/rss/search?q={q}&hl={hl}&ceid={ceid}"
+    return f"{base_url or FEED_BASE_URL}?q={q}&hl={hl}&ceid={ceid}"
+
+def get_session() -> requests.Session:
+    # uma sessão keep-alive compartilhada por todas as threads do processo
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers["User-Agent"] = USER_AGENT
+            _session = s
+        return _session
 
-def fetch_news(query: str, max_items: int = 15, hl: str = "pt-BR", ceid: str = "BR:pt-419") -> list[dict]:
-    url = _build_google_news_rss_url(query, hl=hl, ceid=ceid)
+def host_limit(url: str, per_host: int) -> threading.BoundedSemaphore:
+    # semáforo do processo por (host, limite): quem faz requisições fora deste módulo (ex.: src/resolve.py)
+    # usa `with host_limit(url, n):` para dividir o mesmo teto de conexões por host
+    host = up.urlparse(url).netloc
+    key = f"{host}#{per_host}"
+    with _host_limits_lock:
+        sem = _host_limits.get(key)
+        if sem is None:
+            sem = _host_limits[key] = threading.BoundedSemaphore(per_host)
+        return sem
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def _item_dict(item: ET.Element) -> dict:
+    out = {"title": "", "link": "", "description": "", "pubDate": "", "guid": "", "source": "", "source_url": ""}
+    for child in item:
+        tag = _local(child.tag)
+        if tag == "source":
+            out["source"] = (child.text or "").strip()
+            out["source_url"] = (child.get("url") or "").strip()
+        elif tag in out:
+            out[tag] = (child.text or "").strip()
+    return out
+
+def iter_rss_items(stream: IO[bytes], max_items: Optional[int] = None) -> Iterator[dict]:
+    # parse incremental: cada <item> vira dict assim que fecha e é descartado da árvore em seguida,
+    # e a leitura do stream para ao atingir max_items
+    if max_items is not None and max_items <= 0:
+        return
+    parent = None
+    n = 0
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = _local(elem.tag)
+        if event == "start":
+            if tag == "channel":
+                parent = elem
+            continue
+        if tag != "item":
+            continue
+        yield _item_dict(elem)
+        n += 1
+        elem.clear()
+        if parent is not None and len(parent) and parent[-1] is elem:
+            parent.remove(elem)
+        if max_items is not None and n >= max_items:
+            return
+
+def _parse_items(content: bytes, max_items: Optional[int]) -> list[dict]:
+    return list(iter_rss_items(io.BytesIO(content), max_items))
+
+
+class _TeeReader:
+    # repassa o stream para o parser guardando uma cópia dos bytes lidos (para o cache em disco);
+    # eof indica que o corpo foi lido até o fim, ou seja, a entrada tem todos os itens do feed
+    def __init__(self, raw, keep: bool):
+        self.raw = raw
+        self.buf = bytearray() if keep else None
+        self.eof = False
+
+    def read(self, n: int = -1) -> bytes:
+        chunk = self.raw.read(n)
+        if not chunk:
+            self.eof = True
+        elif self.buf is not None:
+            self.buf += chunk
+        return chunk
+
+
+def _download(url: str, session: requests.Session, per_host: int, timeout: float,
+              cache: Optional[FeedCache], entry: Optional[dict], max_items: Optional[int] = None) -> list[dict]:
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    # entrada completa é revalidada lendo o corpo inteiro: uma leitura parcial (consulta com max_items
+    # menor na mesma URL) não pode trocar o feed completo por um truncado
+    limit = None if entry and entry.get("complete", True) else max_items
+    with host_limit(url, per_host):
+        resp = session.get(url, timeout=timeout, headers=headers, stream=True)
+        try:
+            same = entry and entry.get("etag") and resp.headers.get("ETag") == entry["etag"]
+            if entry and (resp.status_code == 304 or (resp.ok and same)):
+                # nada mudou: reaproveita os itens já parseados
+                return cache.touch(url, entry)["items"][:max_items]
+            resp.raise_for_status()
+            resp.raw.decode_content = True
+            reader = _TeeReader(resp.raw, keep=cache is not None)
+            # um item a mais: se o feed tem exatamente max_items, o parser chega ao fim e a entrada fica completa
+            items = list(iter_rss_items(reader, limit + 1 if limit is not None else None))
+            complete = reader.eof
+        finally:
+            # fecha sem drenar o resto do corpo quando paramos em max_items
+            resp.close()
+    if cache is not None:
+        cache.put(url, items, resp.headers.get("ETag"), resp.headers.get("Last-Modified"),
+                  bytes(reader.buf) if complete else None, complete=complete)
+    return items[:max_items]
+
+def _revalidate_in_background(url: str, session: requests.Session, per_host: int, timeout: float,
+                              cache: FeedCache, entry: dict, max_items: Optional[int]) -> None:
+    if not cache.claim(url):
+        return
+
+    def _run():
+        try:
+            _download(url, session, per_host, timeout, cache, entry, max_items)
+        except Exception:
+            pass
+        finally:
+            cache.release(url)
+
+    threading.Thread(target=_run, name="feed-revalidate", daemon=True).start()
+
+def _fetch_items(url: str, max_items: int, session: Optional[requests.Session] = None,
+                 per_host: int = MAX_PER_HOST, timeout: float = DEFAULT_TIMEOUT,
+                 cache: Optional[FeedCache] = None) -> list[dict]:
+    session = session or get_session()
+    t0 = time.time()
+    entry = cache.get(url) if cache is not None else None
+    if entry is not None and not cache.covers(entry, max_items):
+        entry = None
+    if cache is None:
+        return _download(url, session, per_host, timeout, None, None, max_items)
+
+    def _fresh() -> Optional[list[dict]]:
+        # alguém (outra thread ou réplica) gravou a entrada depois que esta chamada começou
+        e = cache.get(url)
+        if e is not None and float(e.get("fetched_at") or 0) >= t0 and cache.covers(e, max_items):
+            return e["items"][:max_items]
+        return None
+
+    flight = f"{url}#{max_items}"
+    if entry is None:
+        return cache.single_flight(flight, lambda: _download(url, session, per_host, timeout, cache, None, max_items),
+                                   _fresh)
+
+    age = cache.age(entry)
+    if age < cache.fresh_ttl:
+        return entry["items"][:max_items]
+    if age < cache.stale_ttl:
+        # stale-while-revalidate: responde na hora e atualiza o disco em segundo plano
+        _revalidate_in_background(url, session, per_host, timeout, cache, entry, max_items)
+        return entry["items"][:max_items]
+    if not cache.serve_stale_on_error:
+        # só revalidação condicional (ETag/304), com o timeout normal e sem engolir falhas
+        return cache.single_flight(
+            flight, lambda: _download(url, session, per_host, timeout, cache, entry, max_items)[:max_items], _fresh,
+        )
     try:
-        resp = requests.get(url, timeout=15)
-        resp.raise_for_status()
-        root = ET.fromstring(resp.content)
-        items = []
-        for item in root.findall(".//item")[:max_items]:
-            items.append({
-                "title": (item.findtext("title") or "").strip(),
-                "link": (item.findtext("link") or "").strip(),
-                "description": (item.findtext("description") or "").strip(),
-                "pubDate": (item.findtext("pubDate") or "").strip(),
-            })
-        return items
+        return cache.single_flight(
+            flight, lambda: _download(url, session, per_host, min(timeout, FEED_STALE_TIMEOUT), cache, entry,
+                                      max_items)[:max_items],
+            _fresh,
+        )
     except Exception:
-        return []
\ No newline at end of file
+        # upstream fora do ar ou lento: melhor a cópia velha do que nada
+        if entry.get("items"):
+            _revalidate_in_background(url, session, per_host, timeout, cache, entry, max_items)
+            return entry["items"][:max_items]
+        raise
+
+def fetch_query_items(query: str, max_items: int, hl: str = "pt-BR", ceid: str = "BR:pt-419",
+                      session: Optional[requests.Session] = None, per_host: int = MAX_PER_HOST,
+                      timeout: float = DEFAULT_TIMEOUT, cache: Optional[FeedCache] = None,
+                      base_url: Optional[str] = None) -> list[dict]:
+    # uma consulta com cache e limite por host; ao contrário de fetch_news, falhas sobem para quem chamou
+    url = _build_google_news_rss_url(query, hl=hl, ceid=ceid, base_url=base_url)
+    return _fetch_items(url, max_items, session=session, per_host=per_host, timeout=timeout, cache=cache)
+
+def fetch_news(query: str, max_items: int = 15, hl: str = "pt-BR", ceid: str = "BR:pt-419",
+               cache: Optional[FeedCache] = None, base_url: Optional[str] = None) -> list[dict]:
+    try:
+        return fetch_query_items(query, max_items, hl=hl, ceid=ceid, cache=cache, base_url=base_url)
+    except Exception:
+        return []
+
+def iter_news(query: str, max_items: Optional[int] = None, hl: str = "pt-BR", ceid: str = "BR:pt-419",
+              timeout: float = DEFAULT_TIMEOUT, base_url: Optional[str] = None) -> Iterator[dict]:
+    # versão geradora, sem cache: entrega cada item assim que chega (útil para feeds grandes/backfills)
+    url = _build_google_news_rss_url(query, hl=hl, ceid=ceid, base_url=base_url)
+    resp = get_session().get(url, timeout=timeout, stream=True)
+    try:
+        resp.raise_for_status()
+        resp.raw.decode_content = True
+        yield from iter_rss_items(resp.raw, max_items)
+    finally:
+        resp.close()
+
+QuerySpec = Union[str, dict]
+
+def fetch_many(queries: Iterable[QuerySpec], max_items: int = 15, hl: str = "pt-BR", ceid: str = "BR:pt-419",
+               max_workers: int = MAX_WORKERS, per_host: int = MAX_PER_HOST,
+               timeout: float = DEFAULT_TIMEOUT, cache: Optional[FeedCache] = None,
+               base_url: Optional[str] = None) -> list[FetchResult]:
+    # cada consulta é uma string ou um dict com `query` (+ max_items/hl/ceid opcionais);
+    # o resultado mantém a ordem de entrada e traz o erro de cada consulta separadamente
+    specs = []
+    for q in queries:
+        spec = {"query": q} if isinstance(q, str) else dict(q)
+        spec.setdefault("max_items", max_items)
+        spec.setdefault("hl", hl)
+        spec.setdefault("ceid", ceid)
+        specs.append(spec)
+    if not specs:
+        return []
+
+    session = get_session()
+
+    def _one(spec: dict) -> FetchResult:
+        t0 = time.perf_counter()
+        try:
+            items = fetch_query_items(spec["query"], spec["max_items"], hl=spec["hl"], ceid=spec["ceid"],
+                                      session=session, per_host=per_host, timeout=timeout, cache=cache,
+                                      base_url=base_url)
+            return FetchResult(spec["query"], items, None, time.perf_counter() - t0)
+        except Exception as e:
+            return FetchResult(spec["query"], [], f"{type(e).__name__}: {e}", time.perf_counter() - t0)
+
+    workers = max(1, min(max_workers, len(specs)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+        return list(pool.map(_one, specs))
@@ -0,0 +1,225 @@
+from __future__ import annotations
+import argparse
+import os
+import shutil
+import time
+import uuid
+from typing import Iterable, Iterator, Optional
+import pandas as pd
+
+from src.sentiment import sentiment_codes, sentiment_from_codes
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # histórico em Parquet é opcional; sem pyarrow tudo fica só no SQLite
+    pa = pc = ds = pq = None
+
+# histórico colunar em Parquet particionado por mês (hive: month=AAAA-MM/part-*.parquet).
+# filtros de data, fonte, sentimento e id descem para o leitor: partições fora da janela
+# nem são abertas e row groups são podados pelas estatísticas de pub_ts
+
+STALE_TMP = 3600          # idade (s) a partir da qual temporários de compactação são lixo
+
+HISTORY_COLUMNS = [
+    "id", "link", "title", "description", "descricao_limpa", "guid", "source", "source_url",
+    "fonte", "sentimento", "score", "pub_ts", "cluster_id", "topic", "ingested_at",
+]
+
+
+def _schema():
+    return pa.schema([
+        ("id", pa.string()), ("link", pa.string()), ("title", pa.string()), ("description", pa.string()),
+        ("descricao_limpa", pa.string()), ("guid", pa.string()), ("source", pa.string()),
+        ("source_url", pa.string()), ("fonte", pa.string()), ("sentimento", pa.int8()),
+        ("score", pa.float32()), ("pub_ts", pa.int64()), ("cluster_id", pa.string()),
+        ("topic", pa.int16()), ("ingested_at", pa.int64()), ("month", pa.string()),
+    ])
+
+def _month(ts) -> str:
+    return time.strftime("%Y-%m", time.gmtime(int(ts)))
+
+def _ts(value) -> int:
+    return int(pd.Timestamp(value).timestamp())
+
+
+class History:
+    available = pa is not None
+
+    def __init__(self, root: str):
+        if not self.available:
+            raise RuntimeError("histórico em Parquet requer pyarrow (pip install pyarrow)")
+        self.root = root
+        self.schema = _schema()
+        self.partitioning = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+
+    def _table(self, df: pd.DataFrame) -> "pa.Table":
+        out = pd.DataFrame({c: df[c] if c in df else None for c in HISTORY_COLUMNS}, index=df.index)
+        out["sentimento"] = sentiment_codes(out["sentimento"])
+        out["pub_ts"] = pd.to_numeric(out["pub_ts"], errors="coerce").astype("Int64")
+        out["ingested_at"] = pd.to_numeric(out["ingested_at"], errors="coerce").astype("Int64")
+        out["topic"] = pd.to_numeric(out["topic"], errors="coerce").astype("Int16")
+        when = out["pub_ts"].fillna(out["ingested_at"]).fillna(0)
+        out["month"] = [_month(t) for t in when]
+        return pa.Table.from_pandas(out, schema=self.schema, preserve_index=False)
+
+    def append(self, df: pd.DataFrame) -> int:
+        # cada escrita gera um arquivo novo por mês tocado; `compact` junta os pedaços depois.
+        # o arquivo é gravado com nome "." (ignorado por leitor e compactação) e renomeado pronto
+        if df.empty:
+            return 0
+        table = self._table(df)
+        stamp = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+        months = table.column("month")
+        for month in pc.unique(months).to_pylist():
+            part = os.path.join(self.root, f"month={month}")
+            os.makedirs(part, exist_ok=True)
+            tmp = os.path.join(part, f".part-{stamp}.tmp")
+            pq.write_table(table.filter(pc.equal(months, month)).drop_columns(["month"]), tmp)
+            os.replace(tmp, os.path.join(part, f"part-{stamp}-0.parquet"))
+        return len(df)
+
+    def dataset(self) -> Optional["ds.Dataset"]:
+        if not os.path.isdir(self.root):
+            return None
+        return ds.dataset(self.root, format="parquet", partitioning=self.partitioning,
+                          schema=self.schema, exclude_invalid_files=True)
+
+    def filter(self, start=None, end=None, sources: Optional[list[str]] = None,
+               sentiments: Optional[list[str]] = None, ids: Optional[Iterable[str]] = None):
+        expr = None
+
+        def _and(e):
+            nonlocal expr
+            expr = e if expr is None else expr & e
+        if start is not None:
+            ts = _ts(start)
+            _and((ds.field("month") >= _month(ts)) & (ds.field("pub_ts") >= ts))
+        if end is not None:
+            ts = _ts(end)
+            _and((ds.field("month") <= _month(ts - 1)) & (ds.field("pub_ts") < ts))
+        if sources:
+            _and(ds.field("fonte").isin(list(sources)))
+        if sentiments:
+            _and(ds.field("sentimento").isin(pa.array(sentiment_codes(list(sentiments)), pa.int8())))
+        if ids is not None:
+            _and(ds.field("id").isin(list(ids)))
+        return expr
+
+    def _frame(self, table: "pa.Table") -> pd.DataFrame:
+        df = table.to_pandas()
+        if "sentimento" in df:
+            df["sentimento"] = sentiment_from_codes(df["sentimento"])
+        if "fonte" in df:
+            df["fonte"] = df["fonte"].astype("category")
+        if "pub_ts" in df:
+            df["pub_ts"] = df["pub_ts"].astype("Int64")
+        return df
+
+    def read(self, start=None, end=None, sources=None, sentiments=None, ids=None,
+             columns: Optional[list[str]] = None) -> pd.DataFrame:
+        cols = [c for c in (columns or HISTORY_COLUMNS) if c in HISTORY_COLUMNS]
+        dataset = self.dataset()
+        if dataset is None or (ids is not None and not ids):
+            return self._frame(self.schema.empty_table().select(cols))
+        table = dataset.to_table(columns=cols, filter=self.filter(start, end, sources, sentiments, ids))
+        df = self._frame(table)
+        if "pub_ts" in df:
+            df = df.sort_values("pub_ts", ascending=False, na_position="last", kind="stable").reset_index(drop=True)
+        return df
+
+    def iter_batches(self, start=None, end=None, sources=None, sentiments=None, ids=None,
+                     columns: Optional[list[str]] = None, batch_size: int = 50_000) -> Iterator[pd.DataFrame]:
+        # leitura em lotes (para export): memória limitada ao tamanho do lote
+        cols = [c for c in (columns or HISTORY_COLUMNS) if c in HISTORY_COLUMNS]
+        dataset = self.dataset()
+        if dataset is None or (ids is not None and not ids):
+            return
+        scanner = dataset.scanner(columns=cols, filter=self.filter(start, end, sources, sentiments, ids),
+                                  batch_size=batch_size)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield self._frame(pa.Table.from_batches([batch]))
+
+    def count(self) -> int:
+        dataset = self.dataset()
+        return dataset.count_rows() if dataset is not None else 0
+
+    def _sweep(self) -> None:
+        # sobras de uma escrita ou compactação interrompida: diretórios .{mês}.old/.tmp (versão anterior, que
+        # trocava a partição inteira) e arquivos .part-*/.compact-*.tmp com mais de STALE_TMP segundos
+        # (os mais novos podem ser de uma escrita em andamento)
+        cutoff = time.time() - STALE_TMP
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".") and name.endswith((".old", ".tmp")):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.isdir(path):
+                for f in os.listdir(path):
+                    tmp = os.path.join(path, f)
+                    if not (f.startswith((".compact-", ".part-")) and f.endswith(".tmp")):
+                        continue
+                    try:
+                        if os.path.getmtime(tmp) < cutoff:
+                            os.remove(tmp)
+                    except FileNotFoundError:   # renomeado pela escrita em andamento
+                        pass
+
+    def compact(self) -> int:
+        # junta os arquivos de cada partição num único arquivo ordenado por pub_ts. o arquivo novo entra
+        # na própria partição (nome com "." é ignorado pelo leitor até o rename) e só os arquivos listados
+        # no início são apagados: um `append` concorrente (sync_history) nunca se perde
+        rewritten = 0
+        if not os.path.isdir(self.root):
+            return 0
+        self._sweep()
+        schema = self.schema.remove(self.schema.get_field_index("month"))
+        for name in sorted(os.listdir(self.root)):
+            part = os.path.join(self.root, name)
+            if name.startswith(".") or not os.path.isdir(part):
+                continue
+            files = sorted(f for f in os.listdir(part) if f.endswith(".parquet") and not f.startswith("."))
+            if len(files) < 2:
+                continue
+            table = pq.read_table([os.path.join(part, f) for f in files], schema=schema)
+            # uma sincronização repetida (falha entre gravar o Parquet e o commit) deixa o id duplicado:
+            # fica a última cópia, já que os nomes começam pelo horário da escrita
+            keep = ~table.column("id").to_pandas().duplicated(keep="last").to_numpy()
+            table = table.filter(pa.array(keep)).sort_by([("pub_ts", "ascending")])
+            stamp = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+            tmp = os.path.join(part, f".compact-{stamp}.tmp")
+            pq.write_table(table, tmp, row_group_size=64_000)
+            os.replace(tmp, os.path.join(part, f"part-{stamp}-c.parquet"))
+            for f in files:
+                try:
+                    os.remove(os.path.join(part, f))
+                except FileNotFoundError:
+                    pass
+            rewritten += 1
+        return rewritten
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    from src.store import ArticleStore
+
+    ap = argparse.ArgumentParser(description="Manutenção do histórico em Parquet.")
+    ap.add_argument("--db", help="caminho do banco SQLite (padrão: config.DB_PATH)")
+    ap.add_argument("--rebuild", action="store_true", help="apaga o Parquet e reexporta todo o banco")
+    ap.add_argument("--compact", action="store_true", help="junta os arquivos pequenos de cada partição")
+    args = ap.parse_args(argv)
+    store = ArticleStore(args.db) if args.db else ArticleStore()
+    if store.history is None:
+        raise SystemExit("histórico em Parquet indisponível (instale pyarrow)")
+    synced = store.rebuild_history() if args.rebuild else store.sync_history()
+    compacted = store.history.compact() if args.compact else 0
+    print(f"{synced} artigos sincronizados, {compacted} partições compactadas, "
+          f"{store.history.count()} linhas em {store.history.root}")
+
+
+if __name__ == "__main__":
+    main()
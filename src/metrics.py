@@ -0,0 +1,141 @@
+from __future__ import annotations
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Iterator, Optional
+
+# instrumentação leve por etapa: cada span guarda duração e nº de itens;
+# os spans do rerun atual ficam num ContextVar e o agregado do processo alimenta p50/p95
+
+WINDOW = 1000   # últimas N medidas por etapa usadas nos percentis
+
+
+@dataclass
+class Span:
+    stage: str
+    seconds: float
+    items: Optional[int] = None
+    ts: float = 0.0
+
+
+class _Handle:
+    __slots__ = ("items",)
+
+    def __init__(self, items: Optional[int]):
+        self.items = items
+
+
+_current: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("metrics_run", default=None)
+_history: dict[str, deque] = {}
+_totals: dict[str, list] = {}   # stage -> [count, soma de segundos, soma de itens]
+_lock = threading.Lock()
+
+def begin_run() -> list[Span]:
+    spans: list[Span] = []
+    _current.set(spans)
+    return spans
+
+def run_spans() -> list[Span]:
+    return list(_current.get() or [])
+
+def record(stage: str, seconds: float, items: Optional[int] = None) -> Span:
+    sp = Span(stage, seconds, items, time.time())
+    run = _current.get()
+    if run is not None:
+        run.append(sp)
+    with _lock:
+        _history.setdefault(stage, deque(maxlen=WINDOW)).append(seconds)
+        tot = _totals.setdefault(stage, [0, 0.0, 0])
+        tot[0] += 1
+        tot[1] += seconds
+        tot[2] += items or 0
+    return sp
+
+@contextmanager
+def span(stage: str, items: Optional[int] = None) -> Iterator[_Handle]:
+    # with span("clean", len(df)) as s: ... ; s.items pode ser ajustado dentro do bloco
+    h = _Handle(items)
+    t0 = time.perf_counter()
+    try:
+        yield h
+    finally:
+        record(stage, time.perf_counter() - t0, h.items)
+
+def _quantile(sorted_vals: list[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[i]
+
+def summary() -> dict[str, dict]:
+    with _lock:
+        snap = {k: sorted(v) for k, v in _history.items()}
+        totals = {k: list(v) for k, v in _totals.items()}
+    return {
+        stage: {
+            "count": totals[stage][0],
+            "sum_seconds": totals[stage][1],
+            "items": totals[stage][2],
+            "p50": _quantile(vals, 0.5),
+            "p95": _quantile(vals, 0.95),
+        }
+        for stage, vals in snap.items()
+    }
+
+def prometheus_text(prefix: str = "monitor_stage") -> str:
+    lines = [
+        f"# HELP {prefix}_seconds Duração das etapas do pipeline do dashboard.",
+        f"# TYPE {prefix}_seconds summary",
+    ]
+    items_lines = [
+        f"# HELP {prefix}_items_total Itens processados por etapa.",
+        f"# TYPE {prefix}_items_total counter",
+    ]
+    for stage, s in sorted(summary().items()):
+        lbl = f'stage="{stage}"'
+        lines.append(f'{prefix}_seconds{{{lbl},quantile="0.5"}} {s["p50"]:.6f}')
+        lines.append(f'{prefix}_seconds{{{lbl},quantile="0.95"}} {s["p95"]:.6f}')
+        lines.append(f"{prefix}_seconds_sum{{{lbl}}} {s['sum_seconds']:.6f}")
+        lines.append(f"{prefix}_seconds_count{{{lbl}}} {s['count']}")
+        items_lines.append(f"{prefix}_items_total{{{lbl}}} {s['items']}")
+    return "\n".join(lines + items_lines) + "\n"
+
+def jsonl_lines(spans: list[Span], **extra) -> str:
+    return "".join(json.dumps({**asdict(sp), **extra}, ensure_ascii=False) + "\n" for sp in spans)
+
+def export(spans: list[Span], jsonl_path: Optional[str] = None, prom_path: Optional[str] = None, **extra) -> None:
+    # JSONL acumula todas as execuções; o .prom é reescrito (formato textfile do node_exporter)
+    if jsonl_path and spans:
+        os.makedirs(os.path.dirname(os.path.abspath(jsonl_path)), exist_ok=True)
+        with _lock, open(jsonl_path, "a", encoding="utf-8") as f:
+            f.write(jsonl_lines(spans, **extra))
+    if prom_path:
+        os.makedirs(os.path.dirname(os.path.abspath(prom_path)), exist_ok=True)
+        tmp = f"{prom_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+        os.replace(tmp, prom_path)
+
+
+class Profiler:
+    # captura opcional com cProfile do rerun inteiro
+    def __init__(self):
+        self._prof = cProfile.Profile()
+
+    def start(self) -> "Profiler":
+        self._prof.enable()
+        return self
+
+    def stop(self, limit: int = 30, sort: str = "cumulative") -> str:
+        self._prof.disable()
+        out = io.StringIO()
+        pstats.Stats(self._prof, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
@@ -0,0 +1,236 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional
+from urllib.parse import urlparse
+import pandas as pd
+
+from src.clean import CLEANER_VERSION, clean_batch
+from src.dates import parse_pubdates, to_datetime_utc
+from src.dedup import cluster_texts
+from src.fetch import fetch_news
+from src.history import History
+from src.metrics import span
+from src.resolve import LinkResolver, get_link_resolver, is_redirect
+from src.search import InvertedIndex
+from src.sentiment import SENTIMENT_DTYPE, get_lexicon, score_series
+from src.shards import ShardReport, iter_sharded, last_days
+from src.store import ArticleStore, article_key
+from src.terms import count_ngrams
+from src.topics import topic_table
+
+# exemplo local exibido quando a coleta não devolve nada
+SAMPLE_ITEMS = [
+    {"title": "Universidade lança laboratório de IA no Piauí", "link": "https://exemplo.local/1",
+     "description": "Projeto destaca inovação e benefício para educação e economia regional.", "pubDate": None},
+    {"title": "Debate sobre impactos da IA no Piauí", "link": "https://exemplo.local/2",
+     "description": "Desafios e oportunidades foram discutidos por especialistas.", "pubDate": None},
+]
+
+# colunas do quadro de trabalho do dashboard; a descrição HTML crua fica só no banco/Parquet
+VIEW_COLUMNS = ["id", "link", "title", "descricao_limpa", "fonte", "sentimento", "score", "pub_ts", "cluster_id",
+                "topic"]
+UPSERT_BATCH = 500   # itens por transação ao ingerir a coleta fatiada
+STRING_COLUMNS = ["id", "link", "title", "descricao_limpa", "cluster_id"]
+STRING_DTYPE = pd.StringDtype("pyarrow") if History.available else pd.StringDtype()
+
+def domain(url) -> str:
+    try:
+        host = urlparse(url).netloc
+        return host.replace("www.", "") if host else ""
+    except Exception:
+        return ""
+
+def _domains(values: pd.Series) -> pd.Series:
+    values = values.where(values.notna(), "")
+    return values.map({u: domain(u) for u in pd.unique(values)})
+
+def source_domains(df: pd.DataFrame, resolver: Optional[LinkResolver] = None) -> pd.Series:
+    # fonte = domínio do <source url> do feed; sem ele, o link (redirecionamentos do agregador
+    # são resolvidos em lote, com cache persistente); se nada der certo, o próprio host do link
+    links = df["link"] if "link" in df else pd.Series("", index=df.index)
+    fonte = _domains(df["source_url"]) if "source_url" in df else pd.Series("", index=df.index)
+    missing = (fonte == "").to_numpy()
+    if not missing.any():
+        return fonte
+    targets = links[missing].where(links[missing].notna(), "")
+    redirect = targets[targets.map(is_redirect)]
+    if not redirect.empty:
+        with span("resolve_links", redirect.nunique()):
+            resolved = (resolver or get_link_resolver()).resolve(pd.unique(redirect))
+        targets = targets.where(~targets.index.isin(redirect.index), redirect.map(resolved).fillna(redirect))
+    fonte[missing] = _domains(targets)
+    return fonte
+
+def enrich_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # itens crus do RSS -> colunas derivadas usadas pelo dashboard
+    out = df.copy()
+    if "description" not in out:
+        out["description"] = ""
+    n = len(out)
+    with span("to_datetime", n):
+        out["pub_ts"] = parse_pubdates(out["pubDate"]) if "pubDate" in out else pd.Series(pd.NA, index=out.index, dtype="Int64")
+        out["data_pub"] = to_datetime_utc(out["pub_ts"])
+    out["fonte"] = source_domains(out)
+    with span("clean", n):
+        out["descricao_limpa"] = clean_batch(out["description"])
+    with span("classify", n):
+        out["score"], out["sentimento"] = score_series(out["descricao_limpa"])
+    # versões que produziram as colunas derivadas; o backfill recalcula as que ficarem velhas
+    out["lexicon_version"] = get_lexicon().tag
+    out["cleaner_version"] = CLEANER_VERSION
+    return out
+
+def collapse_near_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+    # uma linha por história: o representante mais antigo de cada cluster, com o nº de cópias
+    if df.empty:
+        return df.assign(copias=pd.Series(dtype="int64"))
+    if "cluster_id" in df and df["cluster_id"].notna().all():
+        clusters = df["cluster_id"]
+    else:
+        with span("dedup", len(df)):
+            clusters = pd.Series(cluster_texts(df["descricao_limpa"].fillna(""), ids=df.index), index=df.index)
+    out = df.assign(cluster_id=clusters)
+    copias = out["cluster_id"].value_counts()
+    out = out.sort_values("data_pub", na_position="last", kind="stable").drop_duplicates("cluster_id", keep="first")
+    return out.assign(copias=out["cluster_id"].map(copias).astype("int64")).sort_index().reset_index(drop=True)
+
+
+# pipeline headless (sem Streamlit): itens crus -> banco -> quadro enriquecido + agregados.
+# o dashboard só cacheia o resultado por parâmetros da consulta + store.version()
+
+@dataclass
+class View:
+    df: pd.DataFrame
+    publicacoes: int                          # linhas antes de agrupar republicações
+    counts: dict = field(default_factory=dict)
+    top_fontes: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=["Fonte", "Quantidade"]))
+    unigrams: list = field(default_factory=list)
+    topics: pd.DataFrame = field(default_factory=lambda: topic_table(pd.DataFrame(), {}))
+    _index: Optional[InvertedIndex] = field(default=None, repr=False, compare=False)
+
+    def search_index(self) -> InvertedIndex:
+        # índice do filtro da tabela: montado na primeira busca e descartado junto com a view
+        # (o painel cacheia views por consulta + store.version(), então texto reprocessado não sobra)
+        if self._index is None:
+            index = InvertedIndex()
+            index.add_many(self.df["id"], self.df["title"].fillna("") + " " + self.df["descricao_limpa"].fillna(""))
+            self._index = index
+        return self._index
+
+def ingest_stream(store: ArticleStore, items: Iterable[dict], query: Optional[str],
+                  batch: int = UPSERT_BATCH,
+                  on_new: Optional[Callable[[pd.DataFrame], object]] = None) -> tuple[list[str], int]:
+    # ingere um fluxo de itens em lotes (a coleta fatiada entrega aos poucos); devolve ids e nº de novos.
+    # on_new recebe as linhas novas de cada lote já processadas (ex.: avaliação de alertas)
+    ids: list[str] = []
+    new = 0
+    for chunk in _batched(items, batch):
+        rows = store.upsert(chunk, query=query, process=enrich_frame)
+        new += len(rows)
+        if on_new is not None and not rows.empty:
+            on_new(rows)
+        ids.extend(article_key(n.get("link"), n.get("title")) for n in chunk)
+    return list(dict.fromkeys(ids)), new
+
+def _batched(items: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    chunk: list[dict] = []
+    for it in items:
+        chunk.append(it)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def collect(store: ArticleStore, query: str, max_items: int, hl: str, ceid: str, cache=None,
+            days: int = 0, report: Optional[ShardReport] = None,
+            on_new: Optional[Callable[[pd.DataFrame], object]] = None) -> list[str]:
+    # coleta e ingere; devolve os ids na ordem do feed (vazio = nada coletado).
+    # days > 0: varre os últimos `days` dias em fatias after:/before: (sem o teto de ~100 itens).
+    # on_new recebe as linhas novas, como em ingest_stream (ex.: AlertEngine.hook)
+    if days:
+        report = report if report is not None else ShardReport()
+        with span("get_news") as sp:
+            items = iter_sharded(query, *last_days(days), hl=hl, ceid=ceid, cache=cache, report=report)
+            ids, _ = ingest_stream(store, items, query, on_new=on_new)
+            sp.items = report.items
+        return ids
+    with span("get_news") as sp:
+        news = fetch_news(query=query, max_items=max_items, hl=hl, ceid=ceid, cache=cache)
+        sp.items = len(news)
+    if not news:
+        return []
+    rows = store.upsert(news, query=query, process=enrich_frame)
+    if on_new is not None and not rows.empty:
+        on_new(rows)
+    return list(dict.fromkeys(article_key(n.get("link"), n.get("title")) for n in news))
+
+def sample_frame() -> pd.DataFrame:
+    df = enrich_frame(pd.DataFrame(SAMPLE_ITEMS))
+    df["id"] = [article_key(l, t) for l, t in zip(df["link"], df["title"])]
+    return df.drop_duplicates(subset="id", keep="first").reset_index(drop=True)
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    # esquema enxuto: texto em strings Arrow, fonte categórica, sentimento categórico (códigos int8),
+    # score float32 e pub_ts int64; data_pub é derivada de pub_ts (datetime64 também é int64 por baixo)
+    out = {}
+    for c in STRING_COLUMNS:
+        if c in df:
+            out[c] = df[c].astype(STRING_DTYPE)
+    out["fonte"] = df["fonte"].astype("category") if "fonte" in df else pd.Categorical([None] * len(df))
+    out["sentimento"] = df["sentimento"].astype(SENTIMENT_DTYPE)
+    if "score" in df:
+        out["score"] = df["score"].astype("float32")
+    if "topic" in df:
+        out["topic"] = pd.to_numeric(df["topic"], errors="coerce").fillna(-1).astype("int16")
+    if "pub_ts" in df:
+        pub_ts = pd.to_numeric(df["pub_ts"], errors="coerce").astype("Int64")
+    else:
+        ts = pd.to_datetime(df.get("data_pub"), errors="coerce", utc=True)
+        pub_ts = pd.Series(ts.dt.as_unit("s").astype("int64"), index=df.index).where(ts.notna()).astype("Int64")
+    out["pub_ts"] = pub_ts
+    out["data_pub"] = pd.to_datetime(pub_ts.astype("float64"), unit="s", utc=True)
+    return pd.DataFrame(out, index=df.index)
+
+def top_sources(df: pd.DataFrame, k: int = 10) -> pd.DataFrame:
+    vc = df["fonte"].value_counts()
+    vc = vc[(vc.index != "") & (vc > 0)].head(k)
+    return pd.DataFrame({"Fonte": vc.index, "Quantidade": vc.to_numpy()})
+
+def summarize(df: pd.DataFrame, agrupar: bool = False, top_k: int = 200,
+              store: Optional[ArticleStore] = None, query: Optional[str] = None,
+              start: Optional[pd.Timestamp] = None) -> View:
+    df = compact(df)
+    publicacoes = len(df)
+    if agrupar:
+        df = collapse_near_duplicates(df)
+    counts = df["sentimento"].value_counts().to_dict()
+    if store is not None and start is not None and not agrupar:
+        # janela do histórico: contagens mantidas na ingestão, sem reprocessar texto
+        unigrams = store.terms.top(query, 1, top_k, start=start)
+    else:
+        with span("ngrams", len(df)):
+            uni, _ = count_ngrams(df["descricao_limpa"].fillna(""))
+            unigrams = uni.most_common(top_k)
+    # temas já atribuídos na ingestão: aqui só contagem e série por tema, vetorizadas
+    with span("topics", len(df)):
+        topics = topic_table(df, store.topics.labels() if store is not None else {})
+    return View(df, publicacoes, counts, top_sources(df), unigrams, topics)
+
+def load_view(store: ArticleStore, query: Optional[str] = None, ids: Optional[list[str]] = None,
+              start: Optional[pd.Timestamp] = None, limit: Optional[int] = None,
+              agrupar: bool = False, top_k: int = 200) -> View:
+    # ids = recorte de uma coleta; senão a janela da consulta desde `start`
+    if ids is not None:
+        df = store.read_window(ids=list(ids), columns=VIEW_COLUMNS)
+    elif start is not None and store.history is not None:
+        # janelas de histórico: Parquet colunar, com a janela e os ids da consulta filtrados no leitor
+        store.sync_history()
+        with span("read_history") as sp:
+            df = store.history.read(start=start, ids=store.query_ids(query) if query else None, columns=VIEW_COLUMNS)
+            sp.items = len(df)
+        if limit:
+            df = df.head(limit)
+    else:
+        df = store.read_window(query=query, start=start, limit=limit, columns=VIEW_COLUMNS)
+    return summarize(df, agrupar, top_k, store=store, query=query, start=start if ids is None else None)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+import argparse
+import json
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from src.cache import make_backend
+from src.config import (
+    FEED_CACHE_DIR, FEED_CACHE_URL, LANG_OPTIONS, PRESETS, REGION_OPTIONS,
+    POLL_INTERVAL, POLL_MIN_INTERVAL, POLL_JITTER, POLL_MAX_BACKOFF,
+)
+from src.alerts import AlertEngine
+from src.fetch import FeedCache, fetch_many
+from src.pipeline import enrich_frame, ingest_stream
+from src.shards import ShardReport, iter_sharded, last_days
+from src.store import ArticleStore
+
+log = logging.getLogger("poller")
+
+
+@dataclass
+class PollTarget:
+    query: str
+    hl: str = LANG_OPTIONS[0]
+    ceid: str = REGION_OPTIONS[0]
+    max_items: int = 100
+    days: int = 0                 # > 0: varre os últimos `days` dias em fatias por data (src/shards.py)
+    interval: float = POLL_INTERVAL
+    min_interval: float = POLL_MIN_INTERVAL
+    next_due: float = 0.0
+    last_run: float = 0.0
+    failures: int = 0
+
+    def spec(self) -> dict:
+        return {"query": self.query, "hl": self.hl, "ceid": self.ceid, "max_items": self.max_items}
+
+    def schedule_ok(self, now: float) -> None:
+        self.failures = 0
+        self.last_run = now
+        delay = self.interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+        self.next_due = now + max(delay, self.min_interval)
+
+    def schedule_error(self, now: float) -> None:
+        # backoff exponencial com jitter ("full jitter" na metade superior)
+        self.failures += 1
+        self.last_run = now
+        delay = min(POLL_MAX_BACKOFF, self.interval * (2 ** self.failures))
+        self.next_due = now + max(delay * random.uniform(0.5, 1.0), self.min_interval)
+
+
+def load_targets(path: Optional[str] = None) -> list[PollTarget]:
+    # sem arquivo de configuração, coleta os presets do dashboard
+    if not path:
+        return [PollTarget(q) for q in PRESETS.values()]
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    entries = raw.get("queries", raw) if isinstance(raw, dict) else raw
+    targets = []
+    for e in entries:
+        t = PollTarget(e) if isinstance(e, str) else PollTarget(**e)
+        if t.hl not in LANG_OPTIONS:
+            raise ValueError(f"hl inválido para {t.query!r}: {t.hl} (opções: {LANG_OPTIONS})")
+        if t.ceid not in REGION_OPTIONS:
+            raise ValueError(f"ceid inválido para {t.query!r}: {t.ceid} (opções: {REGION_OPTIONS})")
+        targets.append(t)
+    return targets
+
+def poll_once(targets: list[PollTarget], store: ArticleStore, cache: FeedCache, now: Optional[float] = None,
+              alerts: Optional[AlertEngine] = None) -> int:
+    now = time.time() if now is None else now
+    due = [t for t in targets if t.next_due <= now]
+    if not due:
+        return 0
+    total_new = 0
+    for t in [t for t in due if t.days]:
+        total_new += _poll_sharded(t, store, cache, now, alerts)
+    due = [t for t in due if not t.days]
+    for t, res in zip(due, fetch_many([t.spec() for t in due], cache=cache)) if due else ():
+        if not res.ok:
+            t.schedule_error(now)
+            log.warning("falha em %r (%d seguidas): %s; próxima em %.0fs",
+                        t.query, t.failures, res.error, t.next_due - now)
+            continue
+        new = store.upsert(res.items, query=t.query, process=enrich_frame)
+        total_new += len(new)
+        if alerts is not None and not new.empty:
+            alerts.hook(t.query)(new)
+        t.schedule_ok(now)
+        log.info("%r: %d itens, %d novos (%.2fs)", t.query, len(res.items), len(new), res.elapsed)
+    return total_new
+
+def _poll_sharded(t: PollTarget, store: ArticleStore, cache: FeedCache, now: float,
+                  alerts: Optional[AlertEngine] = None) -> int:
+    report = ShardReport()
+    items = iter_sharded(t.query, *last_days(t.days), hl=t.hl, ceid=t.ceid, cache=cache, report=report)
+    on_new = alerts.hook(t.query) if alerts is not None else None
+    _, new = ingest_stream(store, items, t.query, on_new=on_new)
+    if report.errors and not report.items:
+        t.schedule_error(now)
+        log.warning("falha em %r (%d seguidas): %s; próxima em %.0fs",
+                    t.query, t.failures, report.errors[0], t.next_due - now)
+        return new
+    t.schedule_ok(now)
+    log.info("%r: %d itens em %d fatias, %d novos (%.2fs)", t.query, report.items, report.requests, new, report.elapsed)
+    if report.saturated or report.errors:
+        log.warning("%r: %d dias ainda no limite do RSS, %d fatias com erro",
+                    t.query, len(report.saturated), len(report.errors))
+    return new
+
+def run(targets: list[PollTarget], store: ArticleStore, once: bool = False,
+        alerts: Optional[AlertEngine] = None) -> None:
+    # revalida sempre (fresh_ttl=0): um 304 custa pouco e o feed nunca fica velho no banco.
+    # sem cópia velha em caso de erro: a falha precisa chegar ao FetchResult para o backoff funcionar.
+    # mesmo backend do dashboard (MONITOR_CACHE), então os validadores e as travas são compartilhados
+    cache = FeedCache(fresh_ttl=0, stale_ttl=0, serve_stale_on_error=False,
+                      backend=make_backend(FEED_CACHE_URL, FEED_CACHE_DIR))
+    # espalha a primeira rodada para não disparar todas as consultas juntas
+    start = time.time()
+    for i, t in enumerate(targets):
+        t.next_due = start if once else start + random.uniform(0, min(t.interval, 5.0 * i))
+    while True:
+        poll_once(targets, store, cache, alerts=alerts)
+        if once:
+            return
+        wait = min(t.next_due for t in targets) - time.time()
+        time.sleep(max(1.0, wait))
+
+def main(argv: Optional[list[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Coletor em segundo plano: alimenta o banco local lido pelo dashboard.")
+    ap.add_argument("--config", help="JSON com a lista de consultas (query, hl, ceid, max_items, days, interval)")
+    ap.add_argument("--db", help="caminho do banco SQLite (padrão: MONITOR_DB ou .cache/noticias.db)")
+    ap.add_argument("--once", action="store_true", help="faz uma rodada e sai")
+    ap.add_argument("--alerts", help="JSON com regras de alerta (padrão: MONITOR_ALERTS); saída em .cache/alerts.jsonl")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    store = ArticleStore(args.db) if args.db else ArticleStore()
+    targets = load_targets(args.config)
+    alerts = AlertEngine.from_file(args.alerts)
+    log.info("coletando %d consultas em %s", len(targets), store.path)
+    if alerts is not None:
+        log.info("%d regras de alerta -> %s", len(alerts.rules), alerts.outbox)
+    try:
+        run(targets, store, once=args.once, alerts=alerts)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse as up
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+import requests
+
+from src.config import LINK_CACHE_PATH, LINK_RETRY_AFTER, REDIRECT_HOSTS
+from src.fetch import DEFAULT_TIMEOUT, MAX_PER_HOST, MAX_WORKERS, get_session, host_limit
+
+# resolve links de redirecionamento (news.google.com/rss/articles/...) para a URL do veículo.
+# HEAD sem seguir redirecionamentos: cada salto lê só o Location e para no primeiro host fora de
+# REDIRECT_HOSTS, então o site do veículo nem é acessado. o resultado vai para um SQLite próprio,
+# então cada link é resolvido uma única vez (falhas são tentadas de novo após LINK_RETRY_AFTER)
+
+MAX_HOPS = 5
+
+
+def _host(url: str) -> str:
+    try:
+        return up.urlparse(url).netloc.lower()
+    except ValueError:
+        return ""
+
+def is_redirect(url: str) -> bool:
+    return _host(url or "").replace("www.", "") in REDIRECT_HOSTS
+
+
+class LinkResolver:
+    def __init__(self, path: str = LINK_CACHE_PATH, retry_after: float = LINK_RETRY_AFTER,
+                 timeout: float = DEFAULT_TIMEOUT, max_workers: int = MAX_WORKERS, per_host: int = MAX_PER_HOST):
+        self.retry_after = retry_after
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.per_host = per_host
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS links (link TEXT PRIMARY KEY, url TEXT, resolved_at INTEGER NOT NULL)"
+            )
+            self.conn.commit()
+
+    def cached(self, links: Iterable[str]) -> dict[str, Optional[str]]:
+        # link -> URL final (None = falhou há pouco); links ausentes ainda não foram tentados
+        links = list(links)
+        out: dict[str, Optional[str]] = {}
+        cutoff = int(time.time() - self.retry_after)
+        with self._lock:
+            for i in range(0, len(links), 500):
+                chunk = links[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for link, url, ts in self.conn.execute(
+                    f"SELECT link, url, resolved_at FROM links WHERE link IN ({marks})", chunk
+                ):
+                    if url is not None or ts >= cutoff:
+                        out[link] = url
+        return out
+
+    def _resolve_one(self, session: requests.Session, link: str) -> Optional[str]:
+        url = link
+        for _ in range(MAX_HOPS):
+            with host_limit(url, self.per_host):
+                resp = session.head(url, allow_redirects=False, timeout=self.timeout)
+            location = resp.headers.get("Location")
+            if not resp.is_redirect or not location:
+                # sem redirecionamento: só vale se já saímos do agregador
+                return None if is_redirect(url) else url
+            url = up.urljoin(url, location)
+            if not is_redirect(url):
+                return url
+        return None
+
+    def resolve(self, links: Iterable[str]) -> dict[str, Optional[str]]:
+        # resolve em lote: cache primeiro, o resto em paralelo (sessão keep-alive compartilhada)
+        links = list(dict.fromkeys(l for l in links if l))
+        out = self.cached(links)
+        missing = [l for l in links if l not in out]
+        if not missing:
+            return out
+        session = get_session()
+
+        def _one(link: str) -> Optional[str]:
+            try:
+                return self._resolve_one(session, link)
+            except requests.RequestException:
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(missing))),
+                                thread_name_prefix="resolve") as pool:
+            resolved = dict(zip(missing, pool.map(_one, missing)))
+        now = int(time.time())
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO links (link, url, resolved_at) VALUES (?, ?, ?)",
+                [(l, u, now) for l, u in resolved.items()],
+            )
+            self.conn.commit()
+        out.update(resolved)
+        return out
+
+
+_default: Optional[LinkResolver] = None
+_default_lock = threading.Lock()
+
+def get_link_resolver() -> LinkResolver:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = LinkResolver()
+        return _default
@@ -0,0 +1,98 @@
+from __future__ import annotations
+import sqlite3
+import threading
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+
+from src.terms import ALL_QUERIES
+
+# séries temporais pré-agregadas: nº de artigos e sentimento por (consulta, hora) e (consulta, dia),
+# atualizadas na ingestão; a linha do tempo lê daqui em vez de reagrupar os artigos
+
+GRAINS = {"h": 3600, "d": 86400}
+SENTIMENT_COLUMNS = {"Positivo": "pos", "Neutro": "neu", "Negativo": "neg"}
+
+
+class Rollups:
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock):
+        self.conn = conn
+        self.lock = lock
+        with self.lock:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rollups (query TEXT NOT NULL, grain TEXT NOT NULL, "
+                "bucket INTEGER NOT NULL, total INTEGER NOT NULL, pos INTEGER NOT NULL, neu INTEGER NOT NULL, "
+                "neg INTEGER NOT NULL, score_sum REAL NOT NULL, PRIMARY KEY (query, grain, bucket))"
+            )
+
+    def add(self, query: str, rows: Iterable[tuple[Optional[int], Optional[str], Optional[float]]]) -> None:
+        # rows: (timestamp em segundos, sentimento, score); chamado dentro da transação da ingestão
+        df = pd.DataFrame(list(rows), columns=["ts", "sentimento", "score"])
+        df["ts"] = pd.to_numeric(df["ts"], errors="coerce")
+        df = df[df["ts"].notna()]
+        if df.empty:
+            return
+        ts = df["ts"].to_numpy(dtype=np.int64)
+        flags = {col: (df["sentimento"] == label).to_numpy(dtype=np.int64) for label, col in SENTIMENT_COLUMNS.items()}
+        score = pd.to_numeric(df["score"], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+        out = []
+        for grain, size in GRAINS.items():
+            agg = pd.DataFrame({"bucket": ts // size, "total": 1, **flags, "score_sum": score}).groupby("bucket").sum()
+            out.extend((query, grain, int(b), int(r.total), int(r.pos), int(r.neu), int(r.neg), float(r.score_sum))
+                       for b, r in zip(agg.index, agg.itertuples(index=False)))
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO rollups (query, grain, bucket, total, pos, neu, neg, score_sum) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (query, grain, bucket) DO UPDATE SET "
+                "total = total + excluded.total, pos = pos + excluded.pos, neu = neu + excluded.neu, "
+                "neg = neg + excluded.neg, score_sum = score_sum + excluded.score_sum",
+                out,
+            )
+
+    def rebuild(self) -> None:
+        # recalcula tudo a partir dos artigos armazenados (escopo global + cada consulta)
+        ts = "COALESCE(a.pub_ts, a.ingested_at)"
+        # SUM de um bucket só com sentimento NULL é NULL: COALESCE para as colunas NOT NULL
+        sums = ("COUNT(*), COALESCE(SUM(a.sentimento = 'Positivo'), 0), COALESCE(SUM(a.sentimento = 'Neutro'), 0), "
+                "COALESCE(SUM(a.sentimento = 'Negativo'), 0), COALESCE(SUM(a.score), 0)")
+        with self.lock:
+            self.conn.execute("DELETE FROM rollups")
+            for grain, size in GRAINS.items():
+                self.conn.execute(
+                    f"INSERT INTO rollups SELECT ?, ?, {ts} / {size} AS b, {sums} FROM articles a "
+                    f"WHERE {ts} IS NOT NULL GROUP BY b", (ALL_QUERIES, grain),
+                )
+                self.conn.execute(
+                    f"INSERT INTO rollups SELECT q.query, ?, {ts} / {size} AS b, {sums} FROM articles a "
+                    f"JOIN article_queries q ON q.article_id = a.id WHERE {ts} IS NOT NULL GROUP BY q.query, b",
+                    (grain,),
+                )
+
+    def series(self, query: Optional[str] = None, grain: str = "d", start: Optional[pd.Timestamp] = None,
+               end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        # série contínua (buckets vazios = 0) indexada pelo início de cada hora/dia em UTC
+        size = GRAINS[grain]
+        sql = ("SELECT bucket, total, pos, neu, neg, score_sum FROM rollups "
+               "WHERE query = ? AND grain = ?")
+        params: list = [query or ALL_QUERIES, grain]
+        if start is not None:
+            sql += " AND bucket >= ?"
+            params.append(int(pd.Timestamp(start).timestamp()) // size)
+        if end is not None:
+            sql += " AND bucket < ?"
+            params.append(-(-int(pd.Timestamp(end).timestamp()) // size))
+        with self.lock:
+            rows = self.conn.execute(sql + " ORDER BY bucket", params).fetchall()
+        cols = ["total", "pos", "neu", "neg", "score_sum"]
+        if not rows:
+            return pd.DataFrame(columns=cols, index=pd.DatetimeIndex([], tz="UTC", name="inicio"))
+        df = pd.DataFrame([tuple(r) for r in rows], columns=["bucket", *cols]).set_index("bucket")
+        lo = int(pd.Timestamp(start).timestamp()) // size if start is not None else int(df.index.min())
+        hi = int(df.index.max())
+        df = df.reindex(range(min(lo, hi), hi + 1), fill_value=0)
+        df.index = pd.to_datetime(df.index.to_numpy() * size, unit="s", utc=True).rename("inicio")
+        return df
+
+    def clear(self) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM rollups")
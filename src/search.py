@@ -0,0 +1,122 @@
+from __future__ import annotations
+import bisect
+import threading
+from typing import Hashable, Iterable, Optional
+
+from src.clean import clean_text
+from src.sentiment import tokenize
+
+
+def fold_tokens(text: str) -> list[str]:
+    # mesma normalização do clean_text: "Inteligência" e "inteligencia" viram o mesmo token
+    return tokenize(clean_text(text or ""))
+
+
+class InvertedIndex:
+    # índice invertido token -> ids de linha; cresce incrementalmente e responde
+    # consultas com AND implícito, OR, NOT/-termo e prefixo (termo*); os operadores só valem em
+    # maiúsculas (OR/OU/NOT), então "ou" e "not" minúsculos são buscados como palavras
+    def __init__(self):
+        self.postings: dict[str, set[int]] = {}
+        self.keys: list[Hashable] = []
+        self.key_ids: dict[Hashable, int] = {}
+        self._vocab: list[str] = []
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.key_ids
+
+    def add(self, key: Hashable, text: str) -> None:
+        with self._lock:
+            if key in self.key_ids:
+                return
+            rid = self.key_ids[key] = len(self.keys)
+            self.keys.append(key)
+            for tok in set(fold_tokens(text)):
+                bucket = self.postings.get(tok)
+                if bucket is None:
+                    bucket = self.postings[tok] = set()
+                    self._dirty = True
+                bucket.add(rid)
+
+    def add_many(self, keys: Iterable[Hashable], texts: Iterable[str]) -> int:
+        added = 0
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key not in self.key_ids:
+                    self.add(key, text)
+                    added += 1
+        return added
+
+    def _term(self, tok: str) -> set[int]:
+        if tok.endswith("*"):
+            prefix = tok[:-1]
+            if self._dirty:
+                self._vocab = sorted(self.postings)
+                self._dirty = False
+            out: set[int] = set()
+            i = bisect.bisect_left(self._vocab, prefix)
+            while i < len(self._vocab) and self._vocab[i].startswith(prefix):
+                out |= self.postings[self._vocab[i]]
+                i += 1
+            return out
+        return self.postings.get(tok, set())
+
+    def _clause(self, words: list[str]) -> set[int]:
+        include: Optional[set[int]] = None
+        exclude: set[int] = set()
+        negate_next = False
+        for w in words:
+            if w == "NOT":
+                negate_next = True
+                continue
+            negate = negate_next or (w.startswith("-") and len(w) > 1)
+            negate_next = False
+            raw = w[1:] if w.startswith("-") else w
+            star = raw.endswith("*")
+            toks = fold_tokens(raw)
+            if not toks:
+                continue
+            if star:
+                toks[-1] += "*"
+            # palavras com hífen são um token só (como no índice); outra pontuação ("covid/19")
+            # separa em vários tokens, e todos precisam estar presentes
+            hit = set.intersection(*(self._term(t) for t in toks))
+            if negate:
+                exclude |= hit
+            else:
+                include = hit if include is None else include & hit
+        if include is None:
+            include = set(range(len(self.keys)))
+        return include - exclude
+
+    def search_ids(self, query: str) -> Optional[set[int]]:
+        words = (query or "").split()
+        if not words:
+            return None
+        clauses, cur = [], []
+        for w in words:
+            if w in ("OR", "OU"):
+                clauses.append(cur)
+                cur = []
+            else:
+                cur.append(w)
+        clauses.append(cur)
+        with self._lock:
+            result: set[int] = set()
+            for c in clauses:
+                if c:
+                    result |= self._clause(c)
+            return result
+
+    def search(self, query: str) -> Optional[set[Hashable]]:
+        # None = consulta vazia (sem filtro); senão, o conjunto de chaves que casam
+        ids = self.search_ids(query)
+        if ids is None:
+            return None
+        keys = self.keys
+        return {keys[i] for i in ids}
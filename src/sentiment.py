@@ -1,32 +1,180 @@
-
 from __future__ import annotations
+import json
+import os
+import re
+import threading
+from typing import Iterable, Optional
+import numpy as np
 import pandas as pd
 
-POS = {
-    "avanco","avanço","sucesso","beneficio","inovacao","oportunidade","melhoria",
-    "positivo","crescimento","lider","premio","recorde","aprovado","parceria",
-    "investimento","emprego","eficiencia","seguranca","educacao","saude","desenvolvimento"
-}
-NEG = {
-    "crise","queda","fracasso","falha","problema","risco","ameaça","ameaca","vulneravel",
-    "negativo","crime","golpe","investigacao","vazamento","demissao","corte","perda","atraso",
-    "erro","polêmica","polemica","prejuizo","ineficiencia"
-}
+from src.clean import clean_text
 
 SENTIMENT_ORDER = ["Positivo", "Neutro", "Negativo"]
+# categórico ordenado: guarda o rótulo como código int8 (0 = Positivo, 1 = Neutro, 2 = Negativo)
+SENTIMENT_DTYPE = pd.CategoricalDtype(SENTIMENT_ORDER, ordered=True)
+LEXICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons")
+LEXICON_PATH = os.environ.get("MONITOR_LEXICON", os.path.join(LEXICON_DIR, "pt-br.json"))
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+def tokenize(text: str) -> list[str]:
+    # espera texto já normalizado por clean_text (minúsculo, sem acento)
+    return TOKEN_RE.findall(text) if text else []
+
+
+class _PhraseAutomaton:
+    # Aho-Corasick sobre sequências de ids de termos; cada estado guarda a frase mais longa que termina nele
+    def __init__(self):
+        self.goto: list[dict[int, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[Optional[tuple[int, float]]] = [None]
+
+    def add(self, ids: list[int], weight: float) -> None:
+        node = 0
+        for i in ids:
+            nxt = self.goto[node].get(i)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][i] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(None)
+            node = nxt
+        self.out[node] = (len(ids), weight)
+
+    def build(self) -> None:
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for i, child in self.goto[node].items():
+                if node:
+                    f = self.fail[node]
+                    while f and i not in self.goto[f]:
+                        f = self.fail[f]
+                    self.fail[child] = self.goto[f].get(i, 0)
+                if self.out[child] is None:
+                    self.out[child] = self.out[self.fail[child]]
+                queue.append(child)
+
+    def scan(self, ids: list[int]) -> list[tuple[int, int, float]]:
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        hits = []
+        for pos, i in enumerate(ids):
+            while node and i not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(i, 0)
+            o = out[node]
+            if o is not None:
+                hits.append((pos - o[0] + 1, o[0], o[1]))
+        return hits
+
+
+class Lexicon:
+    def __init__(self, terms: dict[str, float], negators: Iterable[str] = (), negation_window: int = 3,
+                 negation_factor: float = -1.0, name: str = "custom", version: str = "0"):
+        self.name = name
+        self.version = version
+        self.negation_window = int(negation_window)
+        self.negation_factor = float(negation_factor)
+        self.vocab: dict[str, int] = {}
+        self.weights: dict[tuple[int, ...], float] = {}
+        self._automaton = _PhraseAutomaton()
+        for term, weight in terms.items():
+            ids = tuple(self._id(t) for t in tokenize(clean_text(term)))
+            if ids:
+                self.weights[ids] = float(weight)
+                self._automaton.add(list(ids), float(weight))
+        self._automaton.build()
+        self.negator_ids = {self._id(t) for n in negators for t in tokenize(clean_text(n))}
+
+    @property
+    def tag(self) -> str:
+        return f"{self.name}@{self.version}"
 
-def score_text(text: str) -> int:
-    if not text:
-        return 0
-    tokens = set(text.split())
-    pos = len(tokens.intersection(POS))
-    neg = len(tokens.intersection(NEG))
-    return pos - neg
+    def _id(self, token: str) -> int:
+        i = self.vocab.get(token)
+        if i is None:
+            i = self.vocab[token] = len(self.vocab)
+        return i
 
-def to_label(score: int) -> str:
+    @classmethod
+    def load(cls, path: str = LEXICON_PATH, **overrides) -> "Lexicon":
+        with open(path, "r", encoding="utf-8") as f:
+            pack = json.load(f)
+        params = {
+            "terms": pack["terms"],
+            "negators": pack.get("negators", []),
+            "negation_window": pack.get("negation_window", 3),
+            "negation_factor": pack.get("negation_factor", -1.0),
+            "name": pack.get("name", os.path.splitext(os.path.basename(path))[0]),
+            "version": str(pack.get("version", "0")),
+        }
+        params.update(overrides)
+        return cls(**params)
+
+    def score(self, text: str) -> float:
+        if not text:
+            return 0.0
+        get = self.vocab.get
+        ids = [get(t, -1) for t in tokenize(text)]
+        hits = self._automaton.scan(ids)
+        if not hits:
+            return 0.0
+        # leftmost-longest: "corte de gastos" vence "corte"; termos sobrepostos não contam duas vezes
+        hits.sort(key=lambda h: (h[0], -h[1]))
+        neg, window, factor = self.negator_ids, self.negation_window, self.negation_factor
+        total = 0.0
+        covered = -1
+        for start, length, weight in hits:
+            if start <= covered:
+                continue
+            covered = start + length - 1
+            if neg and any(ids[j] in neg for j in range(max(0, start - window), start)):
+                weight *= factor
+            total += weight
+        return total
+
+    def score_many(self, texts) -> np.ndarray:
+        # cada texto distinto é pontuado uma vez; o resultado volta como array alinhado à entrada
+        s = texts if isinstance(texts, pd.Series) else pd.Series(list(texts), dtype=object)
+        codes, uniques = pd.factorize(s.where(s.notna(), ""), sort=False)
+        scores = np.fromiter((self.score(u) for u in uniques), dtype=np.float32, count=len(uniques))
+        return scores[codes] if len(codes) else np.zeros(0, dtype=np.float32)
+
+
+_engine: Optional[Lexicon] = None
+_engine_lock = threading.Lock()
+
+def get_lexicon() -> Lexicon:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = Lexicon.load()
+        return _engine
+
+def score_text(text: str) -> float:
+    return get_lexicon().score(text)
+
+def to_label(score: float) -> str:
     if score > 0: return "Positivo"
     if score < 0: return "Negativo"
     return "Neutro"
 
+def labels_from_scores(scores: np.ndarray) -> np.ndarray:
+    return np.select([scores > 0, scores < 0], ["Positivo", "Negativo"], default="Neutro").astype(object)
+
+def score_series(series, lexicon: Optional[Lexicon] = None) -> tuple[np.ndarray, np.ndarray]:
+    scores = (lexicon or get_lexicon()).score_many(series)
+    return scores, labels_from_scores(scores)
+
+def sentiment_codes(labels) -> np.ndarray:
+    # rótulos -> int8 (-1 = ausente), na ordem de SENTIMENT_ORDER
+    return pd.Categorical(labels, dtype=SENTIMENT_DTYPE).codes.astype(np.int8)
+
+def sentiment_from_codes(codes) -> pd.Categorical:
+    codes = pd.Series(codes).fillna(-1).to_numpy(dtype=np.int8)
+    return pd.Categorical.from_codes(codes, dtype=SENTIMENT_DTYPE)
+
 def classify_text_series(series: pd.Series) -> pd.Series:
-    return series.fillna("").map(score_text).map(to_label)
\ No newline at end of file
+    _, labels = score_series(series)
+    return pd.Series(labels, index=series.index, dtype=object)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+import datetime as dt
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from src.config import FEED_RESULT_CAP, SHARD_MAX_REQUESTS
+from src.fetch import DEFAULT_TIMEOUT, MAX_PER_HOST, MAX_WORKERS, FeedCache, fetch_query_items, get_session
+from src.store import article_key
+
+# coleta fatiada por data: o RSS de busca corta em ~100 itens, então o período vira várias consultas
+# `after:AAAA-MM-DD before:AAAA-MM-DD` em paralelo. fatia que volta cheia (bateu no limite) é
+# dividida ao meio e recoletada; a granularidade mínima é um dia, e dias ainda cheios ficam
+# registrados como truncados. os itens saem à medida que as fatias chegam, já sem repetidos
+
+
+@dataclass
+class ShardReport:
+    requests: int = 0
+    splits: int = 0
+    items: int = 0
+    saturated: list[tuple[str, str]] = field(default_factory=list)   # dias que continuaram no limite
+    failed: list[tuple[str, str]] = field(default_factory=list)      # fatias [início, fim) que falharam
+    errors: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return not self.saturated and not self.errors
+
+
+def shard_query(query: str, lo: dt.date, hi: dt.date) -> str:
+    # after: inclusivo, before: exclusivo
+    return f"{query} after:{lo.isoformat()} before:{hi.isoformat()}"
+
+def split_range(lo: dt.date, hi: dt.date, parts: int) -> list[tuple[dt.date, dt.date]]:
+    # divide [lo, hi) em até `parts` fatias de dias inteiros
+    days = (hi - lo).days
+    parts = max(1, min(parts, days))
+    bounds = [lo + dt.timedelta(days=days * i // parts) for i in range(parts + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+def iter_sharded(query: str, start: dt.date, end: dt.date, hl: str = "pt-BR", ceid: str = "BR:pt-419",
+                 cap: int = FEED_RESULT_CAP, max_workers: int = MAX_WORKERS, per_host: int = MAX_PER_HOST,
+                 timeout: float = DEFAULT_TIMEOUT, cache: Optional[FeedCache] = None,
+                 base_url: Optional[str] = None, max_requests: int = SHARD_MAX_REQUESTS,
+                 report: Optional[ShardReport] = None) -> Iterator[dict]:
+    # itens de [start, end) sem repetição (mesma chave do banco: link + título normalizados)
+    report = report if report is not None else ShardReport()
+    if end <= start:
+        return
+    t0 = time.perf_counter()
+    session = get_session()
+    seen: set[str] = set()
+
+    def _one(lo: dt.date, hi: dt.date) -> list[dict]:
+        return fetch_query_items(shard_query(query, lo, hi), cap, hl=hl, ceid=ceid, session=session,
+                                 per_host=per_host, timeout=timeout, cache=cache, base_url=base_url)
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shard")
+    pending: dict[Future, tuple[dt.date, dt.date]] = {}
+
+    def _submit(lo: dt.date, hi: dt.date) -> None:
+        pending[pool.submit(_one, lo, hi)] = (lo, hi)
+        report.requests += 1
+
+    try:
+        for lo, hi in split_range(start, end, max_workers):
+            _submit(lo, hi)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                lo, hi = pending.pop(fut)
+                try:
+                    items = fut.result()
+                except Exception as e:
+                    report.failed.append((lo.isoformat(), hi.isoformat()))
+                    report.errors.append(f"{lo}..{hi}: {type(e).__name__}: {e}")
+                    continue
+                if len(items) >= cap:
+                    if (hi - lo).days > 1 and report.requests + 2 <= max_requests:
+                        report.splits += 1
+                        for a, b in split_range(lo, hi, 2):
+                            _submit(a, b)
+                    else:
+                        report.saturated.append((lo.isoformat(), hi.isoformat()))
+                # os itens da fatia cheia também saem: são os mais recentes dela, e as metades
+                # que os repetirem são descartadas aqui
+                for it in items:
+                    key = article_key(it.get("link"), it.get("title"))
+                    if key not in seen:
+                        seen.add(key)
+                        report.items += 1
+                        yield it
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        report.elapsed = time.perf_counter() - t0
+
+def describe_ranges(ranges: list[tuple[str, str]], limit: int = 5) -> str:
+    # [("2024-05-01", "2024-05-04"), ...] -> "2024-05-01 a 2024-05-03, ..." (fim inclusivo)
+    out = []
+    for lo, hi in sorted(ranges)[:limit]:
+        last = dt.date.fromisoformat(hi) - dt.timedelta(days=1)
+        out.append(lo if last.isoformat() <= lo else f"{lo} a {last.isoformat()}")
+    if len(ranges) > limit:
+        out.append(f"mais {len(ranges) - limit}")
+    return ", ".join(out)
+
+def last_days(days: int) -> tuple[dt.date, dt.date]:
+    # [início, fim) dos últimos `days` dias, incluindo hoje (UTC)
+    end = dt.datetime.now(dt.timezone.utc).date() + dt.timedelta(days=1)
+    return end - dt.timedelta(days=days), end
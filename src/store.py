@@ -0,0 +1,508 @@
+from __future__ import annotations
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+import numpy as np
+import pandas as pd
+
+from src.clean import clean_text
+from src.config import DB_PATH
+from src.dedup import NearDupIndex
+from src.history import History
+from src.metrics import span
+from src.rollups import Rollups
+from src.terms import ALL_QUERIES, TermStats
+from src.topics import TopicModel, hash_features
+
+# colunas da tabela de artigos; novas colunas entram aqui e são criadas na abertura do banco
+ARTICLE_COLUMNS = {
+    "id": "TEXT PRIMARY KEY",
+    "link": "TEXT",
+    "title": "TEXT",
+    "description": "TEXT",
+    "pubDate": "TEXT",
+    "pub_ts": "INTEGER",
+    "guid": "TEXT",
+    "source": "TEXT",
+    "source_url": "TEXT",
+    "fonte": "TEXT",
+    "descricao_limpa": "TEXT",
+    "sentimento": "TEXT",
+    "score": "REAL",
+    "cluster_id": "TEXT",
+    "topic": "INTEGER",            # tema (src/topics.py), atribuído na ingestão
+    "ingested_at": "INTEGER",
+    "lexicon_version": "TEXT",     # Lexicon.tag usado em score/sentimento
+    "cleaner_version": "TEXT",     # CLEANER_VERSION usado em descricao_limpa
+}
+
+INDEXES = {
+    "ix_articles_pub_ts": "articles(pub_ts)",
+    "ix_articles_fonte": "articles(fonte, pub_ts)",
+    "ix_articles_sentimento": "articles(sentimento, pub_ts)",
+    "ix_articles_cluster": "articles(cluster_id)",
+    "ix_article_queries_query": "article_queries(query, article_id)",
+}
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "oc"}
+
+# meta 'derived_dirty': derivados pendentes de um reprocessamento (src/backfill.py)
+DERIVED_STATS = 1          # termos, séries, temas e Parquet
+DERIVED_CLUSTERS = 2       # assinaturas MinHash e cluster_id (descricao_limpa mudou)
+
+def normalize_link(link: str) -> str:
+    link = (link or "").strip()
+    if not link:
+        return ""
+    try:
+        p = urlparse(link)
+    except Exception:
+        return link.lower()
+    query = [(k, v) for k, v in parse_qsl(p.query, keep_blank_values=True)
+             if not (k.lower().startswith("utm_") or k.lower() in _TRACKING_PARAMS)]
+    path = p.path.rstrip("/") or "/"
+    return urlunparse((p.scheme.lower() or "https", p.netloc.lower().replace("www.", ""), path, "", urlencode(query), ""))
+
+def article_key(link: str, title: str) -> str:
+    raw = f"{normalize_link(link)}\n{clean_text(title or '')}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+def _chunks(seq: list, size: int = 500):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+class ArticleStore:
+    # armazenamento SQLite local: artigos chaveados por hash de link+título normalizados
+    def __init__(self, path: str = DB_PATH, history: bool = True):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self._near_dups: Optional[NearDupIndex] = None
+        self._clusters_version = 0
+        with self._lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self._migrate()
+            self.terms = TermStats(self.conn, self._lock)
+            self.rollups = Rollups(self.conn, self._lock)
+            if not self._meta("rollups_built"):
+                # bancos anteriores às séries agregadas: calcula uma vez a partir dos artigos
+                self.rollups.rebuild()
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('rollups_built', 1)")
+                self.conn.commit()
+            self.topics = TopicModel(self.conn, self._lock)
+            regrouped = 0
+            if not self._meta("topics_built"):
+                # bancos anteriores aos temas: agrupa os artigos uma vez
+                regrouped = self.topics.rebuild()
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('topics_built', 1)")
+                self.conn.commit()
+        # cópia colunar (Parquet por mês) ao lado do banco: noticias.db -> noticias_history/
+        self.history: Optional[History] = None
+        if history and path != ":memory:" and History.available:
+            self.history = History(f"{os.path.splitext(path)[0]}_history")
+            if regrouped:
+                self.rebuild_history()
+
+    def _migrate(self) -> None:
+        cols = ", ".join(f"{k} {v}" for k, v in ARTICLE_COLUMNS.items())
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS articles ({cols})")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS article_queries ("
+            "query TEXT NOT NULL, article_id TEXT NOT NULL, PRIMARY KEY (article_id, query))"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS signatures (id TEXT PRIMARY KEY, sig BLOB NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        existing = {r["name"] for r in self.conn.execute("PRAGMA table_info(articles)")}
+        for name, decl in ARTICLE_COLUMNS.items():
+            if name not in existing:
+                self.conn.execute(f"ALTER TABLE articles ADD COLUMN {name} {decl}")
+        for name, target in INDEXES.items():
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+        self.conn.commit()
+
+    def _meta(self, key: str) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def version(self) -> int:
+        # versão dos dados: muda a cada escrita (deste processo ou do coletor); usada como chave de cache
+        with self._lock:
+            return self._meta("version")
+
+    def _bump_version(self) -> None:
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('version', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    def near_dups(self) -> NearDupIndex:
+        # índice LSH em memória; carrega só as assinaturas gravadas desde a última chamada
+        # (inclusive por outro processo, como o coletor)
+        with self._lock:
+            generation = self._meta("clusters_version")
+            if self._near_dups is None or generation != self._clusters_version:
+                # primeira chamada ou assinaturas refeitas (rebuild_clusters, talvez em outro processo)
+                self._near_dups = NearDupIndex()
+                self._sig_rowid = 0
+                self._clusters_version = generation
+            rows = self.conn.execute(
+                "SELECT s.rowid, s.id, s.sig, a.cluster_id FROM signatures s JOIN articles a ON a.id = s.id "
+                "WHERE s.rowid > ? ORDER BY s.rowid", (self._sig_rowid,)
+            ).fetchall()
+            for r in rows:
+                if r["id"] not in self._near_dups.cluster_of:
+                    self._near_dups.add(r["id"], np.frombuffer(r["sig"], dtype=np.uint32), r["cluster_id"])
+                self._sig_rowid = r["rowid"]
+            return self._near_dups
+
+    def rebuild_clusters(self) -> int:
+        # refaz assinaturas e cluster_id a partir de descricao_limpa (após trocar o limpador), em ordem
+        # de publicação: o mais antigo de cada grupo continua sendo o representante
+        index = NearDupIndex()
+        with self._lock:
+            ids = [r[0] for r in self.conn.execute("SELECT id FROM articles ORDER BY pub_ts IS NULL, pub_ts, rowid")]
+            self.conn.execute("DELETE FROM signatures")
+            for chunk in _chunks(ids):
+                texts = dict(self.conn.execute(
+                    f"SELECT id, descricao_limpa FROM articles WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall())
+                clusters = [(index.assign(i, texts.get(i) or ""), i) for i in chunk]
+                self.conn.executemany("UPDATE articles SET cluster_id = ? WHERE id = ?", clusters)
+                self.conn.executemany("INSERT INTO signatures (id, sig) VALUES (?, ?)",
+                                      [(i, index.signatures[i].tobytes()) for i in chunk if i in index.signatures])
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('clusters_version', 1) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+            )
+            self._bump_version()
+            self.conn.commit()
+            self._near_dups = index
+            self._sig_rowid = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM signatures").fetchone()[0]
+            self._clusters_version = self._meta("clusters_version")
+        return len(ids)
+
+    def _assign_clusters(self, new: pd.DataFrame) -> tuple[pd.DataFrame, list[tuple[str, bytes]]]:
+        # o mais antigo de cada grupo de republicações vira o representante canônico
+        if "pub_ts" in new:
+            order = new["pub_ts"].astype(float).sort_values(na_position="last", kind="stable").index
+        else:
+            order = new.index
+        index = self.near_dups()
+        ids, texts = new["id"].to_dict(), new["descricao_limpa"].to_dict()
+        clusters = {i: index.assign(ids[i], texts[i] or "") for i in order}
+        sigs = [(aid, index.signatures[aid].tobytes()) for aid in new["id"] if aid in index.signatures]
+        return new.assign(cluster_id=pd.Series(clusters)), sigs
+
+    def existing_ids(self, ids: Iterable[str]) -> set[str]:
+        ids = list(ids)
+        found: set[str] = set()
+        with self._lock:
+            for chunk in _chunks(ids):
+                marks = ",".join("?" * len(chunk))
+                found.update(r[0] for r in self.conn.execute(f"SELECT id FROM articles WHERE id IN ({marks})", chunk))
+        return found
+
+    def upsert(self, items: list[dict], query: Optional[str] = None,
+               process: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> pd.DataFrame:
+        # insere só os artigos ainda não vistos; `process` (limpeza + sentimento) roda apenas sobre eles.
+        # devolve as linhas novas já processadas
+        if not items:
+            return pd.DataFrame()
+        df = pd.DataFrame(items)
+        for col in ("link", "title"):
+            if col not in df:
+                df[col] = ""
+        df["id"] = [article_key(l, t) for l, t in zip(df["link"].fillna(""), df["title"].fillna(""))]
+        df = df.drop_duplicates(subset="id", keep="first").reset_index(drop=True)
+
+        new = df[~df["id"].isin(self.existing_ids(df["id"]))].reset_index(drop=True)
+        if process is not None and not new.empty:
+            new = process(new)
+        if not new.empty:
+            new = new.assign(ingested_at=int(time.time()))
+            if "pub_ts" not in new and "data_pub" in new:
+                ts = pd.to_datetime(new["data_pub"], errors="coerce", utc=True)
+                new["pub_ts"] = ((ts - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).astype("Int64")
+        sigs, features = [], None
+        if not new.empty and "descricao_limpa" in new:
+            with span("dedup", len(new)):
+                new, sigs = self._assign_clusters(new)
+            with span("topics", len(new)):
+                features = hash_features(new["descricao_limpa"].fillna(""), self.topics.n_features)
+        if not new.empty:
+            cols = [c for c in ARTICLE_COLUMNS if c in new.columns]
+            rows = new[cols].astype(object).where(new[cols].notna(), None).values.tolist()
+        with self._lock:
+            linked = self._linked_ids(query, df["id"]) if query else set()
+            if not new.empty:
+                self.conn.executemany(
+                    f"INSERT OR IGNORE INTO articles ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                    rows,
+                )
+            if sigs:
+                self.conn.executemany("INSERT OR IGNORE INTO signatures (id, sig) VALUES (?, ?)", sigs)
+            if features is not None:
+                # atribuição e atualização dos centroides dentro da mesma transação dos artigos
+                topics = self.topics.add(features)
+                self.conn.executemany("UPDATE articles SET topic = ? WHERE id = ?",
+                                      [(int(t), i) for t, i in zip(topics, new["id"]) if t >= 0])
+                new["topic"] = pd.Series(topics, index=new.index).where(topics >= 0).astype("Int64")
+            if query:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO article_queries (query, article_id) VALUES (?, ?)",
+                    [(query, i) for i in df["id"]],
+                )
+            newly_linked = [i for i in df["id"] if i not in linked] if query else []
+            self._update_stats(query, new, newly_linked)
+            if not new.empty or newly_linked:
+                self._bump_version()
+            self.conn.commit()
+        if not new.empty:
+            self.sync_history()
+        return new
+
+    def sync_history(self, chunk: int = 50_000) -> int:
+        # exporta para o Parquet os artigos gravados desde a última sincronização (marca = rowid);
+        # BEGIN IMMEDIATE serializa app e coletor para que nenhum lote seja escrito duas vezes
+        if self.history is None:
+            return 0
+        written = 0
+        with self._lock:
+            last = self.conn.execute("SELECT MAX(rowid) FROM articles").fetchone()[0] or 0
+            if last <= self._meta("history_rowid"):
+                return 0
+            while True:
+                self.conn.execute("BEGIN IMMEDIATE")
+                try:
+                    mark = self._meta("history_rowid")
+                    rows = self.conn.execute(
+                        "SELECT rowid AS _rowid, * FROM articles WHERE rowid > ? ORDER BY rowid LIMIT ?", (mark, chunk)
+                    ).fetchall()
+                    if rows:
+                        self.history.append(pd.DataFrame([dict(r) for r in rows]))
+                        self.conn.execute(
+                            "INSERT INTO meta (key, value) VALUES ('history_rowid', ?) "
+                            "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (rows[-1]["_rowid"],)
+                        )
+                    self.conn.commit()
+                except Exception:
+                    self.conn.rollback()
+                    raise
+                written += len(rows)
+                if len(rows) < chunk:
+                    return written
+
+    def rebuild_history(self) -> int:
+        # apaga o Parquet e reexporta todo o banco (após reprocessar artigos já sincronizados)
+        if self.history is None:
+            return 0
+        self.history.clear()
+        self.reset_history()
+        return self.sync_history()
+
+    def reset_history(self) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM meta WHERE key = 'history_rowid'")
+            self.conn.commit()
+
+    def query_ids(self, query: str) -> list[str]:
+        with self._lock:
+            return [r[0] for r in self.conn.execute("SELECT article_id FROM article_queries WHERE query = ?", (query,))]
+
+    def _linked_ids(self, query: str, ids) -> set[str]:
+        found: set[str] = set()
+        for chunk in _chunks(list(ids)):
+            marks = ",".join("?" * len(chunk))
+            found.update(r[0] for r in self.conn.execute(
+                f"SELECT article_id FROM article_queries WHERE query = ? AND article_id IN ({marks})", [query, *chunk]))
+        return found
+
+    def _update_stats(self, query: Optional[str], new: pd.DataFrame, newly_linked: list[str]) -> None:
+        # estatísticas de termos e séries agregadas: artigos novos entram no escopo global; artigos
+        # recém-ligados à consulta, novos ou já armazenados, entram no escopo da consulta
+        docs = {}
+        if not new.empty:
+            ts = new["pub_ts"] if "pub_ts" in new else pd.Series(None, index=new.index)
+            ts = ts.astype(object).where(ts.notna(), new["ingested_at"])
+            col = lambda c: new[c].astype(object).where(new[c].notna(), None) if c in new else [None] * len(new)
+            docs = dict(zip(new["id"], zip(ts, col("descricao_limpa"), col("sentimento"), col("score"))))
+            if "descricao_limpa" in new:
+                self.terms.add(ALL_QUERIES, [(t, text or "") for t, text, _, _ in docs.values()])
+            self.rollups.add(ALL_QUERIES, [(t, sent, score) for t, _, sent, score in docs.values()])
+        if not query or not newly_linked:
+            return
+        missing = [i for i in newly_linked if i not in docs]
+        for chunk in _chunks(missing):
+            marks = ",".join("?" * len(chunk))
+            for r in self.conn.execute(
+                f"SELECT id, COALESCE(pub_ts, ingested_at), descricao_limpa, sentimento, score "
+                f"FROM articles WHERE id IN ({marks})", chunk
+            ):
+                docs[r[0]] = (r[1], r[2], r[3], r[4])
+        linked_docs = [docs[i] for i in newly_linked if i in docs]
+        self.terms.add(query, [(t, text or "") for t, text, _, _ in linked_docs if text is not None])
+        self.rollups.add(query, [(t, sent, score) for t, _, sent, score in linked_docs])
+
+    def rebuild_stats(self) -> None:
+        # recalcula termos, séries agregadas e temas a partir dos artigos (após reprocessamento, por exemplo);
+        # os temas mudam de número, então o Parquet precisa de rebuild_history em seguida
+        with self._lock:
+            self.terms.clear()
+            rows = self.conn.execute(
+                "SELECT COALESCE(pub_ts, ingested_at), descricao_limpa FROM articles"
+            ).fetchall()
+            self.terms.add(ALL_QUERIES, [(r[0], r[1] or "") for r in rows])
+            queries = [r[0] for r in self.conn.execute("SELECT DISTINCT query FROM article_queries")]
+            for q in queries:
+                rows = self.conn.execute(
+                    "SELECT COALESCE(a.pub_ts, a.ingested_at), a.descricao_limpa FROM articles a "
+                    "JOIN article_queries q ON q.article_id = a.id WHERE q.query = ?", (q,)
+                ).fetchall()
+                self.terms.add(q, [(r[0], r[1] or "") for r in rows])
+            self.rollups.rebuild()
+            self.topics.rebuild()
+            self._bump_version()
+            self.conn.commit()
+
+    def stale_rows(self, lexicon_version: str, cleaner_version: str, after: int = 0,
+                   limit: int = 10_000) -> list[sqlite3.Row]:
+        # próximo lote (por rowid) de artigos processados com outra versão do léxico ou do limpador
+        with self._lock:
+            return self.conn.execute(
+                "SELECT rowid AS _rowid, id, description, descricao_limpa, "
+                "cleaner_version IS NOT ? AS needs_clean FROM articles "
+                "WHERE rowid > ? AND (lexicon_version IS NOT ? OR cleaner_version IS NOT ?) "
+                "ORDER BY rowid LIMIT ?",
+                (cleaner_version, after, lexicon_version, cleaner_version, limit),
+            ).fetchall()
+
+    def count_stale(self, lexicon_version: Optional[str], cleaner_version: str) -> int:
+        # lexicon_version=None conta só os que precisam de nova limpeza
+        with self._lock:
+            return int(self.conn.execute(
+                "SELECT COUNT(*) FROM articles WHERE (? IS NOT NULL AND lexicon_version IS NOT ?) "
+                "OR cleaner_version IS NOT ?",
+                (lexicon_version, lexicon_version, cleaner_version),
+            ).fetchone()[0])
+
+    def derived_dirty(self) -> int:
+        # DERIVED_* pendentes: um backfill que parou antes de recalcular os derivados deixa isto marcado
+        with self._lock:
+            return self._meta("derived_dirty")
+
+    def mark_derived_dirty(self, flags: int) -> None:
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('derived_dirty', ?)", (flags,))
+            self.conn.commit()
+
+    def invalidate_outputs(self) -> None:
+        # força o próximo backfill a reprocessar todos os artigos
+        with self._lock:
+            self.conn.execute("UPDATE articles SET lexicon_version = NULL, cleaner_version = NULL")
+            self.conn.commit()
+
+    def update_outputs(self, rows: list[tuple]) -> None:
+        # rows: (descricao_limpa, score, sentimento, lexicon_version, cleaner_version, id);
+        # cada lote é uma transação, então um backfill interrompido retoma de onde parou
+        with self._lock:
+            self.conn.executemany(
+                "UPDATE articles SET descricao_limpa = ?, score = ?, sentimento = ?, "
+                "lexicon_version = ?, cleaner_version = ? WHERE id = ?", rows,
+            )
+            self.conn.commit()
+
+    def _window_sql(self, cols: list[str], query=None, start=None, end=None, sources=None, sentiments=None,
+                    ids=None, id_table: Optional[str] = None) -> tuple[str, list]:
+        where, params = [], []
+        if query:
+            where.append("a.id IN (SELECT article_id FROM article_queries WHERE query = ?)")
+            params.append(query)
+        if start is not None:
+            where.append("a.pub_ts >= ?")
+            params.append(int(pd.Timestamp(start).timestamp()))
+        if end is not None:
+            where.append("a.pub_ts < ?")
+            params.append(int(pd.Timestamp(end).timestamp()))
+        if sources:
+            where.append(f"a.fonte IN ({','.join('?' * len(sources))})")
+            params.extend(sources)
+        if sentiments:
+            where.append(f"a.sentimento IN ({','.join('?' * len(sentiments))})")
+            params.extend(sentiments)
+        if id_table:
+            where.append(f"a.id IN (SELECT id FROM {id_table})")
+        elif ids is not None:
+            where.append(f"a.id IN ({','.join('?' * len(ids))})")
+            params.extend(ids)
+        sql = f"SELECT {', '.join('a.' + c for c in cols)} FROM articles a"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql + " ORDER BY a.pub_ts DESC", params
+
+    def read_window(self, query: Optional[str] = None, start: Optional[pd.Timestamp] = None,
+                    end: Optional[pd.Timestamp] = None, sources: Optional[list[str]] = None,
+                    sentiments: Optional[list[str]] = None, ids: Optional[list[str]] = None,
+                    limit: Optional[int] = None, columns: Optional[list[str]] = None) -> pd.DataFrame:
+        cols = [c for c in (columns or ARTICLE_COLUMNS) if c in ARTICLE_COLUMNS]
+        if ids is not None and not ids:
+            return self._frame([], cols)
+        sql, params = self._window_sql(cols, query, start, end, sources, sentiments, ids)
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with span("read_store") as sp, self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+            sp.items = len(rows)
+        return self._frame(rows, cols)
+
+    def iter_window(self, query: Optional[str] = None, start: Optional[pd.Timestamp] = None,
+                    end: Optional[pd.Timestamp] = None, sources: Optional[list[str]] = None,
+                    sentiments: Optional[list[str]] = None, ids: Optional[Iterable[str]] = None,
+                    columns: Optional[list[str]] = None, chunk: int = 50_000) -> Iterator[pd.DataFrame]:
+        # mesma janela do read_window, em lotes de `chunk` linhas; usa conexão própria
+        # (em WAL a leitura longa não bloqueia o coletor) e uma tabela temporária para muitos ids
+        cols = [c for c in (columns or ARTICLE_COLUMNS) if c in ARTICLE_COLUMNS]
+        own = self.path != ":memory:"
+        conn = sqlite3.connect(self.path, timeout=30) if own else self.conn
+        try:
+            id_table = None
+            if ids is not None:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS export_ids (id TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM export_ids")
+                conn.executemany("INSERT OR IGNORE INTO export_ids (id) VALUES (?)", ((i,) for i in ids))
+                id_table = "temp.export_ids"
+            sql, params = self._window_sql(cols, query, start, end, sources, sentiments, id_table=id_table)
+            cur = conn.execute(sql, params)
+            while True:
+                rows = cur.fetchmany(chunk)
+                if not rows:
+                    break
+                yield self._frame(rows, cols)
+        finally:
+            if own:
+                conn.close()
+            else:
+                conn.execute("DROP TABLE IF EXISTS temp.export_ids")
+
+    def _frame(self, rows, columns: Optional[list[str]] = None) -> pd.DataFrame:
+        df = pd.DataFrame([tuple(r) for r in rows], columns=columns or list(ARTICLE_COLUMNS))
+        if "pub_ts" not in df:
+            return df
+        df["data_pub"] = pd.to_datetime(df["pub_ts"], unit="s", utc=True, errors="coerce")
+        return df
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0])
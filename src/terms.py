@@ -0,0 +1,145 @@
+from __future__ import annotations
+import heapq
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Iterable, Optional
+import pandas as pd
+
+from src.clean import clean_text
+
+# stopwords já normalizadas como `descricao_limpa` (minúsculas, sem acento)
+STOPWORDS = frozenset(clean_text(w) for w in """
+de da do das dos a o as os e é em um uma para por com no na nas nos que se sua seu suas seus são ser
+ao à às ou mais menos sobre entre até como também já após pela pelo pelas pelos foi está estão
+isso essa esse esta este nesta neste desta deste mas não nao tem ter há quando onde seja sem num numa
+lhe eles elas
+""".split())
+
+TERM_RE = re.compile(r"[a-z0-9\-]+")
+ALL_QUERIES = "*"           # escopo com todos os artigos, independente da consulta
+EXACT_WINDOW_DAYS = 31      # janelas maiores que isso usam os resumos semanais
+SKETCH_CAPACITY = 500       # termos guardados por semana no resumo Space-Saving
+DAY = 86400
+
+def terms(text: str) -> list[str]:
+    return [w for w in TERM_RE.findall(text or "") if w not in STOPWORDS and len(w) > 2]
+
+def doc_ngrams(text: str) -> Counter:
+    # unigramas e bigramas de um único documento (bigramas nunca cruzam documentos)
+    toks = terms(text)
+    c = Counter((1, t) for t in toks)
+    c.update((2, f"{a} {b}") for a, b in zip(toks, toks[1:]))
+    return c
+
+def count_ngrams(texts: Iterable[str]) -> tuple[Counter, Counter]:
+    uni, bi = Counter(), Counter()
+    for text in texts:
+        for (n, term), c in doc_ngrams(text).items():
+            (uni if n == 1 else bi)[term] += c
+    return uni, bi
+
+
+class TermStats:
+    # contagens de n-gramas por (consulta, dia), atualizadas na ingestão;
+    # top-k de janelas curtas é exato, de janelas longas sai de resumos semanais de heavy hitters
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock):
+        self.conn = conn
+        self.lock = lock
+        with self.lock:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS term_counts (query TEXT NOT NULL, day INTEGER NOT NULL, "
+                "n INTEGER NOT NULL, term TEXT NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (query, n, day, term))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS term_sketch (query TEXT NOT NULL, week INTEGER NOT NULL, "
+                "n INTEGER NOT NULL, term TEXT NOT NULL, count INTEGER NOT NULL, err INTEGER NOT NULL, "
+                "PRIMARY KEY (query, n, week, term))"
+            )
+
+    def add(self, query: str, docs: Iterable[tuple[Optional[int], str]]) -> None:
+        # docs: (timestamp em segundos, texto limpo); chamado dentro da transação da ingestão
+        per_day: dict[int, Counter] = {}
+        for ts, text in docs:
+            if ts is None or pd.isna(ts):
+                continue
+            per_day.setdefault(int(ts) // DAY, Counter()).update(doc_ngrams(text))
+        if not per_day:
+            return
+        with self.lock:
+            rows = [(query, day, n, term, c) for day, cnt in per_day.items() for (n, term), c in cnt.items()]
+            self.conn.executemany(
+                "INSERT INTO term_counts (query, day, n, term, count) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (query, n, day, term) DO UPDATE SET count = count + excluded.count",
+                rows,
+            )
+            per_week: dict[int, Counter] = {}
+            for day, cnt in per_day.items():
+                per_week.setdefault(day // 7, Counter()).update(cnt)
+            for week, cnt in per_week.items():
+                for n in (1, 2):
+                    self._update_sketch(query, week, n, {t: c for (k, t), c in cnt.items() if k == n})
+
+    def _update_sketch(self, query: str, week: int, n: int, counts: dict[str, int]) -> None:
+        # Space-Saving ponderado: quem entra no lugar do mínimo herda a contagem dele como erro.
+        # o mínimo sai de um heap com invalidação preguiçosa: cada incremento empilha a contagem nova
+        # e entradas cuja contagem já não confere são descartadas ao desempilhar (O(log k) por troca)
+        cur = {r[0]: [r[1], r[2]] for r in self.conn.execute(
+            "SELECT term, count, err FROM term_sketch WHERE query = ? AND week = ? AND n = ?", (query, week, n))}
+        heap = [(c, t) for t, (c, _) in cur.items()]
+        heapq.heapify(heap)
+        for term, c in sorted(counts.items(), key=lambda kv: -kv[1]):
+            if term in cur:
+                cur[term][0] += c
+            elif len(cur) < SKETCH_CAPACITY:
+                cur[term] = [c, 0]
+            else:
+                while True:
+                    floor, victim = heapq.heappop(heap)
+                    if victim in cur and cur[victim][0] == floor:
+                        break
+                del cur[victim]
+                cur[term] = [floor + c, floor]
+            heapq.heappush(heap, (cur[term][0], term))
+            if len(heap) > 4 * SKETCH_CAPACITY:
+                heap = [(c, t) for t, (c, _) in cur.items()]
+                heapq.heapify(heap)
+        self.conn.execute("DELETE FROM term_sketch WHERE query = ? AND week = ? AND n = ?", (query, week, n))
+        self.conn.executemany(
+            "INSERT INTO term_sketch (query, week, n, term, count, err) VALUES (?, ?, ?, ?, ?, ?)",
+            [(query, week, n, t, c, e) for t, (c, e) in cur.items()],
+        )
+
+    def clear(self) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM term_counts")
+            self.conn.execute("DELETE FROM term_sketch")
+
+    def top(self, query: Optional[str] = None, n: int = 1, k: int = 15,
+            start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> list[tuple[str, int]]:
+        query = query or ALL_QUERIES
+        d0 = int(pd.Timestamp(start).timestamp()) // DAY if start is not None else None
+        d1 = int(pd.Timestamp(end).timestamp()) // DAY if end is not None else None
+        last = d1 if d1 is not None else int(pd.Timestamp.now(tz="UTC").timestamp()) // DAY
+        exact = d0 is not None and last - d0 <= EXACT_WINDOW_DAYS
+        if exact:
+            sql = "SELECT term, SUM(count) AS c FROM term_counts WHERE query = ? AND n = ? AND day >= ?"
+            params: list = [query, n, d0]
+            if d1 is not None:
+                sql += " AND day <= ?"
+                params.append(d1)
+        else:
+            sql = "SELECT term, SUM(count) AS c FROM term_sketch WHERE query = ? AND n = ?"
+            params = [query, n]
+            if d0 is not None:
+                sql += " AND week >= ?"
+                params.append(d0 // 7)
+            if d1 is not None:
+                sql += " AND week <= ?"
+                params.append(d1 // 7)
+        sql += " GROUP BY term ORDER BY c DESC, term LIMIT ?"
+        params.append(int(k))
+        with self.lock:
+            return [(r[0], int(r[1])) for r in self.conn.execute(sql, params)]
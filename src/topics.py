@@ -0,0 +1,286 @@
+from __future__ import annotations
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+
+from src.config import TOPICS_FEATURES, TOPICS_K
+from src.terms import terms
+
+# temas por agrupamento de TF-IDF esparso, atualizado na ingestão. cada `descricao_limpa` vira um vetor
+# de unigramas + bigramas do próprio documento, com hashing (sem vocabulário fixo) em TOPICS_FEATURES
+# posições; o IDF sai das frequências de documento acumuladas. os temas são k-means esférico em
+# mini-lotes: cada lote ingerido é atribuído ao centroide mais próximo e só os centroides tocados
+# andam em direção à média do lote, sem reajustar o histórico. os termos de cada tema ficam gravados,
+# então o dashboard só conta `topic` no quadro da janela
+
+TOP_TERMS = 8
+SEED_SIMILARITY = 0.15   # documento abaixo disso de todos os temas abre um tema novo (enquanto há vaga)
+MAX_WEIGHT = 2_000       # teto do peso de um tema: os centroides continuam acompanhando o noticiário
+REBUILD_CHUNK = 5_000
+
+
+@dataclass
+class SparseBatch:
+    # matriz CSR de contagens (linhas = documentos) + o termo visto em cada posição do hash
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    vocab: dict[int, str] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def rows(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr))
+
+
+def hash_features(texts: Iterable[str], n_features: int = TOPICS_FEATURES) -> SparseBatch:
+    # só a tokenização é por documento; hashing, contagem e montagem da CSR são vetorizados
+    grams: list[str] = []
+    lengths = []
+    for text in texts:
+        toks = terms(text or "")
+        grams.extend(toks)
+        grams.extend(f"{a} {b}" for a, b in zip(toks, toks[1:]))
+        lengths.append(2 * len(toks) - 1 if toks else 0)
+    n = len(lengths)
+    if not grams:
+        return SparseBatch(np.zeros(n + 1, np.int64), np.zeros(0, np.int32), np.zeros(0, np.float32))
+    codes, uniques = pd.factorize(pd.Series(grams, dtype=object))
+    mask = n_features - 1
+    feats = np.fromiter((zlib.crc32(u.encode("utf-8")) & mask for u in uniques), np.int64, len(uniques))
+    rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+    keys, counts = np.unique(rows * n_features + feats[codes], return_counts=True)
+    rows, indices = keys // n_features, keys % n_features
+    indptr = np.searchsorted(rows, np.arange(n + 1))
+    return SparseBatch(indptr, indices.astype(np.int32), counts.astype(np.float32),
+                       dict(zip(feats.tolist(), uniques)))
+
+
+class TopicModel:
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock, k: int = TOPICS_K,
+                 n_features: int = TOPICS_FEATURES):
+        self.conn = conn
+        self.lock = lock
+        self.k = k
+        self.n_features = n_features
+        self._version: Optional[int] = None
+        self._reset()
+        with self.lock:
+            conn.execute("CREATE TABLE IF NOT EXISTS topic_state (key TEXT PRIMARY KEY, value)")
+            conn.execute("CREATE TABLE IF NOT EXISTS topic_vocab (feature INTEGER PRIMARY KEY, term TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS topic_terms (topic INTEGER NOT NULL, rank INTEGER NOT NULL, "
+                "term TEXT NOT NULL, weight REAL NOT NULL, PRIMARY KEY (topic, rank))"
+            )
+
+    def _reset(self) -> None:
+        self.docfreq = np.zeros(self.n_features, np.int64)
+        self.n_docs = 0
+        self.centroids = np.zeros((self.k, self.n_features), np.float32)
+        self.weights = np.zeros(self.k, np.float64)
+
+    def _state(self, key: str):
+        row = self.conn.execute("SELECT value FROM topic_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _load(self) -> None:
+        self._reset()
+        if self._state("shape") != f"{self.k}x{self.n_features}":
+            return
+        self.n_docs = int(self._state("n_docs") or 0)
+        self.docfreq = np.frombuffer(self._state("docfreq"), np.int64).copy()
+        self.weights = np.frombuffer(self._state("weights"), np.float64).copy()
+        for key, value in self.conn.execute("SELECT key, value FROM topic_state WHERE key LIKE 'c:%'"):
+            self.centroids[int(key[2:])] = np.frombuffer(value, np.float32)
+
+    def _save(self, touched: np.ndarray) -> None:
+        rows = [("shape", f"{self.k}x{self.n_features}"), ("n_docs", self.n_docs),
+                ("docfreq", self.docfreq.tobytes()), ("weights", self.weights.tobytes()),
+                ("version", self._version)]
+        rows += [(f"c:{int(c)}", self.centroids[c].tobytes()) for c in touched]
+        self.conn.executemany("INSERT OR REPLACE INTO topic_state (key, value) VALUES (?, ?)", rows)
+
+    def add(self, batch: SparseBatch) -> np.ndarray:
+        # atribui e atualiza; devolve o tema de cada documento (-1 = sem termos). chamado dentro da
+        # transação da ingestão: o incremento de versão vem primeiro para segurar a trava de escrita
+        # do SQLite antes de ler o estado, então dois processos nunca atualizam a partir da mesma cópia
+        n = len(batch)
+        topics = np.full(n, -1, np.int64)
+        if not n:
+            return topics
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO topic_state (key, value) VALUES ('version', 1) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+            )
+            version = int(self._state("version"))
+            if self._version is None or version != self._version + 1:
+                # primeira chamada ou outro processo (app/coletor) gravou desde a última leitura
+                self._load()
+            self._version = version
+            if not len(batch.indices):
+                self._save(np.zeros(0, np.int64))
+                return topics
+
+            rows = batch.rows()
+            present = np.diff(batch.indptr) > 0
+            self.docfreq += np.bincount(batch.indices, minlength=self.n_features)
+            self.n_docs += int(present.sum())
+            idf = np.log((1.0 + self.n_docs) / (1.0 + self.docfreq)).astype(np.float32) + 1.0
+            w = (1.0 + np.log(batch.data)) * idf[batch.indices]
+            norms = np.sqrt(np.bincount(rows, w * w, minlength=n)).astype(np.float32)
+            w = w / norms[rows]
+
+            sims = self._similarities(batch, w, present)
+            touched = set(self._seed(batch, w, present, sims))
+            active = self.weights > 0
+            active[list(touched)] = True
+            sims[:, ~active] = -np.inf
+            topics[present] = sims[present].argmax(axis=1)
+
+            # média ponderada do centroide com o lote: C <- (v·C + Σx) / (v + n), depois renormaliza
+            nnz_topic = topics[rows]
+            sums = np.bincount(nnz_topic * self.n_features + batch.indices, w,
+                               minlength=self.k * self.n_features).reshape(self.k, self.n_features)
+            sizes = np.bincount(topics[present], minlength=self.k)
+            hit = np.flatnonzero(sizes)
+            v = np.minimum(self.weights[hit], MAX_WEIGHT)[:, None]
+            merged = (v * self.centroids[hit] + sums[hit]) / (v + sizes[hit][:, None])
+            merged /= np.maximum(np.linalg.norm(merged, axis=1, keepdims=True), 1e-12)
+            self.centroids[hit] = merged.astype(np.float32)
+            self.weights[hit] = v[:, 0] + sizes[hit]
+            for c in touched.difference(hit.tolist()):
+                self.centroids[c] = 0      # semente que não ficou com nenhum documento
+
+            self.conn.executemany("INSERT OR IGNORE INTO topic_vocab (feature, term) VALUES (?, ?)",
+                                  list(batch.vocab.items()))
+            self._save(hit)
+            self._update_terms(hit)
+        return topics
+
+    def _similarities(self, batch: SparseBatch, w: np.ndarray, present: np.ndarray) -> np.ndarray:
+        # cosseno documento × centroide direto da CSR: (nnz, k) somado por linha
+        sims = np.zeros((len(batch), self.k), np.float32)
+        if present.any():
+            prod = w[:, None] * self.centroids[:, batch.indices].T
+            sims[present] = np.add.reduceat(prod, batch.indptr[:-1][present], axis=0)
+        return sims
+
+    def _seed(self, batch: SparseBatch, w: np.ndarray, present: np.ndarray, sims: np.ndarray) -> list[int]:
+        # temas vagos recebem o documento mais distante dos temas existentes (farthest-first)
+        free = [c for c in range(self.k) if self.weights[c] == 0]
+        seeded: list[int] = []
+        active = self.weights > 0
+        best = np.where(present, sims[:, active].max(axis=1) if active.any() else -1.0, np.inf)
+        for c in free:
+            doc = int(best.argmin())
+            if best[doc] >= SEED_SIMILARITY:
+                break
+            lo, hi = batch.indptr[doc], batch.indptr[doc + 1]
+            self.centroids[c] = 0
+            self.centroids[c, batch.indices[lo:hi]] = w[lo:hi]
+            col = np.zeros(len(batch), np.float32)
+            col[present] = np.add.reduceat(w * self.centroids[c, batch.indices], batch.indptr[:-1][present])
+            sims[:, c] = col
+            best = np.where(present, np.maximum(best, col), np.inf)
+            seeded.append(c)
+        return seeded
+
+    def _update_terms(self, hit: np.ndarray) -> None:
+        if not len(hit):
+            return
+        top = np.argpartition(-self.centroids[hit], TOP_TERMS * 2, axis=1)[:, :TOP_TERMS * 2]
+        feats = sorted({int(f) for f in top.ravel()})
+        vocab = {}
+        for i in range(0, len(feats), 500):
+            chunk = feats[i:i + 500]
+            vocab.update(self.conn.execute(
+                f"SELECT feature, term FROM topic_vocab WHERE feature IN ({','.join('?' * len(chunk))})", chunk))
+        out = []
+        for c, cand in zip(hit, top):
+            cand = sorted(cand, key=lambda f: -self.centroids[c, f])
+            chosen: list[tuple[str, float]] = []
+            for f in cand:
+                term = vocab.get(int(f))
+                weight = float(self.centroids[c, f])
+                # unigrama já coberto por um bigrama escolhido só repete o rótulo
+                if not term or weight <= 0 or any(term in t.split() for t, _ in chosen):
+                    continue
+                chosen = [(t, x) for t, x in chosen if t not in term.split()] + [(term, weight)]
+                if len(chosen) >= TOP_TERMS:
+                    break
+            out.extend((int(c), r, t, x) for r, (t, x) in enumerate(chosen))
+        marks = ",".join("?" * len(hit))
+        self.conn.execute(f"DELETE FROM topic_terms WHERE topic IN ({marks})", [int(c) for c in hit])
+        self.conn.executemany("INSERT INTO topic_terms (topic, rank, term, weight) VALUES (?, ?, ?, ?)", out)
+
+    def labels(self) -> dict[int, list[str]]:
+        # termos gravados de cada tema, do mais para o menos característico
+        out: dict[int, list[str]] = {}
+        with self.lock:
+            for topic, term in self.conn.execute("SELECT topic, term FROM topic_terms ORDER BY topic, rank"):
+                out.setdefault(topic, []).append(term)
+        return out
+
+    def clear(self) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM topic_state")
+            self.conn.execute("DELETE FROM topic_vocab")
+            self.conn.execute("DELETE FROM topic_terms")
+            self._version = None
+            self._reset()
+
+    def rebuild(self, chunk: int = REBUILD_CHUNK) -> int:
+        # reagrupa todos os artigos do zero, em lotes por rowid (após reprocessar a limpeza, por exemplo)
+        done = 0
+        with self.lock:
+            self.clear()
+            self.conn.execute("UPDATE articles SET topic = NULL")
+            after = 0
+            while True:
+                rows = self.conn.execute(
+                    "SELECT rowid, id, descricao_limpa FROM articles WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (after, chunk),
+                ).fetchall()
+                if not rows:
+                    break
+                after = rows[-1][0]
+                topics = self.add(hash_features([r[2] or "" for r in rows], self.n_features))
+                self.conn.executemany("UPDATE articles SET topic = ? WHERE id = ?",
+                                      [(int(t), r[1]) for t, r in zip(topics, rows) if t >= 0])
+                done += len(rows)
+        return done
+
+
+def topic_table(df: pd.DataFrame, labels: dict[int, list[str]], k: int = 15, points: int = 12) -> pd.DataFrame:
+    # temas da janela: artigos, variação (2ª metade da janela vs 1ª) e série para o gráfico de linha
+    cols = ["tema", "termos", "artigos", "variacao", "serie"]
+    if df.empty or "topic" not in df or "pub_ts" not in df:
+        return pd.DataFrame(columns=cols)
+    topic = pd.to_numeric(df["topic"], errors="coerce").to_numpy(dtype=np.float64)
+    ts = pd.to_numeric(df["pub_ts"], errors="coerce").to_numpy(dtype=np.float64)
+    keep = (topic >= 0) & ~np.isnan(ts)
+    if not keep.any():
+        return pd.DataFrame(columns=cols)
+    topic, ts = topic[keep].astype(np.int64), ts[keep]
+    size = int(topic.max()) + 1
+    lo, hi = ts.min(), ts.max()
+    bucket = np.minimum(((ts - lo) * points // max(hi - lo, 1.0)).astype(np.int64), points - 1)
+    grid = np.bincount(topic * points + bucket, minlength=size * points).reshape(size, points)
+    counts = grid.sum(axis=1)
+    first, second = grid[:, :points // 2].sum(axis=1), grid[:, points // 2:].sum(axis=1)
+    # tema que não aparecia na 1ª metade fica sem variação (não há base de comparação)
+    change = np.where(first > 0, (second - first) / np.maximum(first, 1) * 100, np.nan)
+    order = [c for c in np.argsort(-counts, kind="stable")[:k] if counts[c] > 0]
+    return pd.DataFrame({
+        "tema": [" · ".join(labels.get(int(c), [])[:3]) or f"tema {int(c) + 1}" for c in order],
+        "termos": [", ".join(labels.get(int(c), [])) for c in order],
+        "artigos": counts[order].astype(np.int64),
+        "variacao": change[order].round(0),
+        "serie": [grid[c].tolist() for c in order],
+    }, columns=cols)
@@ -1,5 +1,15 @@
-from collections import Counter
-from typing import Optional
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Optional, Union
+
+WORDCLOUD_TOP_N = 200
+WORDCLOUD_LRU_SIZE = 32
+_wc_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_wc_lock = threading.Lock()
 
 def sentiment_counts(series):
     try:
@@ -10,25 +20,43 @@ def sentiment_counts(series):
         except Exception:
             return {}
 
+def text_column(s):
+    # coluna de texto sem nulos (object), pronta para concatenação vetorizada
+    return s.astype(object).where(s.notna(), "").astype(str)
+
 def add_clickable_links(df, title_col: str, link_col: str, new_col: str = "title_link"):
-    import pandas as pd
-    try:
-        out = df.copy()
-        def _mk(row):
-            t = row.get(title_col)
-            l = row.get(link_col)
-            t = t if isinstance(t, str) and t.strip() else "(sem título)"
-            l = l if isinstance(l, str) and l.strip() else ""
-            return f"[{t}]({l})" if l else t
-        out[new_col] = out.apply(_mk, axis=1)
+    # "[título](link)" em operações de string por coluna (sem apply por linha)
+    out = df.copy()
+    t = text_column(out[title_col]) if title_col in out else None
+    l = text_column(out[link_col]).str.strip() if link_col in out else None
+    if t is None:
         return out
-    except Exception:
-        try:
-            out = pd.DataFrame(df)
-            out[new_col] = out[title_col].fillna("(sem título)")
-            return out
-        except Exception:
-            return df
+    t = t.where(t.str.strip() != "", "(sem título)")
+    out[new_col] = t if l is None else ("[" + t + "](" + l + ")").where(l != "", t)
+    return out
+
+def format_dates(epoch, fmt: str = "%Y-%m-%d %H:%M"):
+    # segundos UTC -> texto, vetorizado ("" quando ausente)
+    import pandas as pd
+    ts = pd.to_datetime(pd.Series(epoch).astype("float64"), unit="s", utc=True)
+    return ts.dt.strftime(fmt).fillna("")
+
+def humanize_series(epoch, now: Optional[float] = None):
+    # segundos UTC -> "agora" / "12 min atrás" / "3 h atrás" / "2 d atrás", vetorizado
+    import time
+    import numpy as np
+    import pandas as pd
+    s = pd.Series(epoch)
+    secs = s.astype("float64").to_numpy()
+    mins = np.floor(((time.time() if now is None else now) - secs) / 60)
+    valid = ~np.isnan(mins)
+    m = np.where(valid, mins, 0).astype(np.int64)
+    text = np.select(
+        [~valid, m < 1, m < 60, m < 1440],
+        ["", "agora", np.char.add(m.astype(str), " min atrás"), np.char.add((m // 60).astype(str), " h atrás")],
+        default=np.char.add((m // 1440).astype(str), " d atrás"),
+    )
+    return pd.Series(text, index=s.index, dtype=object)
 
 def make_wordcloud_image(text: str, width: int = 900, height: int = 500) -> Optional["Image.Image"]:
     if not text or not isinstance(text, str):
@@ -39,4 +67,59 @@ def make_wordcloud_image(text: str, width: int = 900, height: int = 500) -> Opti
         image = wc.generate(text).to_image()
         return image
     except Exception:
-        return None
\ No newline at end of file
+        return None
+
+def _wc_lru_get(key: str) -> Optional[bytes]:
+    with _wc_lock:
+        png = _wc_cache.get(key)
+        if png is not None:
+            _wc_cache.move_to_end(key)
+        return png
+
+def _wc_lru_put(key: str, png: bytes) -> None:
+    with _wc_lock:
+        _wc_cache[key] = png
+        _wc_cache.move_to_end(key)
+        while len(_wc_cache) > WORDCLOUD_LRU_SIZE:
+            _wc_cache.popitem(last=False)
+
+def make_wordcloud_png(freqs: Union[dict, list], width: int = 900, height: int = 500,
+                       top_n: int = WORDCLOUD_TOP_N, cache_dir: Optional[str] = None) -> Optional[bytes]:
+    # nuvem a partir de uma tabela de frequências; o layout só roda quando o top-N muda
+    items = freqs.items() if isinstance(freqs, dict) else freqs
+    top = sorted(((str(t), int(c)) for t, c in items if c and c > 0), key=lambda kv: (-kv[1], kv[0]))[:top_n]
+    if not top:
+        top = [("sem dados", 1)]
+    key = hashlib.sha1(json.dumps([top, width, height]).encode("utf-8")).hexdigest()
+
+    png = _wc_lru_get(key)
+    if png is not None:
+        return png
+    path = os.path.join(cache_dir, f"{key}.png") if cache_dir else None
+    if path and os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                png = f.read()
+            _wc_lru_put(key, png)
+            return png
+        except OSError:
+            pass
+    try:
+        from wordcloud import WordCloud
+        wc = WordCloud(width=width, height=height, background_color="white", random_state=42)
+        buf = io.BytesIO()
+        wc.generate_from_frequencies(dict(top)).to_image().save(buf, format="PNG")
+        png = buf.getvalue()
+    except Exception:
+        return None
+    _wc_lru_put(key, png)
+    if path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(png)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+    return png
\ No newline at end of file
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# `src` é um pacote de namespace na raiz do repositório (como em `streamlit run app.py`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
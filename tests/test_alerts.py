@@ -0,0 +1,32 @@
+from src.alerts import Clause, Rule, RuleMatcher, parse_query
+
+
+def test_exclusion_and_site_apply_to_every_or_branch():
+    # precedência do Google: o OR liga mais forte que o E implícito
+    clauses = parse_query('("banco central" juros) OR (pix fraude) -golpe site:g1.globo.com')
+    assert set(clauses) == {
+        Clause(terms=frozenset([("banco", "central"), ("juros",)]), excluded=frozenset([("golpe",)]),
+               sites=frozenset(["g1.globo.com"])),
+        Clause(terms=frozenset([("pix",), ("fraude",)]), excluded=frozenset([("golpe",)]),
+               sites=frozenset(["g1.globo.com"])),
+    }
+
+
+def test_or_binds_tighter_than_implicit_and():
+    assert set(parse_query("selic OR juros copom")) == {
+        Clause(terms=frozenset([("selic",), ("copom",)])),
+        Clause(terms=frozenset([("juros",), ("copom",)])),
+    }
+
+
+def test_matcher_applies_top_level_filters_to_both_branches():
+    matcher = RuleMatcher([Rule("r", '(pix) OR (fraude) -golpe site:g1.globo.com')])
+    assert matcher.match(["pix"], "g1.globo.com") == {0}
+    assert matcher.match(["fraude"], "g1.globo.com") == {0}
+    assert matcher.match(["pix", "golpe"], "g1.globo.com") == set()
+    assert matcher.match(["pix"], "folha.uol.com.br") == set()
+
+
+def test_ignored_operators_and_stray_or():
+    assert parse_query("OR selic after:2024-01-01 OR") == [Clause(terms=frozenset([("selic",)]))]
+    assert parse_query("") == [Clause()]
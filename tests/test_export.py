@@ -0,0 +1,36 @@
+import io
+
+import pandas as pd
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from src.export import EXPORT_FORMATS, export_file
+from src.pipeline import enrich_frame
+from src.store import ArticleStore
+
+ITEMS = [
+    {"title": f"Notícia {i} sobre inteligência artificial", "link": f"https://exemplo.com.br/{i}",
+     "description": f"<p>Texto da notícia {i}</p>", "pubDate": "Mon, 01 Jul 2024 12:00:00 GMT"}
+    for i in range(5)
+]
+
+
+@pytest.fixture
+def store():
+    s = ArticleStore(":memory:")
+    s.upsert(ITEMS, query="ia", process=enrich_frame)
+    yield s
+    s.close()
+
+
+@pytest.mark.parametrize("ext", [ext for ext, _ in EXPORT_FORMATS.values()])
+def test_export_file_is_accepted_by_download_button(store, ext):
+    # mesma conversão que st.download_button aplica ao retorno do callable
+    data, _ = convert_data_to_bytes_and_infer_mime(export_file(store, ext), RuntimeError("unsupported type"))
+    assert data
+    if ext == "csv":
+        assert len(pd.read_csv(io.BytesIO(data))) == len(ITEMS)
+    elif ext == "jsonl":
+        assert len(pd.read_json(io.BytesIO(data), lines=True)) == len(ITEMS)
+    else:
+        assert len(pd.read_parquet(io.BytesIO(data))) == len(ITEMS)
@@ -0,0 +1,40 @@
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.history import History
+
+
+def _frame(start, n):
+    return pd.DataFrame({"id": [f"a{i}" for i in range(start, start + n)],
+                         "pub_ts": [1719835200 + i for i in range(start, start + n)],
+                         "sentimento": ["Positivo"] * n, "ingested_at": [1] * n})
+
+
+def test_compact_survives_leftovers_and_drops_resynced_rows(tmp_path):
+    h = History(str(tmp_path))
+    for k in range(3):
+        h.append(_frame(k * 10, 10))
+    h.append(_frame(0, 5))                                  # sincronização repetida
+    os.makedirs(tmp_path / ".month=2024-07.old")            # sobra de uma compactação interrompida
+    assert h.compact() == 1
+    assert h.count() == 30
+    assert sorted(os.listdir(tmp_path)) == ["month=2024-07"]
+    assert len(os.listdir(tmp_path / "month=2024-07")) == 1
+
+
+def test_files_appended_after_listing_are_kept(tmp_path, monkeypatch):
+    h = History(str(tmp_path))
+    h.append(_frame(0, 10))
+    h.append(_frame(10, 10))
+    real_read = pq.read_table
+
+    def read_then_append(*args, **kwargs):
+        # um sync_history grava no meio da compactação
+        table = real_read(*args, **kwargs)
+        h.append(_frame(100, 3))
+        return table
+    monkeypatch.setattr(pq, "read_table", read_then_append)
+    h.compact()
+    assert h.count() == 23
@@ -0,0 +1,11 @@
+from src.store import ArticleStore
+
+
+def test_rebuild_with_unclassified_articles():
+    # artigos sem `process` ficam com sentimento NULL; o bucket deles precisa virar zeros, não NULL
+    store = ArticleStore(":memory:")
+    store.upsert([{"title": "a", "link": "https://exemplo.com.br/1", "description": "d",
+                   "pubDate": "Mon, 01 Jul 2024 12:00:00 GMT"}], query="q")
+    store.rollups.rebuild()
+    rows = store.conn.execute("SELECT total, pos, neu, neg FROM rollups WHERE grain = 'd'").fetchall()
+    assert [tuple(r) for r in rows] == [(1, 0, 0, 0), (1, 0, 0, 0)]